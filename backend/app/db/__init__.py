@@ -1,6 +1,6 @@
 """
 Database package initialization.
 """
-from .config import Base, engine, SessionLocal, get_db
+from .config import Base, engine, SessionLocal, get_async_db, get_db, session_scope
 
-__all__ = ["Base", "engine", "SessionLocal", "get_db"]
+__all__ = ["Base", "engine", "SessionLocal", "get_async_db", "get_db", "session_scope"]
@@ -0,0 +1,75 @@
+"""
+Async read operations for the endpoints served on the event loop.
+
+These mirror the read methods of the DALs in crud.py on an AsyncSession, for
+cheap, frequently polled endpoints (session, upload status, calculation
+headers) that should not wait for a threadpool slot behind long-running
+uploads and calculations. Writes, and reads that do heavy work (such as
+TeamCalculationSummaryDAL.get_summaries), stay in crud.py.
+"""
+from typing import List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import defer
+
+from . import models
+from .session_cache import CachedSession, session_cache
+
+
+class AsyncSessionDAL:
+    """Async read access to the Session model."""
+
+    @staticmethod
+    async def get_session(db: AsyncSession, session_id: str) -> Optional[models.Session]:
+        """Get a session by ID."""
+        return await db.get(models.Session, session_id)
+
+    @staticmethod
+    async def get_cached_session(db: AsyncSession, session_id: str) -> Optional[CachedSession]:
+        """Get a session by ID through the session cache (see SessionDAL.get_cached_session)."""
+        found, cached = session_cache.get(session_id)
+        if found:
+            return cached
+        version = session_cache.version()
+        session = await AsyncSessionDAL.get_session(db, session_id)
+        cached = CachedSession.from_model(session) if session else None
+        session_cache.put(session_id, cached, version)
+        return cached
+
+
+class AsyncBatchUploadDAL:
+    """Async read access to the BatchUpload model."""
+
+    # The stored file and its parsed forms are not needed to report on an upload
+    _FILE_COLUMNS = (
+        defer(models.BatchUpload.raw_file_content),
+        defer(models.BatchUpload.parsed_data),
+    )
+
+    @staticmethod
+    async def get_upload(db: AsyncSession, upload_id: int) -> Optional[models.BatchUpload]:
+        """Get an upload by ID, without its file content."""
+        return (await db.execute(
+            select(models.BatchUpload)
+            .options(*AsyncBatchUploadDAL._FILE_COLUMNS)
+            .where(models.BatchUpload.id == upload_id)
+        )).scalar_one_or_none()
+
+    @staticmethod
+    async def get_uploads_by_session(db: AsyncSession, session_id: str) -> List[models.BatchUpload]:
+        """Get all uploads for a session, without their file content."""
+        return list((await db.execute(
+            select(models.BatchUpload)
+            .options(*AsyncBatchUploadDAL._FILE_COLUMNS)
+            .where(models.BatchUpload.session_id == session_id)
+        )).scalars())
+
+
+class AsyncBatchCalculationResultDAL:
+    """Async read access to the BatchCalculationResult model."""
+
+    @staticmethod
+    async def get_result(db: AsyncSession, result_id: int) -> Optional[models.BatchCalculationResult]:
+        """Get a result by ID."""
+        return await db.get(models.BatchCalculationResult, result_id)
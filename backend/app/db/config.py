@@ -2,13 +2,27 @@
 Database configuration module for the application.
 """
 import os
+from contextlib import contextmanager
+from functools import lru_cache
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
 # Get database URL from environment variable or use SQLite as default
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./compensation_calculator.db")
 
+# Async driver URL for the read endpoints served on the event loop; derived from DATABASE_URL
+# (aiosqlite for SQLite, asyncpg for PostgreSQL) unless set
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL")
+
+# Async drivers of the sync database URL schemes
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+}
+
 # Create SQLAlchemy engine
 engine = create_engine(
     DATABASE_URL, 
@@ -33,3 +47,60 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def async_database_url(url: str) -> str:
+    """
+    Get the async driver equivalent of a database URL.
+
+    Args:
+        url: A database URL, e.g. "sqlite:///./app.db"
+
+    Returns:
+        The URL with its scheme replaced by the async driver's (unchanged if it already names one)
+    """
+    scheme, separator, rest = url.partition("://")
+    return ASYNC_DRIVERS.get(scheme, scheme) + separator + rest
+
+
+@lru_cache(maxsize=None)
+def get_async_engine() -> AsyncEngine:
+    """
+    Get the async engine, created on first use.
+
+    It is created lazily so the async driver (aiosqlite or asyncpg) is only
+    imported when an async endpoint is first called.
+    """
+    return create_async_engine(ASYNC_DATABASE_URL or async_database_url(DATABASE_URL), echo=False)
+
+
+@lru_cache(maxsize=None)
+def get_async_session_factory() -> async_sessionmaker:
+    """Get the factory of async sessions bound to the async engine."""
+    # Objects stay readable after commit, as lazy loads are not possible on an async session
+    return async_sessionmaker(get_async_engine(), autoflush=False, expire_on_commit=False)
+
+
+async def get_async_db():
+    """
+    Dependency function to get an async database session.
+    Yields a session and ensures it's closed after use.
+    """
+    async with get_async_session_factory()() as db:
+        yield db
+
+
+@contextmanager
+def session_scope(session_factory=None):
+    """
+    Context manager for database sessions used outside of request handling
+    (background jobs, scripts). Rolls back on error and always closes the session.
+    """
+    db = (session_factory or SessionLocal)()
+    try:
+        yield db
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
@@ -4,12 +4,16 @@ CRUD operations for database models.
 import uuid
 import datetime
 import json
-import pandas as pd
-from typing import List, Optional, Dict, Any
+import logging
+import statistics
+from typing import TYPE_CHECKING, Iterable, List, Optional, Dict, Any, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from sqlalchemy import or_, update, func, case, delete, insert, select
 
 from . import models, schemas
+from .retention import cleanup_expired_data
+from .session_cache import CachedSession, session_cache
+from .template_cache import CachedTemplate, template_cache
 from .models import Session as SessionModel, BatchUpload, EmployeeData, ImportTemplate, BatchScenario 
 from .schemas import (
     SessionCreate, BatchUploadCreate, EmployeeDataCreate, 
@@ -17,7 +21,12 @@ from .schemas import (
     ColumnInfoSchema 
 )
 from sqlalchemy.orm import Session
-from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.exc import SQLAlchemyError, IntegrityError
+
+logger = logging.getLogger(__name__)
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 class SessionDAL:
     """Data Access Layer for Session model."""
@@ -33,6 +42,7 @@ class SessionDAL:
         db.add(session)
         db.commit()
         db.refresh(session)
+        session_cache.invalidate(session.id)
         return session
     
     @staticmethod
@@ -40,6 +50,23 @@ class SessionDAL:
         """Get a session by ID."""
         return db.query(models.Session).filter(models.Session.id == session_id).first()
     
+    @staticmethod
+    def get_cached_session(db: Session, session_id: str) -> Optional[CachedSession]:
+        """
+        Get a session by ID through the session cache, for checking that it exists and has not expired.
+        
+        Returns:
+            A read-only snapshot of the session, or None if there is no such session
+        """
+        found, cached = session_cache.get(session_id)
+        if found:
+            return cached
+        version = session_cache.version()
+        session = SessionDAL.get_session(db, session_id)
+        cached = CachedSession.from_model(session) if session else None
+        session_cache.put(session_id, cached, version)
+        return cached
+    
     @staticmethod
     def extend_session(db: Session, session_id: str, hours: int = 24) -> Optional[models.Session]:
         """Extend a session's expiration time."""
@@ -50,15 +77,13 @@ class SessionDAL:
         session.expires_at = datetime.datetime.now() + datetime.timedelta(hours=hours)
         db.commit()
         db.refresh(session)
+        session_cache.invalidate(session_id)
         return session
     
     @staticmethod
     def delete_expired_sessions(db: Session) -> int:
-        """Delete all expired sessions."""
-        now = datetime.datetime.now()
-        result = db.query(models.Session).filter(models.Session.expires_at < now).delete()
-        db.commit()
-        return result
+        """Delete all expired sessions and their dependent data in bounded chunks."""
+        return cleanup_expired_data(db)["deleted_sessions"]
 
 
 class BatchScenarioDAL:
@@ -149,12 +174,13 @@ class BatchUploadDAL:
         expires_in_hours: int = 24,
         source_columns_info: Optional[List[Dict[str, Any]]] = None,
         raw_file_content: Optional[bytes] = None,
-        status: str = "awaiting_mapping"
+        status: str = "awaiting_mapping",
+        sheet_name: Optional[str] = None,
+        header_row: int = 0
     ) -> models.BatchUpload:
         """Create a new batch upload record, storing raw file content and column info."""
         try:
-            # Add logging for debugging
-            print(f"Creating batch upload with session_id={session_id}, filename={filename}, expires_in_hours={expires_in_hours}")
+            logger.debug(f"Creating batch upload with session_id={session_id}, filename={filename}, expires_in_hours={expires_in_hours}")
             
             # Convert expires_in_hours to an actual datetime for the database
             expires_at = datetime.datetime.utcnow() + datetime.timedelta(hours=expires_in_hours)
@@ -168,7 +194,9 @@ class BatchUploadDAL:
                 uploaded_at=now,
                 status=status,
                 source_columns_info=json.dumps(source_columns_info) if source_columns_info else None,
-                raw_file_content=raw_file_content
+                raw_file_content=raw_file_content,
+                sheet_name=sheet_name,
+                header_row=header_row
                 # Let SQLAlchemy handle created_at and updated_at via server defaults
             )
             
@@ -177,21 +205,19 @@ class BatchUploadDAL:
             db.commit()
             db.refresh(db_upload)
             
-            print(f"Successfully created batch upload with ID: {db_upload.id}")
+            logger.debug(f"Successfully created batch upload with ID: {db_upload.id}")
             return db_upload
         except SQLAlchemyError as e:
             db.rollback()  # Roll back the transaction on error
-            print(f"SQLAlchemy error creating batch upload: {str(e)}")
-            print(f"Original error: {e.__cause__}")
-            print(f"SQL error details: {getattr(e, 'orig', 'No original error')}")
-            import traceback
-            traceback.print_exc()  # Print full traceback for better debugging
+            logger.error(
+                f"SQLAlchemy error creating batch upload: {str(e)} "
+                f"(details: {getattr(e, 'orig', 'No original error')})",
+                exc_info=True
+            )
             raise  # Re-raise the exception for proper error handling
         except Exception as e:
             db.rollback()  # Roll back the transaction on error
-            print(f"Error creating batch upload: {str(e)}")
-            import traceback
-            traceback.print_exc()  # Print full traceback for better debugging
+            logger.error(f"Error creating batch upload: {str(e)}", exc_info=True)
             raise  # Re-raise the exception for proper error handling
     
     @staticmethod
@@ -210,6 +236,14 @@ class BatchUploadDAL:
         """Get all uploads for a session."""
         return db.query(models.BatchUpload).filter(models.BatchUpload.session_id == session_id).all()
     
+    @staticmethod
+    def get_latest_upload(db: Session, session_id: Optional[str] = None) -> Optional[models.BatchUpload]:
+        """Get the most recent upload, of a session if one is given."""
+        query = db.query(models.BatchUpload)
+        if session_id:
+            query = query.filter(models.BatchUpload.session_id == session_id)
+        return query.order_by(models.BatchUpload.uploaded_at.desc()).first()
+    
     @staticmethod
     def delete_upload(db: Session, upload_id: int) -> bool:
         """Delete an upload."""
@@ -223,11 +257,8 @@ class BatchUploadDAL:
     
     @staticmethod
     def delete_expired_uploads(db: Session) -> int:
-        """Delete all expired uploads."""
-        now = datetime.datetime.now()
-        result = db.query(models.BatchUpload).filter(models.BatchUpload.expires_at < now).delete()
-        db.commit()
-        return result
+        """Delete all expired uploads and their dependent data in bounded chunks."""
+        return cleanup_expired_data(db)["deleted_uploads"]
 
     @staticmethod
     def update_upload_status(db: Session, upload_id: int, status: str) -> Optional[models.BatchUpload]:
@@ -275,6 +306,14 @@ class BatchUploadDAL:
             return upload
         return None
 
+    @staticmethod
+    def store_parsed_data(db: Session, upload_id: int, parsed_data: Optional[bytes]) -> None:
+        """Store the columnar (Arrow IPC) cache of an upload's parsed file."""
+        db.query(models.BatchUpload).filter(models.BatchUpload.id == upload_id).update(
+            {models.BatchUpload.parsed_data: parsed_data}, synchronize_session="fetch"
+        )
+        db.commit()
+
 
 class EmployeeDataDAL:
     """Data Access Layer for EmployeeData model."""
@@ -319,6 +358,25 @@ class EmployeeDataDAL:
         db.refresh(employee)
         return employee
     
+    @staticmethod
+    def create_employees(db: Session, batch_upload_id: int, employees: Iterable[Dict[str, Any]]) -> int:
+        """
+        Store the employees of an upload with one executemany and one commit.
+        
+        Args:
+            db: Database session
+            batch_upload_id: ID of the batch upload
+            employees: Dictionaries of EmployeeData fields (without batch_upload_id)
+            
+        Returns:
+            Number of employees stored
+        """
+        rows = [{**employee, "batch_upload_id": batch_upload_id} for employee in employees]
+        if rows:
+            db.execute(insert(models.EmployeeData.__table__), rows)
+            db.commit()
+        return len(rows)
+    
     @staticmethod
     def get_employee(db: Session, employee_id: int) -> Optional[models.EmployeeData]:
         """Get an employee by ID."""
@@ -329,6 +387,53 @@ class EmployeeDataDAL:
         """Get all employees for a batch upload."""
         return db.query(models.EmployeeData).filter(models.EmployeeData.batch_upload_id == batch_upload_id).all()
     
+    @staticmethod
+    def has_employees(db: Session, batch_upload_id: int) -> bool:
+        """Whether any employee rows have been stored for a batch upload."""
+        return db.query(
+            db.query(models.EmployeeData.id).filter(models.EmployeeData.batch_upload_id == batch_upload_id).exists()
+        ).scalar()
+    
+    @staticmethod
+    def get_employee_ids(db: Session, batch_upload_id: int) -> List[Tuple[int, Optional[str]]]:
+        """Get the (database ID, employee ID) pairs of a batch upload without loading the rows."""
+        return [
+            tuple(row) for row in db.query(models.EmployeeData.id, models.EmployeeData.employee_id)
+            .filter(models.EmployeeData.batch_upload_id == batch_upload_id)
+        ]
+    
+    @staticmethod
+    def get_calculation_rows(db: Session, batch_upload_id: int) -> List[Any]:
+        """
+        Get the calculation inputs of every employee of a batch upload as plain rows.
+        
+        The rows have the EmployeeData attributes a bonus calculation reads (id, team,
+        the salary and performance columns, is_mrt, mrt_cap_pct and parameter_overrides),
+        but are not ORM objects, so they are cheap to load and are not expired by commits.
+        """
+        employee = models.EmployeeData
+        return db.query(
+            employee.id, employee.team, employee.base_salary, employee.target_bonus_pct,
+            employee.investment_weight, employee.qualitative_weight, employee.investment_score_multiplier,
+            employee.qual_score_multiplier, employee.raf, employee.is_mrt, employee.mrt_cap_pct,
+            employee.parameter_overrides
+        ).filter(employee.batch_upload_id == batch_upload_id).order_by(employee.id).all()
+    
+    @staticmethod
+    def get_employee_rows(db: Session, batch_upload_id: int, team: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Get the employees of a batch upload (optionally of one team) as plain rows, ordered by ID.
+        
+        Returns:
+            One dictionary of schemas.EmployeeData fields per employee
+        """
+        table = models.EmployeeData.__table__
+        fields = list(schemas.EmployeeData.model_fields)
+        query = select(*(table.c[field] for field in fields)).where(table.c.batch_upload_id == batch_upload_id)
+        if team:
+            query = query.where(table.c.team == team)
+        return [dict(zip(fields, row)) for row in db.execute(query.order_by(table.c.id))]
+    
     @staticmethod
     def get_employees_by_team(db: Session, batch_upload_id: int, team: str) -> List[models.EmployeeData]:
         """Get all employees for a specific team in a batch upload."""
@@ -340,7 +445,7 @@ class EmployeeDataDAL:
     @staticmethod
     def save_employees_from_dataframe(
         db: Session,
-        df: pd.DataFrame,
+        df: "pd.DataFrame",
         batch_upload_id: int,
         column_mapping: Dict[str, str]
     ) -> int:
@@ -391,9 +496,7 @@ class EmployeeDataDAL:
             return employees_saved
         except Exception as e:
             db.rollback()
-            print(f"Error saving employees from DataFrame: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            logger.error(f"Error saving employees from DataFrame: {str(e)}", exc_info=True)
             raise
     
     @staticmethod
@@ -416,6 +519,120 @@ class EmployeeDataDAL:
         return employee
 
 
+class UploadRowErrorDAL:
+    """Data Access Layer for UploadRowError model."""
+    
+    @staticmethod
+    def create_errors(db: Session, batch_upload_id: int, errors: Iterable[Dict[str, Any]]) -> int:
+        """
+        Store row errors of an upload with a single executemany.
+        
+        Args:
+            db: Database session
+            batch_upload_id: ID of the batch upload
+            errors: Dictionaries with row_number, field, error_type, message and value
+            
+        Returns:
+            Number of errors stored
+        """
+        rows = [{**error, "batch_upload_id": batch_upload_id} for error in errors]
+        if rows:
+            db.execute(insert(models.UploadRowError), rows)
+            db.commit()
+        return len(rows)
+    
+    @staticmethod
+    def get_errors(
+        db: Session,
+        batch_upload_id: int,
+        skip: int = 0,
+        limit: int = 100,
+        field: Optional[str] = None
+    ) -> List[models.UploadRowError]:
+        """Get one page of an upload's row errors, in row order."""
+        query = db.query(models.UploadRowError).filter(models.UploadRowError.batch_upload_id == batch_upload_id)
+        if field is not None:
+            query = query.filter(models.UploadRowError.field == field)
+        return query.order_by(
+            models.UploadRowError.row_number, models.UploadRowError.id
+        ).offset(skip).limit(limit).all()
+    
+    @staticmethod
+    def count_errors(db: Session, batch_upload_id: int, field: Optional[str] = None) -> int:
+        """Count an upload's row errors."""
+        query = db.query(func.count(models.UploadRowError.id)).filter(
+            models.UploadRowError.batch_upload_id == batch_upload_id
+        )
+        if field is not None:
+            query = query.filter(models.UploadRowError.field == field)
+        return query.scalar()
+    
+    @staticmethod
+    def delete_errors(db: Session, batch_upload_id: int) -> int:
+        """Delete an upload's row errors, e.g. before it is mapped again."""
+        result = db.execute(
+            delete(models.UploadRowError)
+            .where(models.UploadRowError.batch_upload_id == batch_upload_id)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        return result.rowcount
+
+
+class EmployeeFundAlphaDAL:
+    """Data Access Layer for EmployeeFundAlpha model."""
+    
+    @staticmethod
+    def replace_fund_alphas(db: Session, batch_upload_id: int, funds: Iterable[Dict[str, Any]]) -> int:
+        """
+        Replace the fund alphas of an upload in one transaction.
+        
+        Args:
+            db: Database session
+            batch_upload_id: ID of the batch upload
+            funds: Dictionaries with employee_data_id, fund, alpha and aum_weight
+            
+        Returns:
+            Number of fund rows stored
+        """
+        db.execute(
+            delete(models.EmployeeFundAlpha)
+            .where(models.EmployeeFundAlpha.batch_upload_id == batch_upload_id)
+            .execution_options(synchronize_session=False)
+        )
+        rows = [{**fund, "batch_upload_id": batch_upload_id} for fund in funds]
+        if rows:
+            # A Core insert on the table skips the ORM's per-row bookkeeping, which
+            # dominates for fund files of hundreds of thousands of rows
+            db.execute(insert(models.EmployeeFundAlpha.__table__), rows)
+        db.commit()
+        return len(rows)
+    
+    @staticmethod
+    def get_weighted_alphas(db: Session, batch_upload_id: int) -> List[Tuple[int, float, int]]:
+        """
+        AUM-weighted alpha of every employee of an upload that has funds, aggregated by the database.
+        
+        Matches calculation_engine.calculate_weighted_alphas: employees whose funds all
+        have zero weight get the plain mean of their alphas.
+        
+        Returns:
+            (employee_data_id, weighted_alpha, fund_count) tuples ordered by employee_data_id
+        """
+        fund = models.EmployeeFundAlpha
+        weight_total = func.sum(fund.aum_weight)
+        weighted_alpha = case(
+            (weight_total != 0, func.sum(fund.alpha * fund.aum_weight) / weight_total),
+            else_=func.avg(fund.alpha)
+        )
+        rows = db.query(
+            fund.employee_data_id, weighted_alpha, func.count(fund.id)
+        ).filter(
+            fund.batch_upload_id == batch_upload_id
+        ).group_by(fund.employee_data_id).order_by(fund.employee_data_id).all()
+        return [tuple(row) for row in rows]
+
+
 class BatchCalculationResultDAL:
     """Data Access Layer for BatchCalculationResult model."""
     
@@ -487,6 +704,60 @@ class EmployeeCalculationResultDAL:
         db.refresh(result)
         return result
     
+    @staticmethod
+    def create_results(db: Session, batch_result_id: int, results: Iterable[Dict[str, Any]]) -> int:
+        """
+        Store the employee results of a batch calculation with one executemany.
+        
+        The caller commits, so the results can share a transaction with their batch result.
+        
+        Args:
+            db: Database session
+            batch_result_id: The batch calculation the results belong to
+            results: Dictionaries of EmployeeCalculationResult fields (without batch_result_id)
+            
+        Returns:
+            Number of results stored
+        """
+        rows = [{**result, "batch_result_id": batch_result_id} for result in results]
+        if rows:
+            db.execute(insert(models.EmployeeCalculationResult.__table__), rows)
+        return len(rows)
+    
+    @staticmethod
+    def get_result_version(db: Session, batch_result_id: int) -> Tuple[int, Optional[int]]:
+        """
+        Get the number and highest ID of the employee results of a batch calculation.
+        
+        Results are only ever added, so the pair changes whenever the rows do; it is
+        read from the batch_result_id index without loading the rows.
+        """
+        table = models.EmployeeCalculationResult.__table__
+        count, last_id = db.execute(
+            select(func.count(table.c.id), func.max(table.c.id)).where(table.c.batch_result_id == batch_result_id)
+        ).one()
+        return count, last_id
+    
+    @staticmethod
+    def get_result_rows(db: Session, batch_result_id: int) -> List[Dict[str, Any]]:
+        """
+        Get the employee results of a batch calculation as plain rows, ordered by ID.
+        
+        Reads only the columns of the response schema with a Core query, without
+        building an ORM object per result.
+        
+        Returns:
+            One dictionary of schemas.EmployeeCalculationResult fields per result
+        """
+        table = models.EmployeeCalculationResult.__table__
+        fields = list(schemas.EmployeeCalculationResult.model_fields)
+        rows = db.execute(
+            select(*(table.c[field] for field in fields))
+            .where(table.c.batch_result_id == batch_result_id)
+            .order_by(table.c.id)
+        )
+        return [dict(zip(fields, row)) for row in rows]
+    
     @staticmethod
     def get_result(db: Session, result_id: int) -> Optional[models.EmployeeCalculationResult]:
         """Get an employee calculation result by ID."""
@@ -507,6 +778,176 @@ class EmployeeCalculationResultDAL:
             models.EmployeeCalculationResult.employee_data_id == employee_id
         ).first()
 
+    @staticmethod
+    def get_latest_batch_result_id_for_upload(db: Session, batch_upload_id: int) -> Optional[int]:
+        """
+        Get the ID of the most recent batch calculation run over an upload's employees.
+        
+        Batch results are walked newest first, and each is probed for one result of
+        the upload's employees through the batch_result_id index, so the latest
+        calculation is found without joining every stored result of the upload.
+        """
+        result = models.EmployeeCalculationResult
+        has_upload_results = select(result.id).join(
+            models.EmployeeData, result.employee_data_id == models.EmployeeData.id
+        ).where(
+            result.batch_result_id == models.BatchCalculationResult.id,
+            models.EmployeeData.batch_upload_id == batch_upload_id
+        ).exists()
+        return db.execute(
+            select(models.BatchCalculationResult.id)
+            .where(has_upload_results)
+            .order_by(models.BatchCalculationResult.id.desc())
+            .limit(1)
+        ).scalar()
+    
+    @staticmethod
+    def get_team_aggregations(db: Session, batch_result_id: int) -> List[Dict[str, Any]]:
+        """
+        Aggregate the employee results of a batch calculation by team.
+        
+        The aggregation runs as a single GROUP BY in the database; employees without
+        a team are grouped under "Unassigned".
+        """
+        result = models.EmployeeCalculationResult
+        team = func.coalesce(models.EmployeeData.team, "Unassigned").label("team")
+        rows = db.query(
+            team,
+            func.count(result.id),
+            func.sum(models.EmployeeData.base_salary),
+            func.sum(result.final_bonus),
+            func.sum(case((result.applied_cap.isnot(None), 1), else_=0))
+        ).join(
+            models.EmployeeData, result.employee_data_id == models.EmployeeData.id
+        ).filter(
+            result.batch_result_id == batch_result_id
+        ).group_by(team).order_by(team).all()
+        
+        return [
+            {
+                "team": team_name,
+                "employee_count": employee_count,
+                "total_base_salary": total_base_salary or 0.0,
+                "total_bonus": total_bonus or 0.0,
+                "capped_employee_count": capped_employee_count or 0
+            }
+            for team_name, employee_count, total_base_salary, total_bonus, capped_employee_count in rows
+        ]
+
+
+class TeamCalculationSummaryDAL:
+    """Data Access Layer for TeamCalculationSummary model."""
+    
+    @staticmethod
+    def build_summaries(
+        employee_results: Iterable[Tuple[Optional[str], float, float, bool, bool]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Compute per-team statistics.
+        
+        Args:
+            employee_results: (team, base_salary, final_bonus, capped, policy_breach) per employee;
+                employees without a team are summarised under "Unassigned"
+            
+        Returns:
+            One dictionary of TeamCalculationSummary fields per team, ordered by team
+        """
+        teams: Dict[str, Dict[str, Any]] = {}
+        for team, base_salary, final_bonus, capped, policy_breach in employee_results:
+            team = team or "Unassigned"
+            if team not in teams:
+                teams[team] = {"base_salaries": 0.0, "bonuses": [], "capped": 0, "breaches": 0}
+            data = teams[team]
+            data["base_salaries"] += base_salary or 0.0
+            data["bonuses"].append(final_bonus or 0.0)
+            data["capped"] += 1 if capped else 0
+            data["breaches"] += 1 if policy_breach else 0
+        
+        return [
+            {
+                "team": team,
+                "employee_count": len(data["bonuses"]),
+                "total_base_salary": data["base_salaries"],
+                "total_bonus": sum(data["bonuses"]),
+                "capped_count": data["capped"],
+                "policy_breach_count": data["breaches"],
+                "min_bonus": min(data["bonuses"]),
+                "median_bonus": statistics.median(data["bonuses"]),
+                "max_bonus": max(data["bonuses"])
+            }
+            for team, data in sorted(teams.items())
+        ]
+    
+    @staticmethod
+    def create_summaries(
+        db: Session,
+        batch_result_id: int,
+        employee_results: Iterable[Tuple[Optional[str], float, float, bool, bool]]
+    ) -> List[models.TeamCalculationSummary]:
+        """
+        Store per-team statistics for a batch calculation.
+        
+        The caller commits, so the statistics can share a transaction with their batch result.
+        
+        Args:
+            db: Database session
+            batch_result_id: The batch calculation the statistics belong to
+            employee_results: (team, base_salary, final_bonus, capped, policy_breach) per employee
+        """
+        summaries = [
+            models.TeamCalculationSummary(batch_result_id=batch_result_id, **summary)
+            for summary in TeamCalculationSummaryDAL.build_summaries(employee_results)
+        ]
+        db.add_all(summaries)
+        db.flush()
+        return summaries
+    
+    @staticmethod
+    def get_employee_result_rows(db: Session, batch_result_id: int) -> List[Tuple[Optional[str], float, float, bool, bool]]:
+        """The (team, base_salary, final_bonus, capped, policy_breach) of each employee result of a calculation."""
+        result = models.EmployeeCalculationResult
+        return db.query(
+            models.EmployeeData.team,
+            models.EmployeeData.base_salary,
+            result.final_bonus,
+            result.applied_cap.isnot(None),
+            result.policy_breach
+        ).join(
+            models.EmployeeData, result.employee_data_id == models.EmployeeData.id
+        ).filter(
+            result.batch_result_id == batch_result_id
+        ).all()
+    
+    @staticmethod
+    def create_summaries_from_results(db: Session, batch_result_id: int) -> List[models.TeamCalculationSummary]:
+        """Compute and store per-team statistics from a calculation's stored employee results (the caller commits)."""
+        return TeamCalculationSummaryDAL.create_summaries(
+            db, batch_result_id, TeamCalculationSummaryDAL.get_employee_result_rows(db, batch_result_id)
+        )
+    
+    @staticmethod
+    def get_summaries(db: Session, batch_result_id: int) -> List[models.TeamCalculationSummary]:
+        """
+        Get the per-team statistics of a batch calculation.
+        
+        The calculation endpoint stores them, and migration 2b7e9c4f1a36 backfilled
+        calculations stored before they existed. For a calculation without them (e.g.
+        one stored without going through the calculation endpoint) they are computed
+        from its employee results but not stored, so reads never write; the computed
+        summaries have no ID.
+        """
+        summaries = db.query(models.TeamCalculationSummary).filter(
+            models.TeamCalculationSummary.batch_result_id == batch_result_id
+        ).order_by(models.TeamCalculationSummary.team).all()
+        if summaries:
+            return summaries
+        return [
+            models.TeamCalculationSummary(batch_result_id=batch_result_id, **summary)
+            for summary in TeamCalculationSummaryDAL.build_summaries(
+                TeamCalculationSummaryDAL.get_employee_result_rows(db, batch_result_id)
+            )
+        ]
+
 
 class ImportTemplateDAL:
     """Data Access Layer for ImportTemplate model."""
@@ -533,27 +974,37 @@ class ImportTemplateDAL:
         db.add(db_template)
         db.commit()
         db.refresh(db_template)
+        template_cache.invalidate(db)
         return db_template
     
     @staticmethod
-    def get_template(db: Session, template_id: int) -> Optional[models.ImportTemplate]:
-        """Get an import template by ID."""
-        return db.query(models.ImportTemplate).filter(models.ImportTemplate.id == template_id).first()
+    def get_template(db: Session, template_id: int) -> Optional[CachedTemplate]:
+        """Get an import template by ID, from the template cache when possible."""
+        def load():
+            template = db.query(models.ImportTemplate).filter(models.ImportTemplate.id == template_id).first()
+            return CachedTemplate.from_model(template) if template else None
+        return template_cache.get_or_load(db, ("template", template_id), load)
     
     @staticmethod
-    def get_templates_by_session(db: Session, session_id: str) -> List[models.ImportTemplate]:
-        """Get all import templates for a session, including public templates."""
-        return db.query(models.ImportTemplate).filter(
-            or_(
-                models.ImportTemplate.session_id == session_id,
-                models.ImportTemplate.is_public == True
-            )
-        ).all()
+    def get_templates_by_session(db: Session, session_id: str) -> List[CachedTemplate]:
+        """Get all import templates for a session, including public templates, from the template cache when possible."""
+        def load():
+            templates = db.query(models.ImportTemplate).filter(
+                or_(
+                    models.ImportTemplate.session_id == session_id,
+                    models.ImportTemplate.is_public == True
+                )
+            ).all()
+            return tuple(CachedTemplate.from_model(template) for template in templates)
+        return list(template_cache.get_or_load(db, ("session", session_id), load))
     
     @staticmethod
-    def get_public_templates(db: Session) -> List[models.ImportTemplate]:
-        """Get all public import templates."""
-        return db.query(models.ImportTemplate).filter(models.ImportTemplate.is_public == True).all()
+    def get_public_templates(db: Session) -> List[CachedTemplate]:
+        """Get all public import templates, from the template cache when possible."""
+        def load():
+            templates = db.query(models.ImportTemplate).filter(models.ImportTemplate.is_public == True).all()
+            return tuple(CachedTemplate.from_model(template) for template in templates)
+        return list(template_cache.get_or_load(db, ("public",), load))
     
     @staticmethod
     def update_template(
@@ -583,6 +1034,7 @@ class ImportTemplateDAL:
         
         db.commit()
         db.refresh(db_template)
+        template_cache.invalidate(db)
         return db_template
     
     @staticmethod
@@ -594,4 +1046,59 @@ class ImportTemplateDAL:
         
         db.delete(db_template)
         db.commit()
+        template_cache.invalidate(db)
         return True
+
+
+class SchedulerLeaseDAL:
+    """Data Access Layer for SchedulerLease model."""
+    
+    @staticmethod
+    def acquire_lease(db: Session, name: str, holder: str, ttl_seconds: float) -> bool:
+        """
+        Acquire or renew the named lease for ``holder``.
+        
+        Succeeds if the lease does not exist, has expired, or is already held by
+        ``holder``. Returns False if another holder owns an unexpired lease.
+        """
+        now = datetime.datetime.utcnow()
+        expires_at = now + datetime.timedelta(seconds=ttl_seconds)
+        
+        result = db.execute(
+            update(models.SchedulerLease)
+            .where(
+                models.SchedulerLease.name == name,
+                or_(models.SchedulerLease.expires_at < now, models.SchedulerLease.holder == holder)
+            )
+            .values(holder=holder, expires_at=expires_at)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount:
+            db.commit()
+            return True
+        
+        try:
+            db.add(models.SchedulerLease(name=name, holder=holder, expires_at=expires_at))
+            db.commit()
+            return True
+        except IntegrityError:
+            # Another worker holds the lease
+            db.rollback()
+            return False
+    
+    @staticmethod
+    def release_lease(db: Session, name: str, holder: str) -> bool:
+        """Release the named lease if it is held by ``holder``."""
+        result = db.execute(
+            update(models.SchedulerLease)
+            .where(models.SchedulerLease.name == name, models.SchedulerLease.holder == holder)
+            .values(expires_at=datetime.datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        return bool(result.rowcount)
+    
+    @staticmethod
+    def get_lease(db: Session, name: str) -> Optional[models.SchedulerLease]:
+        """Get a lease by name."""
+        return db.query(models.SchedulerLease).filter(models.SchedulerLease.name == name).first()
@@ -4,7 +4,7 @@ SQLAlchemy models for the database schema.
 import uuid
 import datetime
 from typing import List, Optional
-from sqlalchemy import Column, Integer, Float, String, Boolean, DateTime, ForeignKey, Text, JSON, UniqueConstraint, LargeBinary
+from sqlalchemy import Column, Integer, Float, String, Boolean, DateTime, ForeignKey, Text, JSON, UniqueConstraint, LargeBinary, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -72,10 +72,17 @@ class BatchUpload(BaseModel):
     error_message = Column(Text, nullable=True)
     source_columns_info = Column(Text, nullable=True)  
     raw_file_content = Column(LargeBinary, nullable=True) 
+    # The parsed file as Arrow IPC (Feather) bytes, written on first parse so that
+    # re-mapping reads columns from it instead of parsing the raw file again
+    parsed_data = Column(LargeBinary, nullable=True)
+    # Where the data is in the file: the Excel worksheet (None for the first) and header row
+    sheet_name = Column(String(255), nullable=True)
+    header_row = Column(Integer, default=0, nullable=False, server_default="0")
     
     # Relationships
     session = relationship("Session", back_populates="batch_uploads")
     employees = relationship("EmployeeData", back_populates="batch_upload", cascade="all, delete-orphan")
+    row_errors = relationship("UploadRowError", back_populates="batch_upload", cascade="all, delete-orphan")
 
 
 class EmployeeData(BaseModel):
@@ -83,7 +90,7 @@ class EmployeeData(BaseModel):
     __tablename__ = "employee_data"
     
     id = Column(Integer, primary_key=True)
-    batch_upload_id = Column(Integer, ForeignKey("batch_uploads.id"), nullable=False)
+    batch_upload_id = Column(Integer, ForeignKey("batch_uploads.id"), nullable=False, index=True)
     
     # Employee information
     employee_id = Column(String(50), nullable=True)
@@ -109,6 +116,49 @@ class EmployeeData(BaseModel):
     # Relationships
     batch_upload = relationship("BatchUpload", back_populates="employees")
     calculation_results = relationship("EmployeeCalculationResult", back_populates="employee_data", cascade="all, delete-orphan")
+    fund_alphas = relationship("EmployeeFundAlpha", back_populates="employee_data", cascade="all, delete-orphan")
+
+
+class EmployeeFundAlpha(BaseModel):
+    """Model for one fund managed by an employee, with the fund's alpha and AUM weight."""
+    __tablename__ = "employee_fund_alphas"
+    
+    id = Column(Integer, primary_key=True)
+    # Denormalized from the employee so that an upload's funds are read without a join
+    batch_upload_id = Column(Integer, ForeignKey("batch_uploads.id"), nullable=False)
+    employee_data_id = Column(Integer, ForeignKey("employee_data.id"), nullable=False)
+    fund = Column(String(100), nullable=False)
+    alpha = Column(Float, nullable=False)
+    aum_weight = Column(Float, nullable=False)
+    
+    # Relationships
+    employee_data = relationship("EmployeeData", back_populates="fund_alphas")
+    
+    # Weighted alphas are aggregated per upload, grouped by employee
+    __table_args__ = (Index('ix_employee_fund_alphas_upload_employee', 'batch_upload_id', 'employee_data_id'),)
+
+
+class UploadRowError(BaseModel):
+    """Model for a row of an uploaded file that failed validation or could not be stored."""
+    __tablename__ = "upload_row_errors"
+    
+    id = Column(Integer, primary_key=True)
+    batch_upload_id = Column(Integer, ForeignKey("batch_uploads.id"), nullable=False)
+    # Row number in the file, counting the header row as row 1
+    row_number = Column(Integer, nullable=False)
+    # System field the error is about; None for errors about the whole row
+    field = Column(String(100), nullable=True)
+    # "type", "range" or "insert"
+    error_type = Column(String(50), nullable=False)
+    message = Column(Text, nullable=False)
+    # The offending value as it was read from the file
+    value = Column(Text, nullable=True)
+    
+    # Relationships
+    batch_upload = relationship("BatchUpload", back_populates="row_errors")
+    
+    # Errors are listed per upload in row order
+    __table_args__ = (Index('ix_upload_row_errors_upload_row', 'batch_upload_id', 'row_number'),)
 
 
 class BatchCalculationResult(BaseModel):
@@ -128,6 +178,7 @@ class BatchCalculationResult(BaseModel):
     # Relationships
     scenario = relationship("BatchScenario", back_populates="calculation_results")
     employee_results = relationship("EmployeeCalculationResult", back_populates="batch_result", cascade="all, delete-orphan")
+    team_summaries = relationship("TeamCalculationSummary", back_populates="batch_result", cascade="all, delete-orphan")
 
 
 class EmployeeCalculationResult(BaseModel):
@@ -135,8 +186,8 @@ class EmployeeCalculationResult(BaseModel):
     __tablename__ = "employee_calculation_results"
     
     id = Column(Integer, primary_key=True)
-    batch_result_id = Column(Integer, ForeignKey("batch_calculation_results.id"), nullable=False)
-    employee_data_id = Column(Integer, ForeignKey("employee_data.id"), nullable=False)
+    batch_result_id = Column(Integer, ForeignKey("batch_calculation_results.id"), nullable=False, index=True)
+    employee_data_id = Column(Integer, ForeignKey("employee_data.id"), nullable=False, index=True)
     
     # Direct link to scenario for the Scenario Playground feature
     scenario_id = Column(Integer, ForeignKey("batch_scenarios.id"), nullable=True, index=True)
@@ -157,6 +208,31 @@ class EmployeeCalculationResult(BaseModel):
     scenario = relationship("BatchScenario", foreign_keys=[scenario_id])
 
 
+class TeamCalculationSummary(BaseModel):
+    """Model for per-team statistics of a batch calculation, stored when the calculation runs."""
+    __tablename__ = "team_calculation_summaries"
+    
+    id = Column(Integer, primary_key=True)
+    batch_result_id = Column(Integer, ForeignKey("batch_calculation_results.id"), nullable=False, index=True)
+    team = Column(String(100), nullable=False)
+    
+    # Team statistics
+    employee_count = Column(Integer, nullable=False)
+    total_base_salary = Column(Float, nullable=False)
+    total_bonus = Column(Float, nullable=False)
+    capped_count = Column(Integer, nullable=False)
+    policy_breach_count = Column(Integer, nullable=False)
+    min_bonus = Column(Float, nullable=False)
+    median_bonus = Column(Float, nullable=False)
+    max_bonus = Column(Float, nullable=False)
+    
+    # Relationships
+    batch_result = relationship("BatchCalculationResult", back_populates="team_summaries")
+    
+    # One summary per team per calculation
+    __table_args__ = (UniqueConstraint('batch_result_id', 'team', name='uix_team_summary_result_team'),)
+
+
 class ScenarioAuditLog(BaseModel):
     """Model for tracking changes to scenarios for audit purposes."""
     __tablename__ = "scenario_audit_log"
@@ -194,3 +270,12 @@ class ImportTemplate(BaseModel):
     
     # Ensure template names are unique per session
     __table_args__ = (UniqueConstraint('session_id', 'name', name='uix_template_session_name'),)
+
+
+class SchedulerLease(BaseModel):
+    """Lease row giving one worker exclusive ownership of a background job."""
+    __tablename__ = "scheduler_leases"
+    
+    name = Column(String(100), primary_key=True)
+    holder = Column(String(255), nullable=False)
+    expires_at = Column(DateTime, nullable=False)
@@ -1,29 +1,176 @@
 """
 Data retention policy implementation.
 Handles automatic deletion of expired sessions and temporary batch data.
+
+Expired rows are removed in bounded chunks, children before parents
+(results -> fund alphas -> employees -> uploads -> scenarios -> sessions),
+committing after every chunk so that no single transaction holds the database
+lock for long.
+Each run has a time budget; whatever is left over is picked up by the next run.
 """
+import os
+import time
 import logging
+import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, or_, select, update
 from sqlalchemy.orm import Session
 
-from .crud import SessionDAL, BatchUploadDAL
+from .models import (
+    Session as SessionModel, BatchScenario, BatchUpload, EmployeeData,
+    BatchCalculationResult, EmployeeCalculationResult, TeamCalculationSummary,
+    ScenarioAuditLog, ImportTemplate, UploadRowError, EmployeeFundAlpha
+)
+from .session_cache import session_cache
+from .template_cache import template_cache
 
 logger = logging.getLogger(__name__)
 
+# Maximum number of rows deleted per statement/transaction
+RETENTION_CHUNK_SIZE = int(os.getenv("RETENTION_CHUNK_SIZE", "500"))
+
+# Wall-clock budget for a single cleanup run, in seconds
+RETENTION_TIME_BUDGET_SECONDS = float(os.getenv("RETENTION_TIME_BUDGET_SECONDS", "5"))
+
+
+def _expired_selects(now: datetime.datetime, utc_now: datetime.datetime) -> Dict[str, Any]:
+    """Build the id subqueries describing everything that is due for deletion."""
+    # Sessions are written with local time, uploads with UTC (see crud.py)
+    sessions = select(SessionModel.id).where(SessionModel.expires_at < now)
+    uploads = select(BatchUpload.id).where(
+        or_(BatchUpload.expires_at < utc_now, BatchUpload.session_id.in_(sessions))
+    )
+    scenarios = select(BatchScenario.id).where(BatchScenario.session_id.in_(sessions))
+    batch_results = select(BatchCalculationResult.id).where(
+        BatchCalculationResult.scenario_id.in_(scenarios)
+    )
+    employees = select(EmployeeData.id).where(EmployeeData.batch_upload_id.in_(uploads))
+
+    return {
+        "sessions": sessions,
+        "uploads": uploads,
+        "scenarios": scenarios,
+        "batch_results": batch_results,
+        "employees": employees,
+    }
+
+
+def _deletion_plan(expired: Dict[str, Any]) -> List[Tuple[Any, Any]]:
+    """Return (model, criterion) pairs in dependency order, children first."""
+    return [
+        (EmployeeCalculationResult, or_(
+            EmployeeCalculationResult.employee_data_id.in_(expired["employees"]),
+            EmployeeCalculationResult.batch_result_id.in_(expired["batch_results"]),
+            EmployeeCalculationResult.scenario_id.in_(expired["scenarios"]),
+        )),
+        (TeamCalculationSummary, TeamCalculationSummary.batch_result_id.in_(expired["batch_results"])),
+        (EmployeeFundAlpha, EmployeeFundAlpha.batch_upload_id.in_(expired["uploads"])),
+        (EmployeeData, EmployeeData.batch_upload_id.in_(expired["uploads"])),
+        (UploadRowError, UploadRowError.batch_upload_id.in_(expired["uploads"])),
+        (BatchUpload, BatchUpload.id.in_(expired["uploads"])),
+        (BatchCalculationResult, BatchCalculationResult.id.in_(expired["batch_results"])),
+        (ScenarioAuditLog, ScenarioAuditLog.scenario_id.in_(expired["scenarios"])),
+        (BatchScenario, BatchScenario.id.in_(expired["scenarios"])),
+        (ImportTemplate, ImportTemplate.session_id.in_(expired["sessions"])),
+        (SessionModel, SessionModel.id.in_(expired["sessions"])),
+    ]
+
+
+def _delete_in_chunks(
+    db: Session,
+    model: Any,
+    criterion: Any,
+    chunk_size: int,
+    deadline: float
+) -> Dict[str, Any]:
+    """
+    Delete rows of ``model`` matching ``criterion``, at most ``chunk_size`` per transaction.
+
+    Stops early once ``deadline`` (a ``time.monotonic()`` value) has passed.
+    """
+    stats = {"rows_deleted": 0, "chunks": 0, "duration_ms": 0.0, "finished": False}
+    started = time.monotonic()
+
+    while time.monotonic() < deadline:
+        ids = db.execute(select(model.id).where(criterion).limit(chunk_size)).scalars().all()
+        if not ids:
+            stats["finished"] = True
+            break
+
+        if model is BatchScenario:
+            # Detach forks that point at a scenario we are about to remove
+            db.execute(
+                update(BatchScenario)
+                .where(BatchScenario.parent_scenario_id.in_(ids))
+                .values(parent_scenario_id=None)
+                .execution_options(synchronize_session=False)
+            )
+
+        result = db.execute(
+            delete(model).where(model.id.in_(ids)).execution_options(synchronize_session=False)
+        )
+        db.commit()
+
+        stats["rows_deleted"] += result.rowcount
+        stats["chunks"] += 1
+
+    stats["duration_ms"] = round((time.monotonic() - started) * 1000, 3)
+    return stats
 
-def cleanup_expired_data(db: Session) -> dict:
+
+def cleanup_expired_data(
+    db: Session,
+    chunk_size: Optional[int] = None,
+    time_budget_seconds: Optional[float] = None
+) -> Dict[str, Any]:
     """
     Clean up expired sessions and temporary batch data.
-    Returns a dictionary with counts of deleted items.
+
+    Args:
+        db: Database session
+        chunk_size: Maximum rows deleted per transaction (defaults to RETENTION_CHUNK_SIZE)
+        time_budget_seconds: Time budget for this run (defaults to RETENTION_TIME_BUDGET_SECONDS)
+
+    Returns:
+        Dictionary with the deleted session and upload counts, per-table statistics
+        (rows removed, chunks, duration) and whether the run completed within budget.
     """
-    # Delete expired sessions (this will cascade to related data)
-    deleted_sessions = SessionDAL.delete_expired_sessions(db)
-    logger.info(f"Deleted {deleted_sessions} expired sessions")
-    
-    # Delete expired batch uploads (this will cascade to related data)
-    deleted_uploads = BatchUploadDAL.delete_expired_uploads(db)
-    logger.info(f"Deleted {deleted_uploads} expired batch uploads")
-    
+    chunk_size = chunk_size or RETENTION_CHUNK_SIZE
+    if time_budget_seconds is None:
+        time_budget_seconds = RETENTION_TIME_BUDGET_SECONDS
+
+    started = time.monotonic()
+    deadline = started + time_budget_seconds
+    expired = _expired_selects(datetime.datetime.now(), datetime.datetime.utcnow())
+
+    tables: Dict[str, Dict[str, Any]] = {}
+    completed = True
+    for model, criterion in _deletion_plan(expired):
+        stats = _delete_in_chunks(db, model, criterion, chunk_size, deadline)
+        finished = stats.pop("finished")
+        tables[model.__tablename__] = stats
+        if model is ImportTemplate and stats["rows_deleted"]:
+            template_cache.invalidate(db)
+        if model is SessionModel and stats["rows_deleted"]:
+            session_cache.clear()
+        logger.info(
+            f"Retention: deleted {stats['rows_deleted']} rows from {model.__tablename__} "
+            f"in {stats['chunks']} chunks ({stats['duration_ms']} ms)"
+        )
+        if not finished:
+            # Parents must not be deleted before their children, so stop here
+            completed = False
+            logger.warning(
+                f"Retention: time budget of {time_budget_seconds}s exhausted at "
+                f"{model.__tablename__}; remaining rows will be removed on the next run"
+            )
+            break
+
     return {
-        "deleted_sessions": deleted_sessions,
-        "deleted_uploads": deleted_uploads
+        "deleted_sessions": tables.get(SessionModel.__tablename__, {}).get("rows_deleted", 0),
+        "deleted_uploads": tables.get(BatchUpload.__tablename__, {}).get("rows_deleted", 0),
+        "tables": tables,
+        "completed": completed,
+        "duration_ms": round((time.monotonic() - started) * 1000, 3),
     }
@@ -2,6 +2,7 @@
 CRUD operations for the Scenario Playground feature.
 """
 import uuid
+import logging
 import datetime
 from typing import List, Optional, Dict, Any, Tuple
 from sqlalchemy.orm import Session
@@ -9,10 +10,20 @@ from sqlalchemy import func, desc
 
 from . import models
 from .models import BatchScenario, ScenarioAuditLog, EmployeeCalculationResult
-from .. import models as main_models
+from . import models as main_models  # BatchUpload and EmployeeData live in app.db.models
+from .crud import EmployeeFundAlphaDAL
 from ..services import raf_calculation as raf_module
+from ..services.calculation_engine import apply_override, evaluate_with_overrides, layer_definitions
+from ..services.curves import evaluate_curves
+from ..services.formula import SCENARIO_FORMULA, compile_formula
+from ..utils.lazy_import import lazy_import
+from ..utils.instrumentation import timed
 from collections import defaultdict
 
+np = lazy_import("numpy")
+
+logger = logging.getLogger(__name__)
+
 class ScenarioPlaygroundDAL:
     """Data Access Layer for the Scenario Playground feature."""
     
@@ -240,15 +251,24 @@ class ScenarioPlaygroundDAL:
         """
         Calculate results for a scenario and generate team aggregations.
         
+        The bonuses are evaluated through SCENARIO_FORMULA, with any steps from the
+        scenario's "formula" parameter layered over it and any mapping curves from
+        its "curves" parameter applied to the inputs first. The employees'
+        AUM-weighted fund alphas are available to both as the "alpha" input.
+        
+        An employee's parameter_overrides take precedence over the scenario's
+        parameters: numbers replace inputs of the same name, "raf_params" recompute
+        the RAF, and "formula" and "curves" are layered over the scenario's.
+        
         Returns a tuple of (calculation_results, team_aggregations)
         """
-        print(f"DEBUG: Starting calculate_scenario for scenario_id {scenario_id}")
+        logger.debug(f"Starting calculate_scenario for scenario_id {scenario_id}")
         scenario = db.query(models.BatchScenario).filter(models.BatchScenario.id == scenario_id).first()
         if not scenario:
-            print(f"ERROR: No scenario found with id {scenario_id}")
+            logger.error(f"No scenario found with id {scenario_id}")
             raise ValueError(f"Scenario with id {scenario_id} not found")
             
-        print(f"DEBUG: Looking for batch_upload with session_id {scenario.session_id}")
+        logger.debug(f"Looking for batch_upload with session_id {scenario.session_id}")
         batch_upload = (
             db.query(main_models.BatchUpload)
             .filter(main_models.BatchUpload.session_id == scenario.session_id)
@@ -256,14 +276,14 @@ class ScenarioPlaygroundDAL:
             .first()
         )
         if batch_upload:
-            print(f"DEBUG: Found batch_upload with id {batch_upload.id} for session_id {scenario.session_id}")
+            logger.debug(f"Found batch_upload with id {batch_upload.id} for session_id {scenario.session_id}")
         else:
-            print(f"ERROR: No batch upload found for scenario {scenario_id}")
+            logger.error(f"No batch upload found for scenario {scenario_id}")
             raise ValueError(f"No batch upload found for scenario {scenario_id}")
             
         employees_query = db.query(main_models.EmployeeData)
         if batch_upload:
-            print(f"DEBUG: Filtering employees by batch_upload_id {batch_upload.id}")
+            logger.debug(f"Filtering employees by batch_upload_id {batch_upload.id}")
             employees_query = employees_query.filter(main_models.EmployeeData.batch_upload_id == batch_upload.id)
         
         if employee_data_ids:
@@ -271,7 +291,7 @@ class ScenarioPlaygroundDAL:
         
         employees = employees_query.all()
         if not employees:
-            print(f"ERROR: No employee data found for batch upload {batch_upload.id}")
+            logger.error(f"No employee data found for batch upload {batch_upload.id}")
             raise ValueError(f"No employee data found for batch upload {batch_upload.id}")
 
         # Actual Calculation Logic Starts Here
@@ -319,55 +339,120 @@ class ScenarioPlaygroundDAL:
         except (ValueError, TypeError):
             cap_percentage_of_salary = None # Invalid format, treat as no cap
 
-        calculated_employee_data = []
-        total_calculated_bonus_pool = 0.0
-        total_capped_employees = 0
+        # The scenario's own formula steps, if any, are layered over SCENARIO_FORMULA
+        formula = get_param('formula', None)
+        curves = get_param('curves', None)
+        plan = compile_formula(formula, SCENARIO_FORMULA)
 
-        for emp in employees:
-            # Ensure numeric fields are float, with defaults for safety
-            base_salary = float(emp.base_salary or 0.0)
-            target_bonus_pct = float(emp.target_bonus_pct or 0.0)
-            investment_weight = float(emp.investment_weight or 0.0)
-            qualitative_score = float(emp.qualitative_score or 0.0)
+        # Numeric scenario parameters are available to custom formula steps by name
+        formula_inputs = {
+            key: value
+            for key, value in {**global_parameters, **override_parameters}.items()
+            if isinstance(value, (int, float))
+        }
+        formula_inputs.update({
+            "max_qualitative_score": max_qualitative_score,
+            "raf": raf_value,
+            # Without a cap every bonus is below an infinite cap amount
+            "cap_percentage_of_salary": (
+                cap_percentage_of_salary if cap_percentage_of_salary is not None else float("inf")
+            ),
+            "base_salary": np.array([float(emp.base_salary or 0.0) for emp in employees]),
+            "target_bonus_pct": np.array([float(emp.target_bonus_pct or 0.0) for emp in employees]),
+            "investment_weight": np.array([float(emp.investment_weight or 0.0) for emp in employees]),
+            "qualitative_weight": np.array([float(emp.qualitative_weight or 0.0) for emp in employees]),
+            "investment_score_multiplier": np.array(
+                [float(emp.investment_score_multiplier or 0.0) for emp in employees]
+            ),
+            "qual_score_multiplier": np.array([float(emp.qual_score_multiplier or 0.0) for emp in employees]),
+            # EmployeeData has no qualitative score column; scenarios without one score 0
+            "qualitative_score": np.array(
+                [float(getattr(emp, 'qualitative_score', None) or 0.0) for emp in employees]
+            ),
+            "is_mrt": np.array([bool(emp.is_mrt) for emp in employees]),
+            "mrt_cap_pct": np.array(
+                [float(emp.mrt_cap_pct) if emp.mrt_cap_pct is not None else 200.0 for emp in employees]
+            ),
+        })
 
-            inv_component = base_salary * target_bonus_pct * investment_weight
-            qual_component_factor = (1 - investment_weight) * (qualitative_score / max_qualitative_score)
-            qual_component = base_salary * target_bonus_pct * qual_component_factor
-            
-            pre_raf_bonus = inv_component + qual_component
-            final_bonus = raf_module.apply_raf_to_bonus(pre_raf_bonus, raf_value)
-            
-            is_capped_this_employee = False
-            if cap_percentage_of_salary is not None and base_salary > 0: # Apply cap only if defined and salary is positive
-                cap_amount = base_salary * cap_percentage_of_salary
-                if final_bonus > cap_amount:
-                    final_bonus = cap_amount
-                    is_capped_this_employee = True
-                    total_capped_employees += 1
-            
-            policy_breach_this_employee = False
-            if final_bonus < 0:
-                final_bonus = 0.0
-                policy_breach_this_employee = True
+        # AUM-weighted alpha from the upload's fund alphas (NaN for employees without funds),
+        # aggregated by the database so the fund rows are never loaded
+        weighted_alphas = {
+            employee_data_id: weighted_alpha
+            for employee_data_id, weighted_alpha, _ in EmployeeFundAlphaDAL.get_weighted_alphas(db, batch_upload.id)
+        }
+        formula_inputs["alpha"] = np.array([weighted_alphas.get(emp.id, np.nan) for emp in employees])
+
+        def evaluate_bucket(inputs, override):
+            # Employees' own parameter overrides take precedence over the scenario's
+            inputs = apply_override(inputs, override)
+            if isinstance(override.get('raf_params'), dict) and 'raf' not in override:
+                bucket_raf_params = dict(actual_raf_params)
+                for k, v in override['raf_params'].items():
+                    try:
+                        bucket_raf_params[k] = float(v)
+                    except (ValueError, TypeError):
+                        pass
+                inputs["raf"] = raf_module.calculate_raf(bucket_raf_params)
+            bucket_plan = plan if not override.get('formula') else compile_formula(
+                layer_definitions(formula, override['formula'], key="steps"), SCENARIO_FORMULA
+            )
+            # Mapping curves replace (or add) inputs, e.g. a multiplier read off a score
+            inputs.update(evaluate_curves(layer_definitions(curves, override.get('curves')), inputs))
+            results = bucket_plan.evaluate(inputs)
+            # The values an employee was calculated with, as reported in the results
+            shape = results["final_bonus"].shape
+            results.update(
+                (name, np.broadcast_to(inputs[name], shape))
+                for name in ("base_salary", "target_bonus_pct", "investment_weight", "qualitative_score", "raf")
+            )
+            return results
 
-            total_calculated_bonus_pool += final_bonus
-            calculated_employee_data.append({
-                "employee_id": emp.employee_id,
-                "employee_db_id": emp.id,
-                "name": emp.name,
-                "team": emp.team,
-                "base_salary": base_salary,
-                "target_bonus_pct": target_bonus_pct,
-                "investment_weight": investment_weight,
-                "qualitative_score": qualitative_score,
-                "inv_component": inv_component,
-                "qual_component": qual_component,
-                "pre_raf_bonus": pre_raf_bonus,
-                "raf_applied": raf_value, # Store the scenario-wide RAF used
-                "final_bonus": final_bonus,
-                "is_capped": is_capped_this_employee, # Updated capping status
-                "policy_breach": policy_breach_this_employee # Updated policy breach status
-            })
+        with timed("compute"):
+            # Employees are evaluated in vectorized buckets of identical overrides
+            results = evaluate_with_overrides(
+                formula_inputs, [emp.parameter_overrides for emp in employees], evaluate_bucket
+            )
+            final_bonuses = results["final_bonus"]
+            total_calculated_bonus_pool = float(final_bonuses.sum())
+            total_capped_employees = int(np.count_nonzero(results["is_capped"]))
+
+            columns = zip(
+                results["base_salary"].tolist(),
+                results["target_bonus_pct"].tolist(),
+                results["investment_weight"].tolist(),
+                results["qualitative_score"].tolist(),
+                results["inv_component"].tolist(),
+                results["qual_component"].tolist(),
+                results["pre_raf_bonus"].tolist(),
+                results["raf"].tolist(),
+                final_bonuses.tolist(),
+                results["is_capped"].tolist(),
+                results["policy_breach"].tolist(),
+            )
+            calculated_employee_data = [
+                {
+                    "employee_id": emp.employee_id,
+                    "employee_db_id": emp.id,
+                    "name": emp.name,
+                    "team": emp.team,
+                    "base_salary": base_salary,
+                    "target_bonus_pct": target_bonus_pct,
+                    "investment_weight": investment_weight,
+                    "qualitative_score": qualitative_score,
+                    "inv_component": inv_component,
+                    "qual_component": qual_component,
+                    "pre_raf_bonus": pre_raf_bonus,
+                    "raf_applied": raf_applied,
+                    "final_bonus": final_bonus,
+                    "is_capped": is_capped,
+                    "policy_breach": policy_breach
+                }
+                for emp, (
+                    base_salary, target_bonus_pct, investment_weight, qualitative_score,
+                    inv_component, qual_component, pre_raf_bonus, raf_applied, final_bonus, is_capped, policy_breach
+                ) in zip(employees, columns)
+            ]
 
         # Aggregate overall results
         num_employees = len(employees)
@@ -0,0 +1,86 @@
+"""
+Database schema initialisation at application start-up.
+
+Two modes are supported, selected with the DB_SCHEMA_MODE environment variable:
+
+- ``create_all`` (default): create any missing tables from the SQLAlchemy models.
+  Convenient for local development, but reflects every table on every boot.
+- ``migrations``: the schema is managed by Alembic only (``alembic upgrade head``
+  runs as a deployment step). Start-up just compares the revision stored in the
+  ``alembic_version`` table with the head revision and refuses to start on a mismatch.
+"""
+import os
+import logging
+from typing import Optional, Tuple
+
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+DB_SCHEMA_MODE = os.getenv("DB_SCHEMA_MODE", "create_all")
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+ALEMBIC_INI_PATH = os.path.join(BACKEND_DIR, "alembic.ini")
+MIGRATIONS_PATH = os.path.join(BACKEND_DIR, "migrations")
+
+
+class SchemaNotAtHeadError(RuntimeError):
+    """Raised when the database has not been migrated to the latest Alembic revision."""
+
+
+def get_head_revision() -> Optional[str]:
+    """Return the head revision of the Alembic migration scripts."""
+    from alembic.config import Config
+    from alembic.script import ScriptDirectory
+
+    config = Config(ALEMBIC_INI_PATH)
+    config.set_main_option("script_location", MIGRATIONS_PATH)
+    return ScriptDirectory.from_config(config).get_current_head()
+
+
+def get_current_revision(engine: Engine) -> Optional[str]:
+    """Return the revision recorded in the database's alembic_version table."""
+    from alembic.runtime.migration import MigrationContext
+
+    with engine.connect() as connection:
+        return MigrationContext.configure(connection).get_current_revision()
+
+
+def check_schema_at_head(engine: Engine) -> Tuple[bool, Optional[str], Optional[str]]:
+    """
+    Check whether the database schema is at the Alembic head revision.
+
+    Returns:
+        Tuple of (is_at_head, current_revision, head_revision)
+    """
+    current = get_current_revision(engine)
+    head = get_head_revision()
+    return current is not None and current == head, current, head
+
+
+def init_schema(engine: Engine, mode: Optional[str] = None) -> None:
+    """
+    Prepare the database schema according to ``mode`` (defaults to DB_SCHEMA_MODE).
+
+    Raises:
+        SchemaNotAtHeadError: In ``migrations`` mode, if the database is not at head
+        ValueError: If the mode is unknown
+    """
+    mode = mode or DB_SCHEMA_MODE
+
+    if mode == "create_all":
+        from .config import Base
+        from . import models  # noqa: F401 - register all tables on Base.metadata
+
+        logger.info("Creating database tables (if they don't exist)")
+        Base.metadata.create_all(bind=engine)
+    elif mode == "migrations":
+        at_head, current, head = check_schema_at_head(engine)
+        if not at_head:
+            raise SchemaNotAtHeadError(
+                f"Database schema is at revision {current or '<none>'} but the latest "
+                f"migration is {head}. Run 'alembic upgrade head' before starting the app."
+            )
+        logger.info(f"Database schema is at head revision {head}")
+    else:
+        raise ValueError(f"Unknown DB_SCHEMA_MODE: {mode}. Expected 'create_all' or 'migrations'.")
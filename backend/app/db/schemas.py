@@ -6,6 +6,14 @@ from typing import Dict, List, Optional, Any
 from pydantic import BaseModel, Field
 
 
+# Column Info Schema for Batch Uploads
+class ColumnInfoSchema(BaseModel):
+    name: str
+    sample: List[str]
+    dtype: Optional[str] = None
+    null_ratio: Optional[float] = None
+
+
 # Base schemas
 
 class ImportTemplateBase(BaseModel):
@@ -61,6 +69,19 @@ class BatchCalculationResultBase(BaseModel):
     capped_employees: int
 
 
+class TeamCalculationSummaryBase(BaseModel):
+    """Base schema for per-team calculation statistics."""
+    team: str
+    employee_count: int
+    total_base_salary: float
+    total_bonus: float
+    capped_count: int
+    policy_breach_count: int
+    min_bonus: float
+    median_bonus: float
+    max_bonus: float
+
+
 class EmployeeCalculationResultBase(BaseModel):
     """Base schema for employee calculation result."""
     investment_component: float
@@ -188,6 +209,8 @@ class BatchUpload(BatchUploadBase):
     processed_at: Optional[datetime.datetime] = None
     error_message: Optional[str] = None
     source_columns_info: Optional[List[ColumnInfoSchema]] = None
+    sheet_name: Optional[str] = None
+    header_row: int = 0
 
     class Config:
         orm_mode = True
@@ -245,9 +268,20 @@ class BatchUploadWithEmployees(BatchUpload):
         orm_mode = True
 
 
+class TeamCalculationSummary(TeamCalculationSummaryBase):
+    """Schema for per-team calculation statistics response."""
+    # None for statistics computed on read rather than stored (see TeamCalculationSummaryDAL.get_summaries)
+    id: Optional[int] = None
+    batch_result_id: int
+
+    class Config:
+        orm_mode = True
+
+
 class BatchCalculationResultWithEmployees(BatchCalculationResult):
     """Schema for batch calculation result with employee results."""
     employee_results: List[EmployeeCalculationResult] = []
+    team_summaries: List[TeamCalculationSummary] = []
 
     class Config:
         orm_mode = True
@@ -270,15 +304,40 @@ class SessionWithData(Session):
         orm_mode = True
 
 
-# Column Info Schema for Batch Uploads
-class ColumnInfoSchema(BaseModel):
-    name: str
-    sample: List[str]
+class UploadRowError(BaseModel):
+    """Schema for a row error of an upload."""
+    id: int
+    row_number: int
+    field: Optional[str] = None
+    error_type: str
+    message: str
+    value: Optional[str] = None
+
+    class Config:
+        orm_mode = True
+
+
+class UploadRowErrorPage(BaseModel):
+    """Schema for one page of an upload's row errors."""
+    total: int
+    skip: int
+    limit: int
+    items: List[UploadRowError] = []
+
+
+class WeightedAlpha(BaseModel):
+    """Schema for an employee's AUM-weighted alpha across their funds."""
+    employee_data_id: int
+    employee_id: Optional[str] = None
+    weighted_alpha: float
+    fund_count: int
+
 
 # Payload for submitting column mappings and default values
 class ColumnMappingPayload(BaseModel):
     column_mappings: Dict[str, str] # Maps source column name to target system field name
     default_values: Optional[Dict[str, Any]] = Field(default_factory=dict) # Maps target system field name to its default value
+    quarantine_invalid_rows: bool = False # Store the valid rows and report invalid ones instead of rejecting the upload
 
 # Import Template Schemas
 class ImportTemplateBase(BaseModel):
@@ -0,0 +1,120 @@
+"""
+Process-local cache of session lookups.
+
+Cookie-authenticated endpoints look up the caller's session on every request.
+SessionDAL.get_cached_session (and its async twin) read through this cache, so
+the requests of an active session do not query the database each time. IDs
+that match no session are cached too, for a shorter time, so requests with a
+stale cookie do not reach the database either.
+
+SessionDAL drops a session's entry when it creates or extends it, and
+retention clears the cache when it deletes sessions. Every invalidation bumps
+a version stamp so that a lookup racing with it is not cached. A cached
+session that looks expired is read again, so an extension made by another
+worker process is picked up; other changes made by other processes are picked
+up once the entry expires after SESSION_CACHE_TTL_SECONDS.
+"""
+import os
+import time
+import datetime
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Optional, Tuple
+
+# How long a found session may be served from the cache, in seconds
+SESSION_CACHE_TTL_SECONDS = float(os.getenv("SESSION_CACHE_TTL_SECONDS", "60"))
+
+# How long an unknown session ID is remembered as unknown, in seconds
+SESSION_CACHE_NEGATIVE_TTL_SECONDS = float(os.getenv("SESSION_CACHE_NEGATIVE_TTL_SECONDS", "5"))
+
+# Entries kept before the least recently used are dropped
+SESSION_CACHE_MAX_ENTRIES = int(os.getenv("SESSION_CACHE_MAX_ENTRIES", "10000"))
+
+
+@dataclass(frozen=True)
+class CachedSession:
+    """Read-only snapshot of a Session row."""
+    id: str
+    # Naive local time, as stored by SessionDAL.create_session
+    expires_at: datetime.datetime
+
+    @classmethod
+    def from_model(cls, session: Any) -> "CachedSession":
+        """Snapshot a Session model instance."""
+        return cls(id=session.id, expires_at=session.expires_at)
+
+
+class SessionCache:
+    """TTL-bounded, version-stamped session lookups, including misses."""
+
+    def __init__(
+        self,
+        ttl_seconds: float = SESSION_CACHE_TTL_SECONDS,
+        negative_ttl_seconds: float = SESSION_CACHE_NEGATIVE_TTL_SECONDS,
+        max_entries: int = SESSION_CACHE_MAX_ENTRIES
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._version = 0
+        # session ID -> (expires at, monotonic; snapshot or None for no such session)
+        self._entries: "OrderedDict[str, Tuple[float, Optional[CachedSession]]]" = OrderedDict()
+
+    def version(self) -> int:
+        """The current version stamp, to pass to put() after loading a session."""
+        with self._lock:
+            return self._version
+
+    def get(self, session_id: str) -> Tuple[bool, Optional[CachedSession]]:
+        """
+        Look up a session ID.
+
+        Returns:
+            (True, snapshot) for a cached session, (True, None) for an ID cached as
+            unknown and (False, None) on a miss. A session that has expired by its
+            cached expiry time is a miss, so the caller reads its current expiry.
+        """
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None:
+                return False, None
+            cached_until, session = entry
+            if cached_until <= time.monotonic() or (
+                session is not None and session.expires_at < datetime.datetime.now()
+            ):
+                del self._entries[session_id]
+                return False, None
+            self._entries.move_to_end(session_id)
+            return True, session
+
+    def put(self, session_id: str, session: Optional[CachedSession], version: int) -> None:
+        """
+        Cache the result of loading a session ID (None if there is no such session).
+
+        Nothing is cached if the cache was invalidated since ``version`` was read.
+        """
+        ttl = self.ttl_seconds if session is not None else self.negative_ttl_seconds
+        with self._lock:
+            if version != self._version or ttl <= 0:
+                return
+            self._entries[session_id] = (time.monotonic() + ttl, session)
+            self._entries.move_to_end(session_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, session_id: str) -> None:
+        """Drop the entry of a session that was created or changed."""
+        with self._lock:
+            self._version += 1
+            self._entries.pop(session_id, None)
+
+    def clear(self) -> None:
+        """Drop all entries, e.g. after sessions were deleted."""
+        with self._lock:
+            self._version += 1
+            self._entries.clear()
+
+
+session_cache = SessionCache()
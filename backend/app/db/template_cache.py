@@ -0,0 +1,153 @@
+"""
+Process-local cache of import templates.
+
+ImportTemplateDAL reads templates through this cache so that repeated uploads
+against the same template do not query the database each time. Cached templates
+are immutable snapshots (CachedTemplate) whose column mappings are precompiled
+into a normalized lookup. Every write through ImportTemplateDAL bumps the cache's
+version stamp, which invalidates all entries at once; entries also expire after
+TEMPLATE_CACHE_TTL_SECONDS so that edits made by other worker processes are
+picked up.
+"""
+import os
+import json
+import time
+import hashlib
+import datetime
+import threading
+import weakref
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional
+
+from sqlalchemy.orm import Session
+
+from app.utils.headers import normalize_header
+
+# How long a cached template or template list may be served, in seconds
+TEMPLATE_CACHE_TTL_SECONDS = float(os.getenv("TEMPLATE_CACHE_TTL_SECONDS", "300"))
+
+
+@dataclass(frozen=True)
+class CachedTemplate:
+    """Read-only snapshot of an ImportTemplate row with its mappings precompiled."""
+    id: int
+    session_id: str
+    name: str
+    description: Optional[str]
+    is_public: bool
+    column_mappings: Dict[str, str]
+    default_values: Dict[str, Any]
+    created_at: datetime.datetime
+    updated_at: datetime.datetime
+    # normalized source column -> target field
+    normalized_mappings: Dict[str, str] = field(repr=False)
+    # Changes whenever the template's content changes
+    fingerprint: str = field(repr=False)
+
+    @classmethod
+    def from_model(cls, template: Any) -> "CachedTemplate":
+        """Snapshot an ImportTemplate model instance."""
+        column_mappings = dict(template.column_mappings or {})
+        default_values = dict(template.default_values or {})
+        normalized_mappings: Dict[str, str] = {}
+        for source_column, target_field in column_mappings.items():
+            # The first spelling wins when several normalize to the same key
+            normalized_mappings.setdefault(normalize_header(source_column), target_field)
+        content = json.dumps(
+            [template.id, template.name, template.is_public, column_mappings, default_values],
+            sort_keys=True, default=str
+        )
+        return cls(
+            id=template.id,
+            session_id=template.session_id,
+            name=template.name,
+            description=template.description,
+            is_public=bool(template.is_public),
+            column_mappings=column_mappings,
+            default_values=default_values,
+            created_at=template.created_at,
+            updated_at=template.updated_at,
+            normalized_mappings=normalized_mappings,
+            fingerprint=hashlib.sha1(content.encode('utf-8')).hexdigest()
+        )
+
+    def resolve_columns(self, columns: Iterable[Any]) -> Dict[Any, str]:
+        """
+        Map the columns of a file to target fields.
+
+        A column matches a mapping by its exact name or, failing that, by its
+        normalized name, so "Base Salary" matches a mapping for "base_salary".
+
+        Args:
+            columns: The column names of the file
+
+        Returns:
+            File column -> target field, for the columns the template maps
+        """
+        resolved = {}
+        for column in columns:
+            target = self.column_mappings.get(column)
+            if target is None:
+                target = self.normalized_mappings.get(normalize_header(column))
+            if target is not None:
+                resolved[column] = target
+        return resolved
+
+
+class TemplateCache:
+    """Version-stamped cache entries, kept separately for each database engine."""
+
+    def __init__(self, ttl_seconds: float = TEMPLATE_CACHE_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        # engine -> {"version": int, "entries": {key: (version, expires_at, value)}}
+        self._stores: "weakref.WeakKeyDictionary[Any, Dict[str, Any]]" = weakref.WeakKeyDictionary()
+
+    def _store(self, db: Session) -> Dict[str, Any]:
+        bind = db.get_bind()
+        engine = getattr(bind, "engine", bind)
+        store = self._stores.get(engine)
+        if store is None:
+            store = self._stores[engine] = {"version": 0, "entries": {}}
+        return store
+
+    def version(self, db: Session) -> int:
+        """The current version stamp for the database behind ``db``."""
+        with self._lock:
+            return self._store(db)["version"]
+
+    def get_or_load(self, db: Session, key: Hashable, load: Callable[[], Any]) -> Any:
+        """
+        Return the cached value for ``key``, calling ``load`` to fetch it on a miss.
+
+        A value loaded while a write bumps the version stamp is returned but not cached.
+        """
+        now = time.monotonic()
+        with self._lock:
+            store = self._store(db)
+            version = store["version"]
+            entry = store["entries"].get(key)
+            if entry is not None and entry[0] == version and entry[1] > now:
+                return entry[2]
+
+        value = load()
+        with self._lock:
+            store = self._store(db)
+            if store["version"] == version:
+                store["entries"][key] = (version, now + self.ttl_seconds, value)
+        return value
+
+    def invalidate(self, db: Session) -> None:
+        """Bump the version stamp, so that every cached entry is reloaded on next use."""
+        with self._lock:
+            store = self._store(db)
+            store["version"] += 1
+            store["entries"].clear()
+
+    def clear(self) -> None:
+        """Drop all entries for all databases."""
+        with self._lock:
+            self._stores.clear()
+
+
+template_cache = TemplateCache()
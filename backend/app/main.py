@@ -1,18 +1,20 @@
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel, Field, validator
 from typing import Dict, Any
 import logging
 import time
-from apscheduler.schedulers.background import BackgroundScheduler
-from sqlalchemy.orm import Session
 
 # Import routes
 from app.routes import calculator, batch
 
 # Import database
-from app.db import Base, engine, get_db
-from app.db.retention import cleanup_expired_data
+from app.db import engine
+from app.db.schema_check import init_schema
+from app.services.retention_scheduler import retention_scheduler, RETENTION_SCHEDULER_ENABLED
+from app.utils.compression import CompressionMiddleware
+from app.utils.instrumentation import InstrumentationMiddleware, registry, PROMETHEUS_CONTENT_TYPE
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -31,8 +33,15 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
 
+# gzip/brotli for large responses; added before instrumentation so request timings include it
+app.add_middleware(CompressionMiddleware)
+
+# Per-request timing and Server-Timing header
+app.add_middleware(InstrumentationMiddleware)
+
 # Include routers
 app.include_router(calculator.router, prefix="/api/v1", tags=["calculator"])
 app.include_router(batch.router, prefix="/api/v1/batch", tags=["batch"])
@@ -50,28 +59,38 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Expose pipeline stage and request timings in Prometheus text format"""
+    return PlainTextResponse(registry.render_prometheus(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
 # Initialize database tables
 @app.on_event("startup")
 async def init_db():
-    logger.info("Creating database tables (if they don't exist)")
-    Base.metadata.create_all(bind=engine)
+    # Either create_all (development) or a quick "schema at head" check (DB_SCHEMA_MODE=migrations)
+    init_schema(engine)
     
-    # Set up scheduled cleanup task
-    scheduler = BackgroundScheduler()
-    scheduler.add_job(
-        func=lambda: cleanup_expired_data(next(get_db())),
-        trigger="interval",
-        hours=1,  # Run every hour
-        id="cleanup_expired_data",
-        name="Clean up expired sessions and temporary batch data",
-        replace_existing=True
-    )
-    scheduler.start()
-    logger.info("Started scheduled cleanup task")
+    # Set up scheduled cleanup task (only the lease holder actually runs it)
+    if RETENTION_SCHEDULER_ENABLED:
+        retention_scheduler.start()
+
+
+@app.on_event("shutdown")
+def stop_scheduler():
+    # Without a running scheduler there is no lease to hand back
+    if retention_scheduler.running:
+        retention_scheduler.shutdown()
 
 
 @app.get("/cleanup", include_in_schema=False)
-async def manual_cleanup(db: Session = Depends(get_db)):
+def manual_cleanup():
     """Manually trigger cleanup of expired data (for testing)"""
-    result = cleanup_expired_data(db)
-    return {"message": "Cleanup completed", "result": result}
+    run = retention_scheduler.run_once()
+    return {"message": f"Cleanup {run['status']}", "result": run}
+
+
+@app.get("/cleanup/status", include_in_schema=False)
+def cleanup_status():
+    """Report retention scheduler state and last-run statistics"""
+    return retention_scheduler.status()
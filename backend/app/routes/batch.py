@@ -1,8 +1,9 @@
 """
 API routes for batch processing operations.
 """
-from fastapi import APIRouter, Depends, HTTPException, Cookie, Response, Query, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, Cookie, Header, Response, Query, UploadFile, File, Form
 from fastapi.responses import JSONResponse, FileResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional, Dict, Any
 import datetime
@@ -11,13 +12,21 @@ import os
 import tempfile
 import logging
 
-from app.db import get_db
+from app.db import get_async_db, get_db
+from app.db.async_crud import AsyncBatchCalculationResultDAL, AsyncBatchUploadDAL, AsyncSessionDAL
 from app.db.crud import (
     SessionDAL, BatchScenarioDAL, BatchUploadDAL, 
     EmployeeDataDAL, BatchCalculationResultDAL, 
-    EmployeeCalculationResultDAL, ImportTemplateDAL
+    EmployeeCalculationResultDAL, TeamCalculationSummaryDAL, ImportTemplateDAL, UploadRowErrorDAL,
+    EmployeeFundAlphaDAL
+)
+from app.services.file_processor import FileProcessor, MAX_ROW_ERRORS, SNIFF_SAMPLE_ROWS, UnsupportedFileFormatError
+from app.services.worker_pool import WorkerPoolBusyError, WorkerTimeoutError, run_in_worker
+from app.utils.instrumentation import timed
+from app.utils.responses import (
+    FastJSONResponse, bulk_response, etag_matches, immutable_headers, make_etag, negotiate_media_type, not_modified,
+    validate_rows
 )
-from app.services.file_processor import FileProcessor
 from app.db.schemas import (
     Session, SessionCreate,
     BatchScenario, BatchScenarioCreate, BatchScenarioUpdate,
@@ -30,7 +39,9 @@ from app.db.schemas import (
     ImportTemplate, ImportTemplateCreate, ImportTemplateUpdate,
     ColumnInfoSchema, ColumnMappingPayload
 )
-from app.services.calculation_engine import calculate_bonus # Added
+from app.services.calculation_engine import calculate_bonuses, calculate_weighted_alphas, validate_override
+from app.services.curves import CurveError
+from app.services.formula import FormulaError
 from app.db import schemas as app_schemas # To distinguish from local 'schemas' variable if any
 from sqlalchemy.exc import SQLAlchemyError # Added for more specific error handling
 
@@ -62,20 +73,20 @@ def create_session(
 
 
 @router.get("/sessions/current", response_model=Session)
-def get_current_session(
+async def get_current_session(
     session_id: Optional[str] = Cookie(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get the current session."""
     if not session_id:
         raise HTTPException(status_code=404, detail="No active session")
     
-    db_session = SessionDAL.get_session(db, session_id)
+    db_session = await AsyncSessionDAL.get_cached_session(db, session_id)
     if not db_session:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    # Check if session is expired
-    if db_session.expires_at < datetime.datetime.now(datetime.timezone.utc):
+    # Check if session is expired (sessions store naive local expiry times, see SessionDAL.create_session)
+    if db_session.expires_at < datetime.datetime.now():
         raise HTTPException(status_code=401, detail="Session expired")
     
     return db_session
@@ -183,47 +194,65 @@ def delete_scenario(
 
 # Batch upload management
 
+def _worker_unavailable(error: Exception) -> HTTPException:
+    """The response to a CPU-heavy stage that could not start (503) or did not finish (504) in time."""
+    status_code = 504 if isinstance(error, WorkerTimeoutError) else 503
+    return HTTPException(status_code=status_code, detail=str(error))
+
+
+def _resolve_upload_session(db: Session, session_id: Optional[str]) -> str:
+    """Return the ID of the uploader's session, creating a new session if it is missing or expired."""
+    if not session_id:
+        # Create a new session if one doesn't exist
+        logger.info("No session ID found, creating a new session")
+        # Note: We can't set the cookie here since we're not returning a Response object
+        # The frontend will need to handle this session ID manually
+        return SessionDAL.create_session(db, expires_in_hours=24).id
+
+    # Verify session exists
+    db_session = SessionDAL.get_cached_session(db, session_id)
+    if not db_session:
+        logger.warning(f"Session not found: {session_id}, creating a new one")
+        return SessionDAL.create_session(db, expires_in_hours=24).id
+    # Sessions store naive local expiry times (see SessionDAL.create_session)
+    if db_session.expires_at < datetime.datetime.now():
+        logger.warning(f"Session expired: {session_id}, creating a new one")
+        return SessionDAL.create_session(db, expires_in_hours=24).id
+    return session_id
+
+
 @router.post("/file", response_model=Dict[str, Any])
-async def upload_file(
+def upload_file(
     file: UploadFile = File(...),
     template_id: Optional[int] = Form(None),
     session_id: Optional[str] = Cookie(None),
     skip_mapping: Optional[bool] = Form(False),
+    sheet_name: Optional[str] = Form(None),
+    header_row: int = Form(0, ge=0),
     db: Session = Depends(get_db)
 ):
     """Upload a file for batch processing.
     
     With skip_mapping=True, the file is assumed to follow the template format exactly,
-    and column mapping step is skipped.
+    and column mapping step is skipped. For Excel files, sheet_name selects the worksheet
+    (default: the first) and header_row the zero-based row holding the column names.
     """
-    # Create or verify session
-    if not session_id:
-        # Create a new session if one doesn't exist
-        logger.info("No session ID found, creating a new session")
-        db_session = SessionDAL.create_session(db, expires_in_hours=24)
-        # Note: We can't set the cookie here since we're not returning a Response object
-        # The frontend will need to handle this session ID manually
-        session_id = db_session.id
-    else:
-        # Verify session exists
-        db_session = SessionDAL.get_session(db, session_id)
-        if not db_session:
-            logger.warning(f"Session not found: {session_id}, creating a new one")
-            db_session = SessionDAL.create_session(db, expires_in_hours=24)
-            session_id = db_session.id
-        elif db_session.expires_at < datetime.datetime.now(datetime.timezone.utc):
-            logger.warning(f"Session expired: {session_id}, creating a new one")
-            db_session = SessionDAL.create_session(db, expires_in_hours=24)
-            session_id = db_session.id
+    session_id = _resolve_upload_session(db, session_id)
     
     # Read the file content first to store it raw
-    raw_content = await file.read()
-    # Reset file pointer to allow FileProcessor to read it again
-    await file.seek(0)
+    raw_content = file.file.read()
 
-    # Process the file to extract column info and perform initial validation
-    # FileProcessor.process_file expects the UploadFile object
-    df, validation_results, source_columns_info = await FileProcessor.process_file(file, template_id, db)
+    # Process the file to extract column info and perform initial validation. Unless the mapping
+    # step is skipped, only a sample is read here; the full file is parsed when the mapping is submitted.
+    # Parsing runs on the bounded worker pool; the template is loaded here so the worker needs no session.
+    template = ImportTemplateDAL.get_template(db, template_id) if template_id is not None else None
+    try:
+        df, validation_results, source_columns_info = run_in_worker(
+            FileProcessor.process_content, raw_content, file.filename, sheet_name=sheet_name,
+            header_row=header_row, sample_rows=None if skip_mapping else SNIFF_SAMPLE_ROWS, template=template
+        )
+    except (WorkerPoolBusyError, WorkerTimeoutError) as e:
+        raise _worker_unavailable(e)
     
     # If initial validation (file format, readability, emptiness) failed, return the validation results
     if not validation_results.get('valid', False) and validation_results.get('error'):
@@ -234,15 +263,18 @@ async def upload_file(
     status = "ready_for_processing" if skip_mapping else "awaiting_mapping"
     
     # Create the batch upload record
-    batch_upload = BatchUploadDAL.create_upload(
-        db,
-        session_id=session_id,
-        filename=file.filename,
-        expires_in_hours=24,  # Default value, can be made configurable
-        source_columns_info=source_columns_info,
-        raw_file_content=raw_content,
-        status=status
-    )
+    with timed("insert"):
+        batch_upload = BatchUploadDAL.create_upload(
+            db,
+            session_id=session_id,
+            filename=file.filename,
+            expires_in_hours=24,  # Default value, can be made configurable
+            source_columns_info=source_columns_info,
+            raw_file_content=raw_content,
+            status=status,
+            sheet_name=sheet_name,
+            header_row=header_row
+        )
     
     # If skipping mapping, automatically process the data using standard column names
     if skip_mapping and validation_results.get('valid', False):
@@ -253,7 +285,6 @@ async def upload_file(
         try:
             # Import pandas for direct processing
             import pandas as pd
-            import io
             import numpy as np
             import os
             
@@ -261,8 +292,8 @@ async def upload_file(
             dev_mode = os.environ.get('ENV', 'development') == 'development'
             
             try:
-                # Try to convert raw content to DataFrame
-                df = pd.read_csv(io.BytesIO(raw_content))
+                # The whole file was parsed on the worker pool above (no sample is
+                # taken when the mapping step is skipped), so it is not read again here
                 
                 # Validate required columns
                 missing_columns = [col for col in FileProcessor.REQUIRED_COLUMNS 
@@ -315,12 +346,13 @@ async def upload_file(
             
             # Save employee data directly
             from app.db.crud import EmployeeDataDAL
-            employees_saved = EmployeeDataDAL.save_employees_from_dataframe(
-                db,
-                df,
-                batch_upload.id,
-                column_mapping
-            )
+            with timed("insert"):
+                employees_saved = EmployeeDataDAL.save_employees_from_dataframe(
+                    db,
+                    df,
+                    batch_upload.id,
+                    column_mapping
+                )
             
             # Update status
             BatchUploadDAL.update_upload_status(db, batch_upload.id, "processed")
@@ -346,12 +378,110 @@ async def upload_file(
         "status": batch_upload.status,
         "session_id": session_id,  # Include session ID in response
         "source_columns_info": source_columns_info, # Return this so UI can proceed to mapping
+        "sheet_names": FileProcessor.list_sheets(raw_content, file.filename), # Lets the UI offer other sheets
         "validation_results": validation_results # Return initial validation (e.g., template applied)
     }
 
 
+@router.post("/files", response_model=Dict[str, Any])
+def upload_files(
+    files: List[UploadFile] = File(...),
+    template_id: Optional[int] = Form(None),
+    session_id: Optional[str] = Cookie(None),
+    sheet_name: Optional[str] = Form(None),
+    header_row: int = Form(0, ge=0),
+    db: Session = Depends(get_db)
+):
+    """Upload several files, or zip archives of files, as one batch.
+
+    Every file is read with the same import template (or, without template_id, must use
+    the system column names), parsed and validated in parallel, and the valid files are
+    stored as the employees of a single upload. Invalid files are skipped and reported
+    in the per-file summaries.
+    """
+    session_id = _resolve_upload_session(db, session_id)
+
+    template = None
+    if template_id is not None:
+        template = ImportTemplateDAL.get_template(db, template_id)
+        if not template:
+            raise HTTPException(status_code=404, detail="Template not found")
+
+    uploaded = [(file.filename, file.file.read()) for file in files]
+    try:
+        members = FileProcessor.expand_archives(uploaded)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not members:
+        raise HTTPException(status_code=400, detail="No files found in the upload.")
+
+    # The batch is stored as one archive holding the files as uploaded
+    if len(uploaded) == 1 and uploaded[0][0].lower().endswith('.zip'):
+        filename, raw_content = uploaded[0]
+    else:
+        filename = f"{len(uploaded)}_files.zip"
+        raw_content = FileProcessor.build_archive(uploaded)
+
+    with timed("insert"):
+        batch_upload = BatchUploadDAL.create_upload(
+            db,
+            session_id=session_id,
+            filename=filename,
+            expires_in_hours=24,
+            raw_file_content=raw_content,
+            status="processing",
+            sheet_name=sheet_name,
+            header_row=header_row
+        )
+
+    summaries = []
+    rows_saved = 0
+    try:
+        # Each file is stored as soon as it is ready while the following files are parsed
+        for df, summary in FileProcessor.iter_processed_members(members, template, sheet_name, header_row):
+            summary['rows_saved'] = 0
+            if df is not None:
+                saved_count, errors = FileProcessor.save_to_database(db, df, batch_upload)
+                summary['rows_saved'] = saved_count
+                if errors:
+                    summary['errors'] = errors
+                rows_saved += saved_count
+            summaries.append(summary)
+    except (WorkerPoolBusyError, WorkerTimeoutError) as e:
+        BatchUploadDAL.update_upload_processing_status(db, batch_upload.id, "failed_processing", str(e))
+        raise _worker_unavailable(e)
+    except Exception as e:
+        logger.error(f"Error processing multi-file upload {batch_upload.id}: {e}", exc_info=True)
+        BatchUploadDAL.update_upload_processing_status(
+            db, batch_upload.id, "failed_processing", f"An unexpected server error occurred: {str(e)}"
+        )
+        raise HTTPException(status_code=500, detail=f"Error processing upload: {str(e)}")
+
+    skipped = [
+        summary['filename'] for summary in summaries
+        if not summary['valid'] or summary['rows_saved'] < summary['rows']
+    ]
+    error_message = (
+        f"{len(skipped)} of {len(summaries)} files were not fully loaded: {', '.join(skipped)}"
+        if skipped else None
+    )
+    status = "completed" if rows_saved else "failed_processing"
+    BatchUploadDAL.update_upload_processing_status(db, batch_upload.id, status, error_message)
+
+    return {
+        "upload_id": batch_upload.id,
+        "filename": filename,
+        "status": status,
+        "session_id": session_id,
+        "rows_saved": rows_saved,
+        "files_loaded": len(summaries) - len(skipped),
+        "files": summaries,
+        "error_message": error_message
+    }
+
+
 @router.post("/uploads/{upload_id}/map_and_process", status_code=200)
-async def map_and_process_upload(
+def map_and_process_upload(
     upload_id: int,
     payload: ColumnMappingPayload,
     db: Session = Depends(get_db)
@@ -366,7 +496,12 @@ async def map_and_process_upload(
     if not batch_upload:
         raise HTTPException(status_code=404, detail=f"Batch upload with ID {upload_id} not found.")
 
-    if batch_upload.status != "awaiting_mapping":
+    # An upload whose mapping failed before any rows were stored can be mapped again
+    remappable = (
+        batch_upload.status == "failed_processing"
+        and not EmployeeDataDAL.has_employees(db, upload_id)
+    )
+    if batch_upload.status != "awaiting_mapping" and not remappable:
         raise HTTPException(
             status_code=400, 
             detail=f"Upload ID {upload_id} is not awaiting mapping. Current status: {batch_upload.status}"
@@ -378,15 +513,25 @@ async def map_and_process_upload(
 
     # Update status to 'processing'
     BatchUploadDAL.update_upload_processing_status(db, upload_id, "processing")
+    # Row errors of an earlier attempt no longer apply
+    UploadRowErrorDAL.delete_errors(db, upload_id)
 
     try:
+        # 1. Parse the raw file once into the columnar cache; later mappings read from it
+        columnar_cache = FileProcessor.get_or_build_columnar_cache(db, batch_upload)
+
         # 2. Reconstruct DataFrame, apply mappings, defaults, and validate
-        transformed_df, validation_results = await FileProcessor.apply_mappings_and_process_raw_content(
+        #    on the bounded worker pool, which must not share the request's session
+        transformed_df, validation_results = run_in_worker(
+            FileProcessor.apply_mappings_and_process_raw_content,
             raw_file_content=batch_upload.raw_file_content,
             original_filename=batch_upload.filename,
             column_mappings=payload.column_mappings,
             default_values=payload.default_values,
-            db=db # Pass db session if needed by underlying validation logic
+            db=None,
+            columnar_cache=columnar_cache,
+            sheet_name=batch_upload.sheet_name,
+            header_row=batch_upload.header_row or 0
         )
 
         if not validation_results.get("valid", False) or transformed_df is None:
@@ -396,42 +541,181 @@ async def map_and_process_upload(
             BatchUploadDAL.update_upload_processing_status(db, upload_id, "failed_processing", error_detail)
             raise HTTPException(status_code=400, detail=error_detail)
 
-        # 5. If valid, save to EmployeeData table
+        # 3. Store the rows that failed validation; without quarantine they reject the upload
+        header_row = batch_upload.header_row or 0
+        row_errors = validation_results.pop("row_errors", [])
+        invalid_rows = sorted({error["row_number"] for error in row_errors})
+        errors_url = f"/api/v1/batch/uploads/{upload_id}/errors"
+        if row_errors:
+            with timed("insert"):
+                UploadRowErrorDAL.create_errors(db, upload_id, row_errors[:MAX_ROW_ERRORS])
+            if not payload.quarantine_invalid_rows or len(invalid_rows) == len(transformed_df):
+                error_detail = (
+                    f"{len(invalid_rows)} of {len(transformed_df)} rows failed validation. "
+                    f"See {errors_url} for the row errors."
+                )
+                BatchUploadDAL.update_upload_processing_status(db, upload_id, "failed_processing", error_detail)
+                raise HTTPException(status_code=400, detail=error_detail)
+            transformed_df = FileProcessor.without_rows(transformed_df, invalid_rows, header_row)
+
+        # 4. Save the valid rows to the EmployeeData table
         # Note: FileProcessor.save_to_database expects the batch_upload object to link EmployeeData records
         saved_count, errors = FileProcessor.save_to_database(db, transformed_df, batch_upload)
-
         if errors:
-            # Decide if partial success is acceptable or if it's a full failure
-            error_summary = "; ".join([f"Row {e['row']}: {e['error']}" for e in errors])
-            BatchUploadDAL.update_upload_processing_status(db, upload_id, "failed_processing", f"Completed with errors: {error_summary}")
+            UploadRowErrorDAL.create_errors(db, upload_id, (
+                {
+                    "row_number": error["row"] + header_row, "field": None,
+                    "error_type": "insert", "message": error["error"], "value": None
+                }
+                for error in errors[:MAX_ROW_ERRORS]
+            ))
+
+        response = {
+            "upload_id": upload_id,
+            "rows_processed": len(transformed_df) + len(invalid_rows),
+            "rows_saved": saved_count,
+            "rows_quarantined": len(invalid_rows)
+        }
+        if errors and not payload.quarantine_invalid_rows:
+            error_summary = f"{len(errors)} rows could not be stored. See {errors_url} for the row errors."
+            BatchUploadDAL.update_upload_processing_status(db, upload_id, "failed_processing", error_summary)
             return {
                 "message": f"Processing for upload ID {upload_id} completed with errors.",
-                "upload_id": upload_id,
-                "rows_processed": len(transformed_df),
-                "rows_saved": saved_count,
-                "errors": errors
+                **response,
+                "errors_url": errors_url
             }
 
-        # 6. Update BatchUpload status to 'completed'
-        BatchUploadDAL.update_upload_processing_status(db, upload_id, "completed")
+        # 5. Update BatchUpload status to 'completed'
+        skipped = len(invalid_rows) + len(errors)
+        error_summary = (
+            f"{skipped} rows were not stored. See {errors_url} for the row errors." if skipped else None
+        )
+        BatchUploadDAL.update_upload_processing_status(db, upload_id, "completed", error_summary)
+        if skipped:
+            response["errors_url"] = errors_url
         
         return {
             "message": f"Successfully processed and saved data for upload ID {upload_id}.",
-            "upload_id": upload_id,
-            "rows_processed": len(transformed_df),
-            "rows_saved": saved_count
+            **response
         }
 
     except HTTPException as http_exc: # Catch HTTPExceptions raised by ourselves
         raise http_exc 
+    except (WorkerPoolBusyError, WorkerTimeoutError) as e:
+        # Nothing has been stored yet, so the mapping can be submitted again
+        BatchUploadDAL.update_upload_processing_status(db, upload_id, "failed_processing", str(e))
+        raise _worker_unavailable(e)
     except Exception as e:
         logger.error(f"Unexpected error during map_and_process for upload {upload_id}: {e}", exc_info=True)
         BatchUploadDAL.update_upload_processing_status(db, upload_id, "failed_processing", f"An unexpected server error occurred: {str(e)}")
         raise HTTPException(status_code=500, detail=f"An unexpected server error occurred during processing: {str(e)}")
 
 
+@router.get("/uploads/{upload_id}/errors", response_model=app_schemas.UploadRowErrorPage)
+def get_upload_row_errors(
+    upload_id: int,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    field: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """Get one page of the rows of an upload that failed validation or could not be stored, in row order."""
+    if not BatchUploadDAL.get_upload(db, upload_id):
+        raise HTTPException(status_code=404, detail="Upload not found")
+
+    return {
+        "total": UploadRowErrorDAL.count_errors(db, upload_id, field=field),
+        "skip": skip,
+        "limit": limit,
+        "items": UploadRowErrorDAL.get_errors(db, upload_id, skip=skip, limit=limit, field=field)
+    }
+
+
+@router.post("/uploads/{upload_id}/fund-alphas", response_model=Dict[str, Any])
+def upload_fund_alphas(
+    upload_id: int,
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db)
+):
+    """
+    Load a fund-level alpha file (employee ID, fund, alpha, AUM weight) for the employees of an upload.
+    
+    Replaces any funds loaded before. Rows for employee IDs that are not in the
+    upload are skipped and reported.
+    """
+    if not BatchUploadDAL.get_upload(db, upload_id):
+        raise HTTPException(status_code=404, detail="Upload not found")
+
+    with timed("parse"):
+        try:
+            funds = run_in_worker(FileProcessor.read_fund_alphas, file.file.read(), file.filename)
+        except (UnsupportedFileFormatError, ValueError) as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except (WorkerPoolBusyError, WorkerTimeoutError) as e:
+            raise _worker_unavailable(e)
+
+    with timed("map"):
+        id_by_employee = {
+            employee_id: employee_data_id
+            for employee_data_id, employee_id in EmployeeDataDAL.get_employee_ids(db, upload_id)
+        }
+        employee_data_ids = funds["employee_id"].map(id_by_employee)
+        matched = employee_data_ids.notna().to_numpy()
+        unmatched_ids = funds.loc[~matched, "employee_id"].unique().tolist()
+        funds = funds[matched].assign(employee_data_id=employee_data_ids[matched].astype(int))
+
+    with timed("compute"):
+        # One pass over the fund rows; the stored rows are aggregated the same way in SQL later
+        _, weighted_alphas, _ = calculate_weighted_alphas(
+            funds["employee_data_id"].to_numpy(), funds["alpha"].to_numpy(), funds["aum_weight"].to_numpy()
+        )
+
+    with timed("insert"):
+        columns = ("employee_data_id", "fund", "alpha", "aum_weight")
+        rows_saved = EmployeeFundAlphaDAL.replace_fund_alphas(db, upload_id, (
+            dict(zip(columns, values)) for values in zip(*(funds[column].tolist() for column in columns))
+        ))
+
+    return {
+        "upload_id": upload_id,
+        "rows_saved": rows_saved,
+        "employees_with_funds": len(weighted_alphas),
+        "unmatched_rows": int((~matched).sum()),
+        "unmatched_employee_ids": unmatched_ids[:100],
+        "weighted_alpha": {
+            "min": float(weighted_alphas.min()),
+            "mean": float(weighted_alphas.mean()),
+            "max": float(weighted_alphas.max()),
+        } if len(weighted_alphas) else None
+    }
+
+
+@router.get("/uploads/{upload_id}/weighted-alphas", response_model=List[app_schemas.WeightedAlpha])
+def get_weighted_alphas(
+    upload_id: int,
+    accept: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
+    """Get the AUM-weighted alpha of every employee of an upload that has fund alphas."""
+    if not BatchUploadDAL.get_upload(db, upload_id):
+        raise HTTPException(status_code=404, detail="Upload not found")
+
+    employee_ids = dict(EmployeeDataDAL.get_employee_ids(db, upload_id))
+    rows = [
+        {
+            "employee_data_id": employee_data_id,
+            "employee_id": employee_ids.get(employee_data_id),
+            "weighted_alpha": weighted_alpha,
+            "fund_count": fund_count
+        }
+        for employee_data_id, weighted_alpha, fund_count in EmployeeFundAlphaDAL.get_weighted_alphas(db, upload_id)
+    ]
+    with timed("serialize"):
+        return bulk_response(app_schemas.WeightedAlpha, rows, accept)
+
+
 @router.get("/uploads/{upload_id}/columns", response_model=Dict[str, Any])
-async def get_upload_columns(
+def get_upload_columns(
     upload_id: int,
     session_id: Optional[str] = Cookie(None),
     db: Session = Depends(get_db)
@@ -440,9 +724,9 @@ async def get_upload_columns(
     if not session_id:
         raise HTTPException(status_code=403, detail="No active session")
     
-    # Verify session exists and is not expired (optional, but good practice)
-    db_session = SessionDAL.get_session(db, session_id)
-    if not db_session or db_session.expires_at < datetime.datetime.now(datetime.timezone.utc):
+    # Verify session exists and is not expired (sessions store naive local expiry times)
+    db_session = SessionDAL.get_cached_session(db, session_id)
+    if not db_session or db_session.expires_at < datetime.datetime.now():
         raise HTTPException(status_code=401, detail="Session invalid or expired")
 
     # Retrieve the batch upload to ensure it belongs to the current session (security check)
@@ -461,7 +745,7 @@ async def get_upload_columns(
 
 
 @router.get("/uploads/template/{file_format}")
-async def download_template(
+def download_template(
     file_format: str
 ):
     """Get a template file for batch uploads."""
@@ -517,7 +801,7 @@ def create_upload(
 ):
     """Create a new batch upload."""
     # Verify session exists
-    db_session = SessionDAL.get_session(db, upload.session_id)
+    db_session = SessionDAL.get_cached_session(db, upload.session_id)
     if not db_session:
         raise HTTPException(status_code=404, detail="Session not found")
     
@@ -546,12 +830,12 @@ def create_upload(
 
 
 @router.get("/uploads/{upload_id}", response_model=BatchUpload)
-def get_upload(
+async def get_upload(
     upload_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get a batch upload by ID."""
-    db_upload = BatchUploadDAL.get_upload(db, upload_id)
+    db_upload = await AsyncBatchUploadDAL.get_upload(db, upload_id)
     if not db_upload:
         raise HTTPException(status_code=404, detail="Upload not found")
     
@@ -559,15 +843,15 @@ def get_upload(
 
 
 @router.get("/uploads", response_model=List[BatchUpload])
-def get_uploads(
+async def get_uploads(
     session_id: Optional[str] = Cookie(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all batch uploads for the current session."""
     if not session_id:
         raise HTTPException(status_code=404, detail="No active session")
     
-    return BatchUploadDAL.get_uploads_by_session(db, session_id)
+    return await AsyncBatchUploadDAL.get_uploads_by_session(db, session_id)
 
 
 @router.delete("/uploads/{upload_id}", response_model=dict)
@@ -584,6 +868,14 @@ def delete_upload(
 
 
 # Employee data management
+def _check_parameter_overrides(overrides: Optional[Dict[str, Any]]) -> None:
+    """Reject parameter overrides whose formula or curves do not compile (422)."""
+    try:
+        validate_override(overrides)
+    except (FormulaError, CurveError) as e:
+        raise HTTPException(status_code=422, detail=f"Invalid parameter overrides: {e}")
+
+
 @router.post("/employees", response_model=EmployeeData)
 def create_employee(
     employee: EmployeeDataCreate,
@@ -595,6 +887,8 @@ def create_employee(
     if not db_upload:
         raise HTTPException(status_code=404, detail="Batch upload not found")
     
+    _check_parameter_overrides(employee.parameter_overrides)
+    
     return EmployeeDataDAL.create_employee(
         db,
         batch_upload_id=employee.batch_upload_id,
@@ -631,18 +925,17 @@ def get_employee(
 def get_employees_by_upload(
     upload_id: int,
     team: Optional[str] = None,
+    accept: Optional[str] = Header(None),
     db: Session = Depends(get_db)
 ):
-    """Get all employee data records for a batch upload."""
+    """Get all employee data records for a batch upload, as JSON, NDJSON or an Arrow stream."""
     # Verify batch upload exists
     db_upload = BatchUploadDAL.get_upload(db, upload_id)
     if not db_upload:
         raise HTTPException(status_code=404, detail="Batch upload not found")
     
-    if team:
-        return EmployeeDataDAL.get_employees_by_team(db, upload_id, team)
-    else:
-        return EmployeeDataDAL.get_employees_by_upload(db, upload_id)
+    with timed("serialize"):
+        return bulk_response(EmployeeData, EmployeeDataDAL.get_employee_rows(db, upload_id, team), accept)
 
 
 @router.put("/employees/{employee_id}", response_model=EmployeeData)
@@ -653,6 +946,7 @@ def update_employee(
 ):
     """Update an employee data record."""
     update_data = employee_update.dict(exclude_unset=True)
+    _check_parameter_overrides(update_data.get("parameter_overrides"))
     db_employee = EmployeeDataDAL.update_employee(db, employee_id, **update_data)
     
     if not db_employee:
@@ -684,15 +978,21 @@ def create_calculation_result(
 
 
 @router.get("/calculations/{result_id}", response_model=BatchCalculationResult)
-def get_calculation_result(
+async def get_calculation_result(
     result_id: int,
-    db: Session = Depends(get_db)
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get a batch calculation result by ID."""
-    db_result = BatchCalculationResultDAL.get_result(db, result_id)
+    db_result = await AsyncBatchCalculationResultDAL.get_result(db, result_id)
     if not db_result:
         raise HTTPException(status_code=404, detail="Calculation result not found")
     
+    etag = make_etag("calculation", db_result.id, db_result.updated_at)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    response.headers.update(immutable_headers(etag))
     return db_result
 
 
@@ -745,15 +1045,91 @@ def create_employee_result(
 @router.get("/calculations/{result_id}/employee-results", response_model=List[EmployeeCalculationResult])
 def get_employee_results_by_batch(
     result_id: int,
+    accept: Optional[str] = Header(None),
+    if_none_match: Optional[str] = Header(None),
     db: Session = Depends(get_db)
 ):
-    """Get all employee calculation results for a batch calculation."""
+    """Get all employee calculation results for a batch calculation, as JSON, NDJSON or an Arrow stream."""
     # Verify batch result exists
     db_batch_result = BatchCalculationResultDAL.get_result(db, result_id)
     if not db_batch_result:
         raise HTTPException(status_code=404, detail="Batch calculation result not found")
     
-    return EmployeeCalculationResultDAL.get_results_by_batch(db, result_id)
+    # The representation depends on the negotiated format, so it is part of the ETag
+    etag = make_etag(
+        "employee-results", result_id, *EmployeeCalculationResultDAL.get_result_version(db, result_id),
+        negotiate_media_type(accept)
+    )
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag, vary="Accept")
+    with timed("serialize"):
+        response = bulk_response(
+            EmployeeCalculationResult, EmployeeCalculationResultDAL.get_result_rows(db, result_id), accept
+        )
+    response.headers.update(immutable_headers(etag, vary="Accept"))
+    return response
+
+
+@router.get("/calculations/{result_id}/team-summaries", response_model=List[app_schemas.TeamCalculationSummary])
+def get_team_summaries_by_batch(
+    result_id: int,
+    db: Session = Depends(get_db)
+):
+    """Get the per-team statistics of a batch calculation."""
+    # Verify batch result exists
+    db_batch_result = BatchCalculationResultDAL.get_result(db, result_id)
+    if not db_batch_result:
+        raise HTTPException(status_code=404, detail="Batch calculation result not found")
+    
+    return TeamCalculationSummaryDAL.get_summaries(db, result_id)
+
+
+
+@router.get("/latest/team-aggregations")
+def get_latest_batch_team_aggregations(
+    session_id: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """Get team aggregation data from the most recent calculation of the most recent batch upload"""
+    latest_batch = BatchUploadDAL.get_latest_upload(db, session_id)
+    if not latest_batch:
+        raise HTTPException(status_code=404, detail="No batch uploads found")
+    
+    # Read the per-team statistics stored with the latest calculation over this upload,
+    # so the figures match calculation_engine and no employee rows are scanned
+    batch_result_id = EmployeeCalculationResultDAL.get_latest_batch_result_id_for_upload(db, latest_batch.id)
+    if batch_result_id is None:
+        raise HTTPException(
+            status_code=404,
+            detail="No calculation results found for the latest batch. Run a calculation first."
+        )
+    
+    team_aggregations = [
+        {
+            "team": summary.team,
+            "employeeCount": summary.employee_count,
+            "totalBaseSalary": summary.total_base_salary,
+            "totalBonus": summary.total_bonus,
+            "averageBonus": summary.total_bonus / summary.employee_count if summary.employee_count else 0,
+            "averageBonusToSalaryRatio": (
+                summary.total_bonus / summary.total_base_salary if summary.total_base_salary else 0
+            ),
+            "cappedCount": summary.capped_count,
+            "policyBreachCount": summary.policy_breach_count,
+            "minBonus": summary.min_bonus,
+            "medianBonus": summary.median_bonus,
+            "maxBonus": summary.max_bonus
+        }
+        for summary in TeamCalculationSummaryDAL.get_summaries(db, batch_result_id)
+    ]
+    
+    return {
+        "batch_id": latest_batch.id,
+        "batch_result_id": batch_result_id,
+        "session_id": latest_batch.session_id,
+        "team_count": len(team_aggregations),
+        "team_aggregations": team_aggregations
+    }
 
 
 # Import template management
@@ -765,7 +1141,7 @@ def create_template(
 ):
     """Create a new import template."""
     # Verify session exists
-    db_session = SessionDAL.get_session(db, template.session_id)
+    db_session = SessionDAL.get_cached_session(db, template.session_id)
     if not db_session:
         raise HTTPException(status_code=404, detail="Session not found")
     
@@ -864,8 +1240,13 @@ def apply_template(
     if not db_upload:
         raise HTTPException(status_code=404, detail="Upload not found")
     
-    # Get the column mappings from the template
+    # Get the column mappings from the template, resolved against the upload's own
+    # column names when they are known
     column_mappings = db_template.column_mappings
+    if db_upload.source_columns_info:
+        column_mappings = db_template.resolve_columns(
+            column['name'] for column in db_upload.source_columns_info
+        )
     default_values = db_template.default_values or {}
     
     # Return the mappings and default values
@@ -908,6 +1289,7 @@ def get_upload_with_employees(
 @router.get("/calculations/{result_id}/detailed", response_model=BatchCalculationResultWithEmployees)
 def get_calculation_with_employee_results(
     result_id: int,
+    if_none_match: Optional[str] = Header(None),
     db: Session = Depends(get_db)
 ):
     """Get a batch calculation result with all employee results."""
@@ -915,7 +1297,38 @@ def get_calculation_with_employee_results(
     if not db_result:
         raise HTTPException(status_code=404, detail="Calculation result not found")
     
-    return db_result
+    etag = make_etag(
+        "calculation-detailed", db_result.id, db_result.updated_at,
+        *EmployeeCalculationResultDAL.get_result_version(db, result_id)
+    )
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    with timed("serialize"):
+        content = _batch_result_content(db, db_result, db_result.team_summaries)
+    return FastJSONResponse(content=content, headers=immutable_headers(etag))
+
+
+def _batch_result_content(
+    db: Session,
+    batch_result: Any,
+    team_summaries: List[Any]
+) -> Dict[str, Any]:
+    """
+    Build a BatchCalculationResultWithEmployees response body.
+    
+    The employee results are read as plain rows and validated in one call,
+    rather than loaded as ORM objects and converted one by one.
+    """
+    content = app_schemas.BatchCalculationResult.model_validate(batch_result, from_attributes=True).model_dump()
+    content["employee_results"] = validate_rows(
+        app_schemas.EmployeeCalculationResult,
+        EmployeeCalculationResultDAL.get_result_rows(db, batch_result.id)
+    )
+    content["team_summaries"] = [
+        app_schemas.TeamCalculationSummary.model_validate(summary, from_attributes=True).model_dump()
+        for summary in team_summaries
+    ]
+    return content
 
 
 @router.get("/sessions/current/detailed", response_model=SessionWithData)
@@ -1010,7 +1423,7 @@ def optimize_budget(
 
 
 @router.post("/uploads/{upload_id}/calculate_and_retrieve_results", response_model=app_schemas.BatchCalculationResultWithEmployees)
-async def calculate_and_retrieve_results(
+def calculate_and_retrieve_results(
     upload_id: int,
     db: Session = Depends(get_db),
     session_id: Optional[str] = Cookie(None)
@@ -1031,8 +1444,8 @@ async def calculate_and_retrieve_results(
             detail=f"Batch upload ID {upload_id} is not ready for calculation. Current status: {batch_upload.status}. Expected 'completed' or 'processed'."
         )
 
-    # 2. Retrieve EmployeeData
-    retrieved_employee_data = EmployeeDataDAL.get_employees_by_upload(db, upload_id)
+    # 2. Retrieve EmployeeData (as plain rows of the calculation inputs)
+    retrieved_employee_data = EmployeeDataDAL.get_calculation_rows(db, upload_id)
     if not retrieved_employee_data:
         raise HTTPException(status_code=404, detail=f"No employee data found for batch upload ID {upload_id}. Cannot perform calculations.")
 
@@ -1044,6 +1457,61 @@ async def calculate_and_retrieve_results(
 
     # --- Start of main transaction block ---
     try:
+        with timed("compute"):
+            # Vectorized evaluation of the calculator formula, one slice per distinct parameter override
+            bonuses = calculate_bonuses({
+                "base_salary": [emp_data.base_salary for emp_data in retrieved_employee_data],
+                "target_bonus_pct": [emp_data.target_bonus_pct for emp_data in retrieved_employee_data],
+                "investment_weight": [emp_data.investment_weight for emp_data in retrieved_employee_data],
+                "qualitative_weight": [emp_data.qualitative_weight for emp_data in retrieved_employee_data],
+                "investment_score_multiplier": [
+                    emp_data.investment_score_multiplier for emp_data in retrieved_employee_data
+                ],
+                "qual_score_multiplier": [emp_data.qual_score_multiplier for emp_data in retrieved_employee_data],
+                "raf": [emp_data.raf for emp_data in retrieved_employee_data],
+                "is_mrt": [bool(emp_data.is_mrt) for emp_data in retrieved_employee_data],
+                "mrt_cap_pct": [
+                    emp_data.mrt_cap_pct if emp_data.mrt_cap_pct is not None else 200.0
+                    for emp_data in retrieved_employee_data
+                ]
+            }, overrides=[emp_data.parameter_overrides for emp_data in retrieved_employee_data])
+            capped = bonuses["capped_bonus"] < bonuses["final_bonus"]
+            total_bonus_pool = float(bonuses["capped_bonus"].sum())
+            capped_employees_count = int(capped.sum())
+
+            employee_results = [
+                {
+                    "employee_data_id": emp_data.id,
+                    "investment_component": investment_component,
+                    "qualitative_component": qualitative_component,
+                    "weighted_performance": weighted_performance,
+                    "pre_raf_bonus": pre_raf_bonus,
+                    "final_bonus": capped_bonus,
+                    "bonus_to_salary_ratio": bonus_to_salary_ratio,
+                    "policy_breach": policy_breach,
+                    "applied_cap": applied_cap
+                }
+                for emp_data, investment_component, qualitative_component, weighted_performance, pre_raf_bonus,
+                capped_bonus, bonus_to_salary_ratio, policy_breach, applied_cap in zip(
+                    retrieved_employee_data,
+                    bonuses["investment_component"].tolist(),
+                    bonuses["qualitative_component"].tolist(),
+                    bonuses["weighted_performance"].tolist(),
+                    bonuses["pre_raf_bonus"].tolist(),
+                    bonuses["capped_bonus"].tolist(),
+                    bonuses["bonus_to_salary_ratio"].tolist(),
+                    bonuses["policy_breach"].tolist(),
+                    bonuses["applied_cap"].tolist()
+                )
+            ]
+            team_summary_rows = zip(
+                [emp_data.team for emp_data in retrieved_employee_data],
+                [emp_data.base_salary for emp_data in retrieved_employee_data],
+                bonuses["capped_bonus"].tolist(),
+                capped.tolist(),
+                bonuses["policy_breach"].tolist()
+            )
+
         # Create a new BatchScenario
         scenario_name = f"Auto-calc for Upload {upload_id} - {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
         new_scenario = BatchScenarioDAL.create_scenario(
@@ -1065,45 +1533,14 @@ async def calculate_and_retrieve_results(
             capped_employees=0  
         )
 
-        total_bonus_pool = 0.0
-        capped_employees_count = 0
-        created_employee_calc_results_db = []
+        with timed("insert"):
+            # One executemany rather than an ORM object (and a refresh) per employee
+            EmployeeCalculationResultDAL.create_results(db, batch_calc_result_db.id, employee_results)
 
-        for emp_data in retrieved_employee_data:
-            mrt_cap_pct_val = emp_data.mrt_cap_pct if emp_data.mrt_cap_pct is not None else 200.0
-            
-            # The calculate_bonus function itself is pure Python, no DB ops
-            individual_calc_output = calculate_bonus(
-                base_salary=emp_data.base_salary,
-                target_bonus_pct=emp_data.target_bonus_pct,
-                investment_weight=emp_data.investment_weight,
-                qualitative_weight=emp_data.qualitative_weight,
-                investment_score_multiplier=emp_data.investment_score_multiplier,
-                qual_score_multiplier=emp_data.qual_score_multiplier,
-                raf=emp_data.raf,
-                is_mrt=emp_data.is_mrt,
-                mrt_cap_pct=mrt_cap_pct_val
-            )
-            
-            emp_result_create_schema = app_schemas.EmployeeCalculationResultCreate(
-                batch_result_id=batch_calc_result_db.id,
-                employee_data_id=emp_data.id,
-                investment_component=individual_calc_output["investment_component"],
-                qualitative_component=individual_calc_output["qualitative_component"],
-                weighted_performance=individual_calc_output["weighted_performance"],
-                pre_raf_bonus=individual_calc_output["pre_raf_bonus"],
-                final_bonus=individual_calc_output["capped_bonus"],
-                bonus_to_salary_ratio=individual_calc_output["bonus_to_salary_ratio"],
-                policy_breach=individual_calc_output["policy_breach"],
-                applied_cap=individual_calc_output["applied_cap"]
-            )
-            # Create individual employee calculation result (DB operation)
-            created_emp_res = EmployeeCalculationResultDAL.create_result(db, **emp_result_create_schema.dict())
-            created_employee_calc_results_db.append(created_emp_res)
-            
-            total_bonus_pool += individual_calc_output["capped_bonus"]
-            if individual_calc_output["applied_cap"] is not None:
-                capped_employees_count += 1
+        # Per-team statistics, so team views don't need to rescan the employee results
+        team_summaries = TeamCalculationSummaryDAL.create_summaries(
+            db, batch_calc_result_db.id, team_summary_rows
+        )
 
         # Update the BatchCalculationResult with aggregated totals
         batch_calc_result_db.total_bonus_pool = total_bonus_pool
@@ -1112,18 +1549,24 @@ async def calculate_and_retrieve_results(
         
         # All individual employee results and the parent batch_calc_result are created/updated.
         # Now commit the entire transaction.
-        db.commit()
-
-        # Refresh objects to get DB-generated values and relationships loaded for response
-        db.refresh(new_scenario)
-        db.refresh(batch_calc_result_db)
-        for res in created_employee_calc_results_db:
-            db.refresh(res)
-        
-        # Assign the loaded employee results to the batch result for the response model
-        batch_calc_result_db.employee_results = created_employee_calc_results_db
+        with timed("commit"):
+            db.commit()
+
+            # Refresh objects to get DB-generated values for the response
+            db.refresh(new_scenario)
+            db.refresh(batch_calc_result_db)
+            for summary in team_summaries:
+                db.refresh(summary)
         
-        return batch_calc_result_db
+        # Serialize here (rather than leaving it to FastAPI) so the cost shows up as its own stage
+        with timed("serialize"):
+            content = _batch_result_content(db, batch_calc_result_db, team_summaries)
+        return FastJSONResponse(content=content)
+
+    except (FormulaError, CurveError) as e:
+        # A stored parameter override that cannot be applied, not a server fault
+        db.rollback()
+        raise HTTPException(status_code=422, detail=f"Invalid parameter overrides: {e}")
 
     except SQLAlchemyError as e:
         db.rollback() # Rollback the entire transaction
@@ -1,11 +1,14 @@
 from sqlalchemy.orm import Session
 import pandas as pd
 from typing import Dict, Any, List
-from app.models.batch import BatchResult
 from app.db.models import BatchUpload, EmployeeData, Session as SessionModel
+from app.utils.instrumentation import timed
 import datetime
+import logging
 import uuid
 
+logger = logging.getLogger(__name__)
+
 class BatchService:
     def __init__(self, db: Session):
         self.db = db
@@ -40,28 +43,30 @@ class BatchService:
         self.db.flush()  # Get the ID without committing
         
         # Process each row in the DataFrame and create EmployeeData records
-        for _, row in df.iterrows():
-            employee_data = EmployeeData(
-                batch_upload_id=batch_upload.id,
-                employee_id=str(row.get('employee_id', '')),
-                name=str(row.get('name', '')),
-                team=str(row.get('team', '')),
-                base_salary=float(row.get('base_salary', 0)),
-                target_bonus_pct=float(row.get('target_bonus_pct', 0)),
-                investment_weight=float(row.get('investment_weight', 0)),
-                qualitative_weight=float(row.get('qualitative_weight', 0)),
-                investment_score_multiplier=float(row.get('investment_score_multiplier', 1.0)),
-                qual_score_multiplier=float(row.get('qual_score_multiplier', 1.0)),
-                raf=float(row.get('raf', 1.0)),
-                is_mrt=bool(row.get('is_mrt', False)),
-                mrt_cap_pct=float(row.get('mrt_cap_pct', 0)) if pd.notna(row.get('mrt_cap_pct')) else None
-            )
-            self.db.add(employee_data)
-        
-        self.db.commit()
+        with timed("insert"):
+            for _, row in df.iterrows():
+                employee_data = EmployeeData(
+                    batch_upload_id=batch_upload.id,
+                    employee_id=str(row.get('employee_id', '')),
+                    name=str(row.get('name', '')),
+                    team=str(row.get('team', '')),
+                    base_salary=float(row.get('base_salary', 0)),
+                    target_bonus_pct=float(row.get('target_bonus_pct', 0)),
+                    investment_weight=float(row.get('investment_weight', 0)),
+                    qualitative_weight=float(row.get('qualitative_weight', 0)),
+                    investment_score_multiplier=float(row.get('investment_score_multiplier', 1.0)),
+                    qual_score_multiplier=float(row.get('qual_score_multiplier', 1.0)),
+                    raf=float(row.get('raf', 1.0)),
+                    is_mrt=bool(row.get('is_mrt', False)),
+                    mrt_cap_pct=float(row.get('mrt_cap_pct', 0)) if pd.notna(row.get('mrt_cap_pct')) else None
+                )
+                self.db.add(employee_data)
+
+        with timed("commit"):
+            self.db.commit()
         self.db.refresh(batch_upload)
         
-        print(f"DEBUG: Created batch upload {batch_upload.id} with {len(df)} employees for session {session_id}")
+        logger.debug(f"Created batch upload {batch_upload.id} with {len(df)} employees for session {session_id}")
         
         return batch_upload
 
@@ -1,6 +1,12 @@
-from typing import Dict, Any, Optional, Tuple, TypedDict
-from app.services.cap_policy_logic import perform_cap_and_policy_checks, apply_cap_to_bonus
-from app.services.raf_calculation import calculate_raf as calculate_raf_specialized, apply_raf_to_bonus
+import json
+from functools import lru_cache
+from typing import Callable, Dict, Any, List, Mapping, Optional, Sequence, Tuple, TypedDict
+from app.services.curves import CurveError, compile_curve, evaluate_curves
+from app.services.formula import CALCULATOR_FORMULA, CompiledFormula, FormulaError, compile_formula
+from app.services.raf_calculation import calculate_raf as calculate_raf_specialized
+from app.utils.lazy_import import lazy_import
+
+np = lazy_import("numpy")
 
 
 class RafParameters(TypedDict, total=False):
@@ -225,7 +231,10 @@ def calculate_bonus(
     raf: float,
     raf_params: Optional[RafParameters] = None,
     is_mrt: bool = False,
-    mrt_cap_pct: float = 200
+    mrt_cap_pct: float = 200,
+    formula: Optional[Dict[str, Any]] = None,
+    curves: Optional[Dict[str, Any]] = None,
+    measures: Optional[Dict[str, float]] = None
 ) -> Dict[str, Any]:
     """
     Calculate the bonus based on the provided inputs.
@@ -241,87 +250,324 @@ def calculate_bonus(
         raf_params: Optional RAF parameters (if provided, overrides the raf value)
         is_mrt: Whether the employee is a Material Risk Taker
         mrt_cap_pct: MRT cap percentage
+        formula: Optional formula definition layered over CALCULATOR_FORMULA
+        curves: Optional mapping curves by the input they replace, for example an
+            alpha curve for investment_score_multiplier
+        measures: Additional inputs read by the curves or the formula, such as alpha
         
     Returns:
         Dictionary containing the calculation results
     """
-    # Calculate target bonus
-    target_bonus = calculate_target_bonus(base_salary, target_bonus_pct)
-    
-    # Normalize weights
-    normalized_weights = normalize_weights(investment_weight, qualitative_weight)
-    normalized_investment_weight = normalized_weights["normalized_investment_weight"]
-    normalized_qualitative_weight = normalized_weights["normalized_qualitative_weight"]
-    
-    # Calculate components
-    investment_component = calculate_investment_component(
-        normalized_investment_weight, 
-        investment_score_multiplier
-    )
-    
-    qualitative_component = calculate_qualitative_component(
-        normalized_qualitative_weight, 
-        qual_score_multiplier
-    )
-    
-    weighted_performance = calculate_weighted_performance(
-        investment_component, 
-        qualitative_component
-    )
-    
-    # Calculate pre-RAF bonus
-    pre_raf_bonus = calculate_initial_bonus(target_bonus, weighted_performance)
-    
     # Determine RAF to use (either from input or calculate from parameters)
     effective_raf = raf
     if raf_params is not None:
         # Use the specialized RAF calculation module
         effective_raf = calculate_raf_specialized(raf_params)
     
-    # Apply RAF to get final bonus
-    final_bonus = apply_raf_to_bonus(pre_raf_bonus, effective_raf)
-    
-    # Perform cap and policy checks using the specialized module
-    cap_check_results = perform_cap_and_policy_checks(
-        base_salary, 
-        final_bonus, 
-        is_mrt, 
-        mrt_cap_pct
-    )
-    
-    # Apply cap if necessary
-    capped_bonus = final_bonus
-    if cap_check_results["applied_cap"] is not None:
-        capped_bonus = apply_cap_to_bonus(
-            final_bonus,
-            cap_check_results["base_salary_cap"],
-            cap_check_results["mrt_cap"]
-        )
+    inputs = dict(measures or {})
+    inputs.update({
+        "base_salary": base_salary,
+        "target_bonus_pct": target_bonus_pct,
+        "investment_weight": investment_weight,
+        "qualitative_weight": qualitative_weight,
+        "investment_score_multiplier": investment_score_multiplier,
+        "qual_score_multiplier": qual_score_multiplier,
+        "raf": effective_raf,
+        "is_mrt": is_mrt,
+        "mrt_cap_pct": mrt_cap_pct
+    })
+    if curves:
+        inputs.update((name, float(value)) for name, value in evaluate_curves(curves, inputs).items())
     
-    # Calculate bonus to salary ratio
-    bonus_to_salary_ratio = calculate_bonus_to_salary_ratio(capped_bonus, base_salary)
+    plan = _calculator_plan() if formula is None else compile_formula(formula, CALCULATOR_FORMULA)
+    results = plan.evaluate_scalar(inputs)
     
     # Determine which cap was applied (if any)
     applied_cap = None
-    if cap_check_results["applied_cap"] is not None:
-        if cap_check_results["applied_cap"] == cap_check_results["base_salary_cap"]:
-            applied_cap = "3x Base Salary"
-        elif cap_check_results["applied_cap"] == cap_check_results["mrt_cap"]:
-            applied_cap = "MRT Cap"
+    if results["capped_bonus"] < results["final_bonus"]:
+        applied_cap = "3x Base Salary" if results["capped_bonus"] == results["base_salary_cap"] else "MRT Cap"
     
     return {
-        "target_bonus": target_bonus,
-        "normalized_weights": normalized_weights,
-        "investment_component": investment_component,
-        "qualitative_component": qualitative_component,
-        "weighted_performance": weighted_performance,
-        "pre_raf_bonus": pre_raf_bonus,
+        "target_bonus": results["target_bonus"],
+        "normalized_weights": {
+            "normalized_investment_weight": results["normalized_investment_weight"],
+            "normalized_qualitative_weight": results["normalized_qualitative_weight"]
+        },
+        "investment_component": results["investment_component"],
+        "qualitative_component": results["qualitative_component"],
+        "weighted_performance": results["weighted_performance"],
+        "pre_raf_bonus": results["pre_raf_bonus"],
         "raf": effective_raf,
-        "final_bonus": final_bonus,
-        "capped_bonus": capped_bonus,
-        "bonus_to_salary_ratio": bonus_to_salary_ratio,
-        "base_salary_cap": cap_check_results["base_salary_cap"],
-        "mrt_cap": cap_check_results["mrt_cap"],
+        "final_bonus": results["final_bonus"],
+        "capped_bonus": results["capped_bonus"],
+        "bonus_to_salary_ratio": results["bonus_to_salary_ratio"],
+        "base_salary_cap": results["base_salary_cap"],
+        "mrt_cap": results["mrt_cap"] if is_mrt else None,
         "applied_cap": applied_cap,
-        "policy_breach": cap_check_results["policy_breach"]
+        "policy_breach": results["policy_breach"]
+    }
+
+
+def group_overrides(overrides: Sequence[Optional[Mapping[str, Any]]]) -> List[Tuple[Dict[str, Any], Any]]:
+    """
+    Bucket employees by their parameter overrides.
+    
+    Employees whose overrides are identical (compared by a canonical signature)
+    share a bucket; employees without overrides share the bucket of {}.
+    
+    Args:
+        overrides: Each employee's parameter overrides, or None
+        
+    Returns:
+        (override, employee positions) for each distinct override, largest bucket first
+    """
+    codes: Dict[Any, int] = {(): 0}
+    buckets: List[Dict[str, Any]] = [{}]
+    employee_codes = np.zeros(len(overrides), dtype=np.intp)
+    # Only the (usually few) employees with overrides are signed one by one
+    for position in [position for position, override in enumerate(overrides) if override]:
+        override = overrides[position]
+        signature = _override_signature(override)
+        code = codes.get(signature)
+        if code is None:
+            code = codes[signature] = len(buckets)
+            buckets.append(dict(override))
+        employee_codes[position] = code
+    
+    # One stable sort splits the positions into buckets however many there are
+    order = np.argsort(employee_codes, kind="stable")
+    sizes = np.bincount(employee_codes, minlength=len(buckets))
+    positions = np.split(order, np.cumsum(sizes)[:-1])
+    return sorted(
+        ((override, bucket) for override, bucket in zip(buckets, positions) if len(bucket)),
+        key=lambda bucket: -len(bucket[1])
+    )
+
+
+def _override_signature(override: Mapping[str, Any]) -> Any:
+    # Flat overrides of numbers are signed by their sorted items, which is much
+    # cheaper than JSON; nested ones, such as formula steps, by canonical JSON
+    signature = tuple(sorted(override.items()))
+    try:
+        hash(signature)
+    except TypeError:
+        return json.dumps(override, sort_keys=True, default=str)
+    return signature
+
+
+def evaluate_with_overrides(
+    inputs: Mapping[str, Any],
+    overrides: Optional[Sequence[Optional[Mapping[str, Any]]]],
+    evaluate: Callable[[Dict[str, Any], Dict[str, Any]], Mapping[str, Any]]
+) -> Dict[str, Any]:
+    """
+    Evaluate a vectorized calculation with per-employee parameter overrides.
+    
+    Employees are bucketed by override (see group_overrides). The largest bucket,
+    usually the employees without overrides, is evaluated over the unsliced
+    inputs exactly as it would be without overrides; every other bucket is then
+    evaluated as one vectorized slice and scattered over its employees' positions.
+    A few overridden employees therefore cost one small evaluation per distinct
+    override rather than a per-employee path for everyone.
+    
+    Args:
+        inputs: Arrays (one value per employee) or scalars
+        overrides: Each employee's parameter overrides (or None), or None for no overrides
+        evaluate: Called with the inputs of a bucket and its override; returns an
+            array per output, one value per employee of the bucket
+        
+    Returns:
+        An array per output, one value per employee in the order of the inputs;
+        outputs that not every bucket produced are dropped
+    """
+    buckets = group_overrides(overrides) if overrides else []
+    if len(buckets) <= 1:
+        return dict(evaluate(dict(inputs), buckets[0][0] if buckets else {}))
+    
+    count = len(overrides)
+    arrays = {
+        name: np.asarray(value) if isinstance(value, (list, tuple)) else value
+        for name, value in inputs.items()
     }
+    per_employee = {
+        name for name, value in arrays.items()
+        if isinstance(value, np.ndarray) and value.ndim > 0 and len(value) == count
+    }
+    
+    # Writable copies of the largest bucket's results for everyone, overwritten below for the rest
+    results = {name: np.array(values) for name, values in evaluate(dict(arrays), buckets[0][0]).items()}
+    for override, positions in buckets[1:]:
+        bucket_inputs = {
+            name: value[positions] if name in per_employee else value
+            for name, value in arrays.items()
+        }
+        bucket_results = evaluate(bucket_inputs, override)
+        for name in [name for name in results if name not in bucket_results]:
+            del results[name]
+        for name, values in results.items():
+            bucket_values = np.asarray(bucket_results[name])
+            if not np.can_cast(bucket_values.dtype, values.dtype, casting="same_kind"):
+                values = results[name] = values.astype(np.result_type(values, bucket_values))
+            values[positions] = bucket_values
+    return results
+
+
+def apply_override(inputs: Mapping[str, Any], override: Mapping[str, Any]) -> Dict[str, Any]:
+    """
+    Replace inputs with the numeric and boolean values of a parameter override.
+    
+    Args:
+        inputs: The inputs of a bucket of employees
+        override: Their parameter overrides; other values, such as a formula or
+            curves, are left to the caller
+        
+    Returns:
+        A copy of the inputs with the overridden values
+    """
+    values = {name: value for name, value in override.items() if isinstance(value, (int, float))}
+    return {**inputs, **values} if values else dict(inputs)
+
+
+def layer_definitions(
+    definitions: Optional[Mapping[str, Any]],
+    override: Optional[Mapping[str, Any]],
+    key: Optional[str] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Layer overridden formula steps or curves over the scenario's.
+    
+    Args:
+        definitions: The formula ({"steps": {...}}, with key="steps") or curves
+        override: An override of the same shape, or None
+        key: The member holding the definitions, for formulas
+        
+    Returns:
+        The merged definition, or the original if there is no override
+        
+    Raises:
+        FormulaError: If a formula override is malformed
+        CurveError: If a curves override is malformed
+    """
+    if not override:
+        return definitions
+    if key is None:
+        if not isinstance(override, Mapping):
+            raise CurveError("A curves override must be an object mapping names to curve definitions")
+        return {**(definitions or {}), **override}
+    
+    if not isinstance(override, Mapping) or not isinstance(override.get(key), Mapping):
+        raise FormulaError(f'A formula override must be an object with a "{key}" object')
+    return {key: {**(definitions or {}).get(key, {}), **override[key]}}
+
+
+def validate_override(override: Optional[Mapping[str, Any]]) -> None:
+    """
+    Check that the formula and curves of a parameter override compile.
+    
+    Called before an override is stored, so that calculations never meet a
+    malformed one. Inputs a formula or curve reads are only checked when it is evaluated.
+    
+    Raises:
+        FormulaError: If the formula override is malformed
+        CurveError: If the curves override is malformed
+    """
+    if not override:
+        return
+    formula = layer_definitions(None, override.get("formula"), key="steps")
+    if formula is not None:
+        compile_formula(formula, CALCULATOR_FORMULA)
+    for definition in (layer_definitions(None, override.get("curves")) or {}).values():
+        compile_curve(definition)
+
+
+def calculate_bonuses(
+    employees: Mapping[str, Any],
+    formula: Optional[Dict[str, Any]] = None,
+    curves: Optional[Dict[str, Any]] = None,
+    overrides: Optional[Sequence[Optional[Mapping[str, Any]]]] = None
+) -> Dict[str, Any]:
+    """
+    Calculate bonuses for many employees at once.
+    
+    Args:
+        employees: An array (one value per employee) or a scalar for each input of
+            calculate_bonus; raf must already be resolved from any RAF parameters
+        formula: Optional formula definition layered over CALCULATOR_FORMULA
+        curves: Optional mapping curves by the input they replace
+        overrides: Optional parameter overrides per employee (EmployeeData.parameter_overrides):
+            numbers replace inputs of the same name, and "formula" and "curves" are
+            layered over the formula and curves of the call
+        
+    Returns:
+        An array per formula step, plus applied_cap naming the cap applied to each
+        employee ("3x Base Salary", "MRT Cap" or None)
+        
+    Raises:
+        FormulaError: If a formula is malformed or cannot be evaluated
+        CurveError: If curves are malformed or read a missing input
+    """
+    def evaluate(inputs: Dict[str, Any], override: Dict[str, Any]) -> Dict[str, Any]:
+        inputs = apply_override(inputs, override)
+        bucket_curves = layer_definitions(curves, override.get("curves"))
+        if bucket_curves:
+            inputs.update(evaluate_curves(bucket_curves, inputs))
+        bucket_formula = layer_definitions(formula, override.get("formula"), key="steps")
+        plan = _calculator_plan() if bucket_formula is None else compile_formula(bucket_formula, CALCULATOR_FORMULA)
+        return plan.evaluate(inputs)
+    
+    results = evaluate_with_overrides(employees, overrides, evaluate)
+    
+    # A capped bonus equal to the base salary cap is reported as that cap, even if the MRT cap is the same
+    capped = results["capped_bonus"] < results["final_bonus"]
+    results["applied_cap"] = np.where(
+        capped,
+        np.where(results["capped_bonus"] == results["base_salary_cap"], "3x Base Salary", "MRT Cap").astype(object),
+        None
+    )
+    return results
+
+
+def calculate_weighted_alphas(
+    employee_ids: Any,
+    alphas: Any,
+    aum_weights: Any
+) -> Tuple[Any, Any, Any]:
+    """
+    Combine fund-level alphas into one AUM-weighted alpha per employee.
+    
+    The fund rows are sorted by employee once and each employee's funds are
+    summed as one segment with np.add.reduceat, so there is no per-employee loop.
+    An employee whose funds all have zero weight gets the plain mean of their alphas.
+    
+    Args:
+        employee_ids: The employee of each fund row
+        alphas: The alpha of each fund row
+        aum_weights: The AUM weight of each fund row
+        
+    Returns:
+        The distinct employee IDs (sorted), their weighted alphas and their fund counts
+    """
+    employee_ids = np.asarray(employee_ids)
+    alphas = np.asarray(alphas, dtype=float)
+    aum_weights = np.asarray(aum_weights, dtype=float)
+    if len(employee_ids) == 0:
+        return employee_ids, np.empty(0), np.empty(0, dtype=int)
+    
+    order = np.argsort(employee_ids, kind="stable")
+    sorted_ids = employee_ids[order]
+    starts = np.flatnonzero(np.r_[True, sorted_ids[1:] != sorted_ids[:-1]])
+    counts = np.diff(np.r_[starts, len(sorted_ids)])
+    
+    weighted_sums = np.add.reduceat(alphas[order] * aum_weights[order], starts)
+    weight_totals = np.add.reduceat(aum_weights[order], starts)
+    means = np.add.reduceat(alphas[order], starts) / counts
+    with np.errstate(divide="ignore", invalid="ignore"):
+        weighted = np.where(weight_totals != 0, weighted_sums / weight_totals, means)
+    return sorted_ids[starts], weighted, counts
+
+
+@lru_cache(maxsize=1)
+def _calculator_plan() -> CompiledFormula:
+    # The default plan is looked up once per employee by the calculator, so it
+    # skips hashing the definition on every call
+    return compile_formula(None, CALCULATOR_FORMULA)
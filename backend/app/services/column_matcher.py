@@ -0,0 +1,245 @@
+"""
+Suggests the system field for each column of an uploaded file.
+
+Headers are normalized (case, punctuation, camelCase and word order) and looked
+up in an alias index built from the built-in aliases below and the column
+mappings of every public import template. Headers with no exact alias fall back
+to trigram similarity against the indexed aliases. Results are cached per set of
+headers, so files with a recurring layout are matched without any work.
+"""
+import os
+import copy
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.db.crud import ImportTemplateDAL
+from app.db.template_cache import CachedTemplate
+from app.utils.headers import normalize_header
+
+# Common spellings of each system field, in addition to the field name itself
+FIELD_ALIASES: Dict[str, List[str]] = {
+    'employee_id': [
+        'emp id', 'employee number', 'employee no', 'emp no', 'staff id', 'staff number',
+        'person id', 'worker id', 'employee code', 'payroll id', 'id'
+    ],
+    'name': ['employee name', 'full name', 'staff name', 'emp name', 'employee'],
+    'team': ['department', 'dept', 'desk', 'business unit', 'division', 'group', 'team name'],
+    'base_salary': [
+        'salary', 'base pay', 'annual salary', 'basic salary', 'base', 'fixed pay',
+        'base compensation', 'base comp'
+    ],
+    'target_bonus_pct': [
+        'target bonus', 'target bonus percent', 'target bonus percentage', 'bonus target',
+        'target pct', 'bonus pct', 'target bonus %'
+    ],
+    'investment_weight': [
+        'investment weighting', 'inv weight', 'investment percent', 'quantitative weight',
+        'investment performance weight'
+    ],
+    'qualitative_weight': ['qual weight', 'qualitative weighting', 'qualitative percent'],
+    'investment_score_multiplier': [
+        'investment score', 'investment multiplier', 'inv score', 'inv multiplier',
+        'investment performance score'
+    ],
+    'qual_score_multiplier': [
+        'qualitative score', 'qual score', 'qualitative multiplier', 'qual multiplier',
+        'qualitative score multiplier'
+    ],
+    'raf': ['risk adjustment factor', 'risk adjustment', 'risk factor'],
+    'is_mrt': ['mrt', 'material risk taker', 'mrt flag', 'is material risk taker'],
+    'mrt_cap_pct': ['mrt cap', 'mrt cap percent', 'mrt cap %', 'bonus cap'],
+}
+
+# Minimum trigram similarity for a fuzzy suggestion
+FUZZY_THRESHOLD = float(os.getenv("COLUMN_MATCH_FUZZY_THRESHOLD", "0.4"))
+
+# Number of header sets whose suggestions are kept
+CACHE_SIZE = int(os.getenv("COLUMN_MATCH_CACHE_SIZE", "256"))
+
+# Scores by kind of match; fuzzy matches score their similarity scaled below these
+EXACT_SCORE = 1.0
+ALIAS_SCORE = 0.95
+TEMPLATE_ALIAS_SCORE = 0.9
+FUZZY_SCALE = 0.85
+
+def trigrams(key: str) -> FrozenSet[str]:
+    """Character trigrams of a normalized key, padded so that short keys still have some."""
+    padded = f"  {key} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+class AliasIndex:
+    """Normalized aliases with their fields, plus a trigram index for fuzzy lookups."""
+
+    def __init__(self, aliases: Iterable[Tuple[str, str, float, str]]):
+        """
+        Args:
+            aliases: (alias, field, score, kind) entries; for a repeated alias and
+                field the highest score is kept
+        """
+        # normalized alias -> field -> (score, kind)
+        self.exact: Dict[str, Dict[str, Tuple[float, str]]] = {}
+        for alias, field, score, kind in aliases:
+            key = normalize_header(alias)
+            if not key:
+                continue
+            fields = self.exact.setdefault(key, {})
+            if field not in fields or fields[field][0] < score:
+                fields[field] = (score, kind)
+
+        self._trigrams: Dict[str, FrozenSet[str]] = {key: trigrams(key) for key in self.exact}
+        self._postings: Dict[str, List[str]] = {}
+        for key, grams in self._trigrams.items():
+            for gram in grams:
+                self._postings.setdefault(gram, []).append(key)
+
+    def lookup(self, header: Any, limit: int = 3) -> List[Dict[str, Any]]:
+        """
+        Ranked field suggestions for one header.
+
+        Args:
+            header: The column header
+            limit: Maximum number of suggestions
+
+        Returns:
+            Suggestions as {"field", "score", "match"} dicts, best first, at most one per field
+        """
+        key = normalize_header(header)
+        best: Dict[str, Tuple[float, str]] = {}
+
+        for field, (score, kind) in self.exact.get(key, {}).items():
+            best[field] = (score, kind)
+
+        if not best and key:
+            grams = trigrams(key)
+            candidates = {alias for gram in grams for alias in self._postings.get(gram, ())}
+            for alias in candidates:
+                alias_grams = self._trigrams[alias]
+                similarity = len(grams & alias_grams) / len(grams | alias_grams)
+                if similarity < FUZZY_THRESHOLD:
+                    continue
+                for field, (score, _) in self.exact[alias].items():
+                    fuzzy_score = round(similarity * score * FUZZY_SCALE, 4)
+                    if field not in best or best[field][0] < fuzzy_score:
+                        best[field] = (fuzzy_score, 'fuzzy')
+
+        ranked = sorted(best.items(), key=lambda item: (-item[1][0], item[0]))
+        return [{'field': field, 'score': score, 'match': kind} for field, (score, kind) in ranked[:limit]]
+
+
+class ColumnMatcher:
+    """
+    Process-wide column-matching service.
+
+    The alias index is rebuilt whenever the public templates (read through the
+    template cache) change, and suggestions are cached per header set and index version.
+    """
+
+    _lock = threading.Lock()
+    _index: Optional[AliasIndex] = None
+    _index_version: Optional[Tuple[Any, ...]] = None
+    _cache: "OrderedDict[Tuple[str, Tuple[Any, ...]], Dict[str, Any]]" = OrderedDict()
+
+    @staticmethod
+    def header_set_hash(headers: Sequence[Any]) -> str:
+        """Stable hash of a set of headers, independent of their order."""
+        joined = '\n'.join(sorted({str(header) for header in headers}))
+        return hashlib.sha256(joined.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _templates_version(templates: Sequence[CachedTemplate]) -> Tuple[Any, ...]:
+        """A fingerprint of the public templates, which changes whenever one is added, edited or removed."""
+        return tuple(sorted(template.fingerprint for template in templates))
+
+    @staticmethod
+    def build_index(templates: Iterable[CachedTemplate]) -> AliasIndex:
+        """
+        Build the alias index from the built-in aliases and the given templates.
+
+        Args:
+            templates: Import templates whose column mappings are used as aliases
+
+        Returns:
+            The alias index
+        """
+        aliases = []
+        for field, field_aliases in FIELD_ALIASES.items():
+            aliases.append((field, field, EXACT_SCORE, 'exact'))
+            aliases.extend((alias, field, ALIAS_SCORE, 'alias') for alias in field_aliases)
+        for template in templates:
+            for source_column, field in (template.column_mappings or {}).items():
+                aliases.append((source_column, field, TEMPLATE_ALIAS_SCORE, 'template'))
+        return AliasIndex(aliases)
+
+    @classmethod
+    def get_index(cls, db: Session) -> Tuple[AliasIndex, Tuple[Any, ...]]:
+        """Return the alias index and its version, rebuilding it if the public templates changed."""
+        templates = ImportTemplateDAL.get_public_templates(db)
+        version = cls._templates_version(templates)
+        with cls._lock:
+            if cls._index is not None and cls._index_version == version:
+                return cls._index, version
+        index = cls.build_index(templates)
+        with cls._lock:
+            cls._index, cls._index_version = index, version
+        return index, version
+
+    @classmethod
+    def suggest(cls, db: Session, headers: Sequence[Any], limit: int = 3) -> Dict[str, Any]:
+        """
+        Suggest system fields for every column of an upload in one pass.
+
+        Args:
+            db: The database session
+            headers: The column headers of the uploaded file
+            limit: Maximum number of ranked suggestions per column
+
+        Returns:
+            A dictionary with ``suggestions`` (header -> ranked suggestions) and
+            ``suggested_mappings`` (header -> field), where each field is assigned
+            to at most one column, best matches first
+        """
+        index, version = cls.get_index(db)
+        key = (cls.header_set_hash(headers), version, limit)
+        with cls._lock:
+            cached = cls._cache.get(key)
+            if cached is not None:
+                cls._cache.move_to_end(key)
+                return copy.deepcopy(cached)
+
+        suggestions = {str(header): index.lookup(header, limit) for header in headers}
+
+        # Greedy one-to-one assignment, strongest matches first
+        candidates = sorted(
+            ((suggestion['score'], header, suggestion['field'])
+             for header, ranked in suggestions.items()
+             for suggestion in ranked),
+            key=lambda candidate: (-candidate[0], candidate[1], candidate[2])
+        )
+        suggested_mappings: Dict[str, str] = {}
+        assigned_fields = set()
+        for _, header, field in candidates:
+            if header in suggested_mappings or field in assigned_fields:
+                continue
+            suggested_mappings[header] = field
+            assigned_fields.add(field)
+
+        result = {'suggestions': suggestions, 'suggested_mappings': suggested_mappings}
+        with cls._lock:
+            cls._cache[key] = result
+            cls._cache.move_to_end(key)
+            while len(cls._cache) > CACHE_SIZE:
+                cls._cache.popitem(last=False)
+        return copy.deepcopy(result)
+
+    @classmethod
+    def clear(cls) -> None:
+        """Drop the alias index and all cached suggestions."""
+        with cls._lock:
+            cls._index = None
+            cls._index_version = None
+            cls._cache.clear()
@@ -0,0 +1,149 @@
+"""
+Mapping curves from performance measures to payout multipliers.
+
+A scenario can define curves such as alpha -> investment score multiplier or
+qualitative score -> qualitative multiplier (PRD FR3.2/FR3.3). A curve definition
+names the input it reads and lists its breakpoints:
+
+    {"input": "alpha", "type": "linear", "points": [[0, 0], [2, 1], [5, 2]]}
+
+Linear curves interpolate between breakpoints; step curves take the value of the
+last breakpoint at or below the input. Both hold the first and last values
+outside the breakpoints. Curves are evaluated for whole employee arrays with
+numpy, and the breakpoint tables are built once per definition and cached by a
+hash of it.
+"""
+from __future__ import annotations
+
+import os
+import json
+import hashlib
+import math
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, Mapping, Optional
+
+from ..utils.lazy_import import lazy_import
+
+np = lazy_import("numpy")
+
+# Number of compiled curves kept per process
+CURVE_CACHE_SIZE = int(os.getenv("CURVE_CACHE_SIZE", "256"))
+
+CURVE_TYPES = ("linear", "step")
+
+
+class CurveError(ValueError):
+    """A curve definition that cannot be compiled, or inputs it cannot be evaluated with."""
+
+
+@dataclass(frozen=True, eq=False)
+class CompiledCurve:
+    """A curve's breakpoint table, sorted by input value."""
+    key: str
+    kind: str
+    input: str
+    xs: np.ndarray
+    ys: np.ndarray
+
+    def evaluate(self, values: Any) -> np.ndarray:
+        """
+        Map input values to multipliers.
+
+        Args:
+            values: An array of input values (or a single value)
+
+        Returns:
+            The multipliers, with the shape of ``values``; missing (NaN) inputs map to NaN
+        """
+        values = np.asarray(values, dtype=float)
+        if self.kind == "linear":
+            return np.interp(values, self.xs, self.ys)
+        positions = np.searchsorted(self.xs, values, side="right") - 1
+        result = self.ys[np.clip(positions, 0, len(self.ys) - 1)]
+        return np.where(np.isnan(values), np.nan, result)
+
+
+def compile_curve(definition: Mapping[str, Any]) -> CompiledCurve:
+    """
+    Build the breakpoint table for a curve, reusing the cached table for an identical definition.
+
+    Args:
+        definition: {"input": name, "type": "linear" or "step", "points": [[x, y], ...]}
+
+    Returns:
+        The compiled curve
+
+    Raises:
+        CurveError: If the definition is malformed
+    """
+    if not isinstance(definition, Mapping):
+        raise CurveError("A curve must be an object")
+    canonical = json.dumps(definition, sort_keys=True, default=str)
+    return _compile(hashlib.sha256(canonical.encode("utf-8")).hexdigest(), canonical)
+
+
+def evaluate_curves(
+    definitions: Optional[Mapping[str, Mapping[str, Any]]],
+    inputs: Mapping[str, Any]
+) -> Dict[str, np.ndarray]:
+    """
+    Evaluate named curves over the inputs they read.
+
+    Args:
+        definitions: Curve definitions by the name of the value they produce, for
+            example {"investment_score_multiplier": {"input": "alpha", ...}}
+        inputs: Arrays or scalars, including every input the curves read
+
+    Returns:
+        The value of each curve, by name
+
+    Raises:
+        CurveError: If a definition is malformed or an input is missing
+    """
+    if not definitions:
+        return {}
+    if not isinstance(definitions, Mapping):
+        raise CurveError("Curves must be an object mapping names to curve definitions")
+
+    results = {}
+    for name, definition in definitions.items():
+        curve = compile_curve(definition)
+        if curve.input not in inputs:
+            raise CurveError(f"Curve '{name}' reads missing input '{curve.input}'")
+        results[name] = curve.evaluate(inputs[curve.input])
+    return results
+
+
+def clear_curve_cache() -> None:
+    """Drop every compiled curve."""
+    _compile.cache_clear()
+
+
+@lru_cache(maxsize=CURVE_CACHE_SIZE)
+def _compile(key: str, canonical: str) -> CompiledCurve:
+    definition = json.loads(canonical)
+    kind = definition.get("type", "linear")
+    if kind not in CURVE_TYPES:
+        raise CurveError(f"Curve type must be one of {', '.join(CURVE_TYPES)}, not '{kind}'")
+    source = definition.get("input")
+    if not isinstance(source, str) or not source:
+        raise CurveError('A curve must name its "input"')
+
+    points = definition.get("points")
+    if not isinstance(points, list) or not points:
+        raise CurveError('A curve needs a non-empty list of "points"')
+    try:
+        pairs = sorted((float(x), float(y)) for x, y in points)
+    except (TypeError, ValueError) as e:
+        raise CurveError("Curve points must be [input, multiplier] pairs of numbers") from e
+    if not all(math.isfinite(value) for pair in pairs for value in pair):
+        raise CurveError("Curve points must be finite numbers")
+    if any(left[0] == right[0] for left, right in zip(pairs, pairs[1:])):
+        raise CurveError("Curve points must have distinct input values")
+
+    xs, ys = np.array([x for x, _ in pairs]), np.array([y for _, y in pairs])
+    # The tables are shared by every evaluation of this definition
+    xs.flags.writeable = False
+    ys.flags.writeable = False
+    return CompiledCurve(key=key, kind=kind, input=source, xs=xs, ys=ys)
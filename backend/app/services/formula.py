@@ -0,0 +1,348 @@
+"""
+Bonus formulas as step graphs compiled into vectorized evaluation plans.
+
+A formula definition is a JSON object mapping step names to expressions:
+
+    {"steps": {"pre_raf_bonus": "target_bonus * weighted_performance", ...}}
+
+Expressions use arithmetic, comparisons, ``and``/``or``/``not``,
+``a if condition else b`` and the functions in FUNCTIONS. A name refers either
+to another step or to an input (an employee column or a scenario parameter).
+A scenario's steps are layered over a base formula, so it can replace a single
+step or add new ones. When a formula is compiled its steps are ordered by their
+dependencies and translated into two Python functions: one evaluates every
+step over whole employee arrays with numpy, the other over plain numbers for a
+single employee (the calculator). Compiled plans are cached by a hash of the
+definition, so a scenario's formula is compiled once per process however often
+it is evaluated.
+"""
+from __future__ import annotations
+
+import os
+import ast
+import json
+import math
+import hashlib
+import keyword
+from dataclasses import dataclass
+from functools import lru_cache, reduce
+from graphlib import CycleError, TopologicalSorter
+from typing import Any, Callable, Dict, FrozenSet, Mapping, Optional, Tuple
+
+from ..utils.lazy_import import lazy_import
+
+np = lazy_import("numpy")
+
+# Number of compiled formulas kept per process
+FORMULA_CACHE_SIZE = int(os.getenv("FORMULA_CACHE_SIZE", "256"))
+
+# The chain behind calculation_engine.calculate_bonus: target bonus, weighted
+# performance, RAF, then the 3x base salary and MRT caps
+CALCULATOR_FORMULA: Dict[str, Any] = {
+    "steps": {
+        "target_bonus": "base_salary * (target_bonus_pct / 100)",
+        "total_weight": "investment_weight + qualitative_weight",
+        "normalized_investment_weight": "0.5 if total_weight == 0 else investment_weight / total_weight",
+        "normalized_qualitative_weight": "0.5 if total_weight == 0 else qualitative_weight / total_weight",
+        "investment_component": "normalized_investment_weight * investment_score_multiplier",
+        "qualitative_component": "normalized_qualitative_weight * qual_score_multiplier",
+        "weighted_performance": "investment_component + qualitative_component",
+        "pre_raf_bonus": "target_bonus * weighted_performance",
+        "final_bonus": "pre_raf_bonus * raf",
+        "base_salary_cap": "base_salary * 3",
+        "mrt_cap": "base_salary * (mrt_cap_pct / 100)",
+        "capped_bonus": "min(final_bonus, base_salary_cap, mrt_cap if is_mrt else final_bonus)",
+        "policy_breach": "final_bonus > base_salary_cap",
+        "bonus_to_salary_ratio": "capped_bonus / base_salary if base_salary > 0 else 0",
+    }
+}
+
+# The chain behind ScenarioPlaygroundDAL.calculate_scenario: investment and
+# qualitative components from the scenario's maximum qualitative score, one
+# scenario-wide RAF, an optional cap as a multiple of salary and a floor at zero
+SCENARIO_FORMULA: Dict[str, Any] = {
+    "steps": {
+        "inv_component": "base_salary * target_bonus_pct * investment_weight",
+        "qual_component": (
+            "base_salary * target_bonus_pct * (1 - investment_weight) * (qualitative_score / max_qualitative_score)"
+        ),
+        "pre_raf_bonus": "inv_component + qual_component",
+        "raf_bonus": "pre_raf_bonus * raf",
+        "cap_amount": "base_salary * cap_percentage_of_salary if base_salary > 0 else inf",
+        "is_capped": "raf_bonus > cap_amount",
+        "capped_bonus": "min(raf_bonus, cap_amount)",
+        "policy_breach": "capped_bonus < 0",
+        "final_bonus": "max(capped_bonus, 0)",
+    }
+}
+
+# Functions available in expressions, with their array and single-value implementations
+FUNCTIONS: Dict[str, Tuple[Callable[..., Any], Callable[..., Any]]] = {
+    "abs": (lambda x: np.abs(x), abs),
+    "min": (lambda *args: reduce(np.minimum, args), min),
+    "max": (lambda *args: reduce(np.maximum, args), max),
+    "clip": (lambda x, lower, upper: np.clip(x, lower, upper), lambda x, lower, upper: max(lower, min(upper, x))),
+    "where": (lambda test, x, y: np.where(test, x, y), lambda test, x, y: x if test else y),
+    "log10": (lambda x: np.log10(x), math.log10),
+    "sqrt": (lambda x: np.sqrt(x), math.sqrt),
+    "exp": (lambda x: np.exp(x), math.exp),
+}
+
+# Names that are constants in every formula
+CONSTANTS: Dict[str, float] = {"inf": float("inf")}
+
+_BINARY_OPERATORS = {
+    ast.Add: "+",
+    ast.Sub: "-",
+    ast.Mult: "*",
+    ast.Div: "/",
+    ast.Pow: "**",
+    ast.Mod: "%",
+}
+
+_COMPARISONS = {
+    ast.Eq: "==",
+    ast.NotEq: "!=",
+    ast.Lt: "<",
+    ast.LtE: "<=",
+    ast.Gt: ">",
+    ast.GtE: ">=",
+}
+
+# Helpers the generated array code calls for the operators that numpy arrays do
+# not support directly (and, or, not, chained comparisons, conditionals)
+_ARRAY_HELPERS: Dict[str, Callable[..., Any]] = {
+    "__and": lambda *args: reduce(np.logical_and, args),
+    "__or": lambda *args: reduce(np.logical_or, args),
+    "__not": lambda x: np.logical_not(x),
+    "__where": lambda test, x, y: np.where(test, x, y),
+}
+
+Plan = Callable[[Mapping[str, Any]], Dict[str, Any]]
+
+
+class FormulaError(ValueError):
+    """A formula definition that cannot be compiled, or inputs it cannot be evaluated with."""
+
+
+@dataclass(frozen=True)
+class CompiledFormula:
+    """An evaluation plan: the formula's steps in dependency order, compiled for arrays and for single values."""
+    key: str
+    outputs: Tuple[str, ...]
+    inputs: FrozenSet[str]
+    array_plan: Plan
+    scalar_plan: Plan
+
+    def evaluate(self, inputs: Mapping[str, Any]) -> Dict[str, Any]:
+        """
+        Evaluate every step over arrays of employees.
+
+        Args:
+            inputs: Arrays (one value per employee) or scalars for every input the
+                formula reads; scalars apply to all employees
+
+        Returns:
+            An array per step, all with the shape of the inputs broadcast together
+
+        Raises:
+            FormulaError: If an input is missing or a result is out of range
+        """
+        self._check_inputs(inputs)
+        arrays = {name: np.asarray(inputs[name]) for name in self.inputs}
+        shape = np.broadcast_shapes(*(array.shape for array in arrays.values()))
+
+        # Both branches of a conditional are computed for every employee, so the
+        # branch that is not taken may divide by zero; its result is discarded
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            results = self._run(self.array_plan, arrays)
+        return {name: np.broadcast_to(value, shape) for name, value in results.items()}
+
+    def evaluate_scalar(self, inputs: Mapping[str, Any]) -> Dict[str, Any]:
+        """
+        Evaluate every step for a single employee.
+
+        Args:
+            inputs: A number for every input the formula reads
+
+        Returns:
+            The value of each step
+
+        Raises:
+            FormulaError: If an input is missing, a result is out of range or a step
+                cannot be evaluated (division by zero, a math domain error)
+        """
+        self._check_inputs(inputs)
+        return self._run(self.scalar_plan, inputs)
+
+    @staticmethod
+    def _run(plan: Plan, inputs: Mapping[str, Any]) -> Dict[str, Any]:
+        try:
+            return plan(inputs)
+        except OverflowError as e:
+            raise FormulaError(f"Formula result is out of range: {e}") from e
+        except (ArithmeticError, ValueError) as e:
+            # The scalar plan raises where numpy would return inf or nan, e.g. on
+            # division by zero or the square root of a negative number
+            raise FormulaError(f"Formula cannot be evaluated: {e}") from e
+
+    def _check_inputs(self, inputs: Mapping[str, Any]) -> None:
+        missing = self.inputs - inputs.keys()
+        if missing:
+            raise FormulaError(f"Formula inputs missing: {', '.join(sorted(missing))}")
+
+
+def compile_formula(
+    definition: Optional[Mapping[str, Any]] = None,
+    base: Optional[Mapping[str, Any]] = None
+) -> CompiledFormula:
+    """
+    Compile a formula definition, reusing the cached plan for an identical definition.
+
+    Args:
+        definition: A formula definition ({"steps": {name: expression}}), or None
+            for the base formula alone
+        base: The formula whose steps the definition is layered over
+
+    Returns:
+        The compiled formula
+
+    Raises:
+        FormulaError: If the definition is malformed, an expression is invalid or
+            the steps depend on each other in a cycle
+    """
+    steps: Dict[str, str] = {}
+    for source in (base, definition):
+        if source is None:
+            continue
+        if not isinstance(source, Mapping) or not isinstance(source.get("steps"), Mapping):
+            raise FormulaError('A formula must be an object with a "steps" object')
+        for name, expression in source["steps"].items():
+            if isinstance(expression, bool) or not isinstance(expression, (str, int, float)):
+                raise FormulaError(f"Step '{name}' must be an expression string or a number")
+            steps[str(name)] = str(expression)
+
+    canonical = json.dumps(steps, sort_keys=True)
+    return _compile(hashlib.sha256(canonical.encode("utf-8")).hexdigest(), canonical)
+
+
+def clear_formula_cache() -> None:
+    """Drop every compiled formula."""
+    _compile.cache_clear()
+
+
+@lru_cache(maxsize=FORMULA_CACHE_SIZE)
+def _compile(key: str, canonical: str) -> CompiledFormula:
+    steps: Dict[str, str] = json.loads(canonical)
+    trees: Dict[str, ast.AST] = {}
+    dependencies: Dict[str, set] = {}
+    for name, expression in steps.items():
+        if not _is_valid_name(name) or name in FUNCTIONS or name in CONSTANTS:
+            raise FormulaError(f"'{name}' cannot be used as a step name")
+        try:
+            trees[name] = ast.parse(expression.strip(), mode="eval").body
+        except SyntaxError as e:
+            raise FormulaError(f"Step '{name}' is not a valid expression: {e.msg}") from e
+        dependencies[name] = set()
+        # Translate once here to reject unsupported syntax before ordering the steps
+        _translate(name, trees[name], dependencies[name], vectorized=True)
+
+    try:
+        order = tuple(TopologicalSorter(
+            {name: names & steps.keys() for name, names in dependencies.items()}
+        ).static_order())
+    except CycleError as e:
+        raise FormulaError(f"Formula steps depend on each other in a cycle: {' -> '.join(e.args[1])}") from e
+
+    inputs = frozenset().union(*dependencies.values()) - steps.keys() - CONSTANTS.keys()
+    return CompiledFormula(
+        key=key,
+        outputs=order,
+        inputs=inputs,
+        array_plan=_build_plan(order, trees, inputs, vectorized=True),
+        scalar_plan=_build_plan(order, trees, inputs, vectorized=False)
+    )
+
+
+def _build_plan(order: Tuple[str, ...], trees: Dict[str, ast.AST], inputs: FrozenSet[str], vectorized: bool) -> Plan:
+    """Generate and compile one Python function that evaluates every step in ``order``."""
+    lines = ["def plan(__inputs):"]
+    lines += [f"    {name} = __inputs[{name!r}]" for name in sorted(inputs)]
+    lines += [f"    {name} = {_translate(name, trees[name], set(), vectorized)}" for name in order]
+    lines.append("    return {" + ", ".join(f"{name!r}: {name}" for name in order) + "}")
+
+    namespace: Dict[str, Any] = dict(CONSTANTS)
+    namespace.update((f"__{name}", functions[0 if vectorized else 1]) for name, functions in FUNCTIONS.items())
+    if vectorized:
+        namespace.update(_ARRAY_HELPERS)
+    # The source is generated from a whitelisted syntax tree (see _translate), never from user text
+    exec(compile("\n".join(lines), "<formula>", "exec"), namespace)
+    return namespace["plan"]
+
+
+def _is_valid_name(name: str) -> bool:
+    # Names starting with an underscore are reserved for the generated code
+    return name.isidentifier() and not keyword.iskeyword(name) and not name.startswith("_")
+
+
+def _translate(step: str, node: ast.AST, names: set, vectorized: bool) -> str:
+    """Python source for an expression node, adding the names it reads to ``names``."""
+    def translate(child: ast.AST) -> str:
+        return _translate(step, child, names, vectorized)
+
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)) and not isinstance(node.value, bool):
+        # Numbers are floats so that ** cannot run unbounded integer arithmetic
+        try:
+            value = float(node.value)
+        except OverflowError:
+            value = math.inf
+        if not math.isfinite(value):
+            raise FormulaError(f"Step '{step}' uses a number that is too large: {ast.unparse(node)}")
+        return repr(value)
+
+    if isinstance(node, ast.Name):
+        if not _is_valid_name(node.id):
+            raise FormulaError(f"Step '{step}' uses the reserved name '{node.id}'")
+        names.add(node.id)
+        return node.id
+
+    if isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPERATORS:
+        return f"({translate(node.left)} {_BINARY_OPERATORS[type(node.op)]} {translate(node.right)})"
+
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+        return f"({'-' if isinstance(node.op, ast.USub) else '+'}{translate(node.operand)})"
+
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+        return f"__not({translate(node.operand)})" if vectorized else f"(not {translate(node.operand)})"
+
+    if isinstance(node, ast.BoolOp):
+        values = [translate(value) for value in node.values]
+        if vectorized:
+            return f"__{'and' if isinstance(node.op, ast.And) else 'or'}({', '.join(values)})"
+        return "(" + (" and " if isinstance(node.op, ast.And) else " or ").join(values) + ")"
+
+    if isinstance(node, ast.Compare) and all(type(op) in _COMPARISONS for op in node.ops):
+        operands = [translate(operand) for operand in [node.left, *node.comparators]]
+        operators = [_COMPARISONS[type(op)] for op in node.ops]
+        if not vectorized:
+            return "(" + operands[0] + "".join(
+                f" {operator} {operand}" for operator, operand in zip(operators, operands[1:])
+            ) + ")"
+        # Arrays cannot chain comparisons: a < b < c becomes (a < b) and (b < c)
+        comparisons = [
+            f"({left} {operator} {right})" for operator, left, right in zip(operators, operands, operands[1:])
+        ]
+        return comparisons[0] if len(comparisons) == 1 else f"__and({', '.join(comparisons)})"
+
+    if isinstance(node, ast.IfExp):
+        test, body, orelse = translate(node.test), translate(node.body), translate(node.orelse)
+        return f"__where({test}, {body}, {orelse})" if vectorized else f"({body} if {test} else {orelse})"
+
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and not node.keywords:
+        if node.func.id not in FUNCTIONS:
+            raise FormulaError(f"Step '{step}' calls unknown function '{node.func.id}'")
+        if not node.args or any(isinstance(arg, ast.Starred) for arg in node.args):
+            raise FormulaError(f"Step '{step}' must pass arguments to '{node.func.id}'")
+        return f"__{node.func.id}({', '.join(translate(arg) for arg in node.args)})"
+
+    raise FormulaError(f"Step '{step}' uses an unsupported expression: {ast.unparse(node)}")
@@ -0,0 +1,182 @@
+"""
+Validation of large uploads in row chunks across worker processes.
+
+The columns to validate are written once to shared memory as an Arrow IPC file.
+Each worker maps that file, validates its own slice of rows with the
+FileProcessor validators and returns the errors with row numbers counted from
+the start of the whole file, so the merged result is the same as validating the
+file in one piece. Frames that Arrow cannot represent (for example a column
+mixing numbers and text) are sent to the workers as pickled chunks instead.
+"""
+from __future__ import annotations
+
+import os
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple, Union
+
+from ..utils.lazy_import import lazy_import
+
+pd = lazy_import("pandas")
+
+logger = logging.getLogger(__name__)
+
+# Worker processes for parallel validation; 1 or less validates in the calling thread
+VALIDATION_WORKERS = int(os.getenv("UPLOAD_VALIDATION_WORKERS", str(os.cpu_count() or 1)))
+
+# Uploads with at least this many rows are validated in parallel
+PARALLEL_VALIDATION_MIN_ROWS = int(os.getenv("UPLOAD_PARALLEL_VALIDATION_MIN_ROWS", "100000"))
+
+# Rows validated by one worker task
+VALIDATION_CHUNK_ROWS = int(os.getenv("UPLOAD_VALIDATION_CHUNK_ROWS", "25000"))
+
+RowErrors = Dict[str, List[int]]
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def should_validate_in_parallel(rows: int) -> bool:
+    """Whether an upload of ``rows`` rows is validated across worker processes."""
+    return VALIDATION_WORKERS > 1 and rows >= PARALLEL_VALIDATION_MIN_ROWS
+
+
+def get_pool() -> ProcessPoolExecutor:
+    """The process pool shared by all validations, started on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Forking a server process that runs threads is unsafe, so workers are spawned
+            _pool = ProcessPoolExecutor(
+                max_workers=max(1, VALIDATION_WORKERS),
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _pool
+
+
+def shutdown_pool() -> None:
+    """Stop the worker processes; the next parallel validation starts new ones."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=True)
+
+
+def validate_in_chunks(df: pd.DataFrame, chunk_rows: int = VALIDATION_CHUNK_ROWS) -> Tuple[RowErrors, RowErrors]:
+    """
+    Check the types and ranges of a DataFrame in parallel row chunks.
+
+    Args:
+        df: The DataFrame to validate, with lower-case column names
+        chunk_rows: Rows validated by one worker task
+
+    Returns:
+        The type errors and range errors, in the form returned by
+        FileProcessor.validate_data_types and validate_data_ranges
+    """
+    from .file_processor import FileProcessor
+
+    offsets = range(0, len(df), max(1, chunk_rows))
+    shared = _share_frame(df)
+    try:
+        pool = get_pool()
+        if shared is not None:
+            futures = [
+                pool.submit(_validate_rows, shared.name, offset, chunk_rows) for offset in offsets
+            ]
+        else:
+            futures = [
+                pool.submit(_validate_rows, df.iloc[offset:offset + chunk_rows], offset, chunk_rows)
+                for offset in offsets
+            ]
+        results = [future.result() for future in futures]
+    except BrokenProcessPool:
+        logger.warning("Validation worker pool failed; validating in the calling process", exc_info=True)
+        shutdown_pool()
+        _, type_errors = FileProcessor.validate_data_types(df)
+        _, range_errors = FileProcessor.validate_data_ranges(df)
+        return type_errors, range_errors
+    finally:
+        if shared is not None:
+            shared.close()
+            shared.unlink()
+
+    type_errors: RowErrors = {}
+    range_errors: RowErrors = {}
+    for chunk_type_errors, chunk_range_errors in results:
+        for merged, errors in ((type_errors, chunk_type_errors), (range_errors, chunk_range_errors)):
+            for key, rows in errors.items():
+                merged.setdefault(key, []).extend(rows)
+    return type_errors, range_errors
+
+
+def _share_frame(df: pd.DataFrame) -> Optional[shared_memory.SharedMemory]:
+    """Write ``df`` to a new shared memory block as an Arrow IPC file, or return None if Arrow cannot hold it."""
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        table = pyarrow.Table.from_pandas(df, preserve_index=False)
+    except Exception:
+        return None
+
+    sink = pyarrow.BufferOutputStream()
+    with pyarrow.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    buffer = sink.getvalue()
+    shared = shared_memory.SharedMemory(create=True, size=max(1, buffer.size))
+    shared.buf[:buffer.size] = memoryview(buffer).cast("B")
+    return shared
+
+
+def _validate_rows(
+    source: Union[str, pd.DataFrame],
+    offset: int,
+    length: int
+) -> Tuple[RowErrors, RowErrors]:
+    """
+    Worker task: validate ``length`` rows starting at ``offset``.
+
+    Args:
+        source: The name of the shared memory block written by _share_frame, or the
+            rows themselves
+        offset: Position of the first row in the whole file
+        length: Number of rows
+
+    Returns:
+        Type and range errors with row numbers counted from the start of the file
+    """
+    if isinstance(source, str):
+        shared = shared_memory.SharedMemory(name=source)
+        try:
+            type_errors, range_errors = _validate_shared_rows(shared.buf, offset, length)
+        finally:
+            shared.close()
+    else:
+        type_errors, range_errors = _validate_frame(source)
+    return _shift_rows(type_errors, offset), _shift_rows(range_errors, offset)
+
+
+def _validate_shared_rows(buf: memoryview, offset: int, length: int) -> Tuple[RowErrors, RowErrors]:
+    # The table and the frame read from it are views on ``buf``; they are released
+    # when this returns, which lets the caller close the shared block
+    import pyarrow
+    import pyarrow.ipc
+    table = pyarrow.ipc.open_file(pyarrow.py_buffer(buf)).read_all()
+    return _validate_frame(table.slice(offset, length).to_pandas())
+
+
+def _validate_frame(chunk: pd.DataFrame) -> Tuple[RowErrors, RowErrors]:
+    from .file_processor import FileProcessor
+
+    _, type_errors = FileProcessor.validate_data_types(chunk)
+    _, range_errors = FileProcessor.validate_data_ranges(chunk)
+    return type_errors, range_errors
+
+
+def _shift_rows(errors: RowErrors, offset: int) -> RowErrors:
+    return {key: [row + offset for row in rows] for key, rows in errors.items()}
@@ -0,0 +1,152 @@
+"""
+Background scheduler for the data retention cleanup job.
+
+Every worker process starts a scheduler, but each run first acquires a lease row
+in the database, so only one worker performs the cleanup at a time. The lease is
+renewed on every run and lasts slightly longer than the run interval; if the
+holding worker dies, another worker takes over once the lease has expired.
+"""
+import os
+import uuid
+import socket
+import logging
+import datetime
+import threading
+from typing import Any, Callable, Dict, Optional
+
+from apscheduler.schedulers.background import BackgroundScheduler
+
+from app.db import SessionLocal, session_scope
+from app.db.crud import SchedulerLeaseDAL
+from app.db.retention import cleanup_expired_data
+
+logger = logging.getLogger(__name__)
+
+# How often the cleanup job runs, in seconds
+RETENTION_INTERVAL_SECONDS = int(os.getenv("RETENTION_INTERVAL_SECONDS", "3600"))
+
+# Set to "false" to disable the scheduler in this process (e.g. for API-only replicas)
+RETENTION_SCHEDULER_ENABLED = os.getenv("RETENTION_SCHEDULER_ENABLED", "true").lower() == "true"
+
+
+class RetentionScheduler:
+    """Runs cleanup_expired_data periodically behind a single-runner database lease."""
+
+    JOB_ID = "cleanup_expired_data"
+    LEASE_NAME = "retention_cleanup"
+
+    def __init__(
+        self,
+        session_factory: Callable = SessionLocal,
+        interval_seconds: int = RETENTION_INTERVAL_SECONDS,
+        holder_id: Optional[str] = None
+    ):
+        self.session_factory = session_factory
+        self.interval_seconds = interval_seconds
+        # Grace period so a slow run does not let the lease lapse before the next tick
+        self.lease_ttl_seconds = interval_seconds * 1.5
+        self.holder_id = holder_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.last_run: Optional[Dict[str, Any]] = None
+        self._scheduler: Optional[BackgroundScheduler] = None
+        self._run_lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        """Whether the background scheduler is running in this process."""
+        return self._scheduler is not None and self._scheduler.running
+
+    def start(self) -> None:
+        """Start the background scheduler."""
+        if self.running:
+            return
+
+        self._scheduler = BackgroundScheduler()
+        self._scheduler.add_job(
+            func=self.run_once,
+            trigger="interval",
+            seconds=self.interval_seconds,
+            id=self.JOB_ID,
+            name="Clean up expired sessions and temporary batch data",
+            replace_existing=True,
+            max_instances=1,
+            coalesce=True
+        )
+        self._scheduler.start()
+        logger.info(f"Started retention scheduler as {self.holder_id} (every {self.interval_seconds}s)")
+
+    def shutdown(self) -> None:
+        """Stop the scheduler and hand the lease back so another worker can take over."""
+        if self._scheduler is not None:
+            self._scheduler.shutdown(wait=False)
+            self._scheduler = None
+
+        try:
+            with session_scope(self.session_factory) as db:
+                SchedulerLeaseDAL.release_lease(db, self.LEASE_NAME, self.holder_id)
+        except Exception as e:
+            logger.warning(f"Could not release retention lease: {e}")
+        logger.info("Stopped retention scheduler")
+
+    def run_once(self) -> Dict[str, Any]:
+        """
+        Run the cleanup if this worker holds (or can acquire) the lease.
+
+        Returns:
+            Dictionary describing the run, also stored as ``last_run``
+        """
+        if not self._run_lock.acquire(blocking=False):
+            return self._record("skipped", reason="A cleanup is already running in this process")
+
+        started_at = datetime.datetime.utcnow()
+        try:
+            with session_scope(self.session_factory) as db:
+                if not SchedulerLeaseDAL.acquire_lease(
+                    db, self.LEASE_NAME, self.holder_id, self.lease_ttl_seconds
+                ):
+                    return self._record("skipped", started_at, reason="Lease held by another worker")
+
+                result = cleanup_expired_data(db)
+            return self._record("completed", started_at, result=result)
+        except Exception as e:
+            logger.error(f"Scheduled retention cleanup failed: {e}", exc_info=True)
+            return self._record("failed", started_at, reason=str(e))
+        finally:
+            self._run_lock.release()
+
+    def status(self) -> Dict[str, Any]:
+        """Return scheduler state and statistics for the most recent run."""
+        next_run_at = None
+        if self.running:
+            job = self._scheduler.get_job(self.JOB_ID)
+            if job and job.next_run_time:
+                next_run_at = job.next_run_time.isoformat()
+
+        return {
+            "running": self.running,
+            "holder_id": self.holder_id,
+            "interval_seconds": self.interval_seconds,
+            "next_run_at": next_run_at,
+            "last_run": self.last_run
+        }
+
+    def _record(
+        self,
+        status: str,
+        started_at: Optional[datetime.datetime] = None,
+        result: Optional[Dict[str, Any]] = None,
+        reason: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Store the outcome of a run as ``last_run`` and return it."""
+        finished_at = datetime.datetime.utcnow()
+        run = {
+            "status": status,
+            "started_at": (started_at or finished_at).isoformat(),
+            "finished_at": finished_at.isoformat(),
+            "result": result,
+            "reason": reason
+        }
+        self.last_run = run
+        return run
+
+
+retention_scheduler = RetentionScheduler()
@@ -0,0 +1,158 @@
+"""
+Bounded worker pool for the CPU-heavy stages of request handling.
+
+Parsing, mapping and validating an upload with pandas can take seconds. These
+stages run on a small shared thread pool rather than on whichever thread
+handles the request, so at most CPU_WORKERS of them run at once however many
+uploads arrive together; the rest wait up to CPU_QUEUE_TIMEOUT_S for a slot.
+Threads rather than processes are used because the stages return large
+DataFrames, which would otherwise be pickled back to the caller, and the heavy
+parts (Arrow and numpy kernels, the CSV parser) release the GIL. Workers never
+touch the database session: callers load what a stage needs (such as its
+import template) beforehand and store its results afterwards on their own
+thread. Validation of very large files is spread across processes separately
+(see parallel_validation).
+
+``run_in_worker`` waits for the result from a sync route's thread;
+``run_in_worker_async`` awaits it from a coroutine without blocking the event
+loop. Both give up after CPU_TASK_TIMEOUT_S. A thread cannot be interrupted, so
+a task that times out keeps its slot until it actually finishes.
+"""
+import os
+import asyncio
+import logging
+import threading
+import contextvars
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+# CPU-heavy stages (parsing, mapping, validation) running at once
+CPU_WORKERS = int(os.getenv("CPU_WORKERS", "2"))
+
+# Seconds a stage may wait for a free worker before the request is turned away
+CPU_QUEUE_TIMEOUT_S = float(os.getenv("CPU_QUEUE_TIMEOUT_S", "30"))
+
+# Seconds a caller waits for a stage to finish; 0 or less waits indefinitely
+CPU_TASK_TIMEOUT_S = float(os.getenv("CPU_TASK_TIMEOUT_S", "300"))
+
+T = TypeVar("T")
+
+_pool: Optional[ThreadPoolExecutor] = None
+_slots = threading.BoundedSemaphore(max(1, CPU_WORKERS))
+_pool_lock = threading.Lock()
+
+
+class WorkerPoolBusyError(RuntimeError):
+    """Raised when no worker became free within CPU_QUEUE_TIMEOUT_S."""
+
+
+class WorkerTimeoutError(TimeoutError):
+    """Raised when a stage did not finish within CPU_TASK_TIMEOUT_S."""
+
+
+def get_pool() -> ThreadPoolExecutor:
+    """The thread pool shared by all CPU-heavy stages, started on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=max(1, CPU_WORKERS), thread_name_prefix="cpu-worker")
+        return _pool
+
+
+def shutdown_pool() -> None:
+    """Stop the worker threads once their tasks finish; the next stage starts new ones."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=True)
+
+
+def submit(func: Callable[..., T], *args: Any, **kwargs: Any) -> "Future[T]":
+    """
+    Start ``func(*args, **kwargs)`` on a worker once one is free.
+
+    The call runs in a copy of the caller's context, so timed() stages are
+    recorded against the calling request.
+
+    Raises:
+        WorkerPoolBusyError: If no worker became free within CPU_QUEUE_TIMEOUT_S
+    """
+    if not _slots.acquire(timeout=CPU_QUEUE_TIMEOUT_S):
+        raise WorkerPoolBusyError(
+            f"All {CPU_WORKERS} workers stayed busy for {CPU_QUEUE_TIMEOUT_S:g} seconds. Please try again shortly."
+        )
+    return _start(func, *args, **kwargs)
+
+
+def try_submit(func: Callable[..., T], *args: Any, **kwargs: Any) -> "Optional[Future[T]]":
+    """Start ``func(*args, **kwargs)`` on a worker like submit(), or return None at once if none is free."""
+    if not _slots.acquire(blocking=False):
+        return None
+    return _start(func, *args, **kwargs)
+
+
+def wait_for_result(future: "Future[T]", func: Callable[..., Any]) -> T:
+    """
+    Wait for the result of a call to ``func`` started with submit() or try_submit().
+
+    Raises:
+        WorkerTimeoutError: If the call did not finish within CPU_TASK_TIMEOUT_S
+    """
+    try:
+        return future.result(timeout=_task_timeout())
+    except FutureTimeoutError:
+        raise _timeout_error(func) from None
+
+
+def run_in_worker(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Run ``func(*args, **kwargs)`` on a worker and wait for its result.
+
+    Raises:
+        WorkerPoolBusyError: If no worker became free within CPU_QUEUE_TIMEOUT_S
+        WorkerTimeoutError: If the call did not finish within CPU_TASK_TIMEOUT_S
+    """
+    return wait_for_result(submit(func, *args, **kwargs), func)
+
+
+async def run_in_worker_async(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Run ``func(*args, **kwargs)`` on a worker and await its result without blocking the event loop.
+
+    Raises:
+        WorkerPoolBusyError: If no worker became free within CPU_QUEUE_TIMEOUT_S
+        WorkerTimeoutError: If the call did not finish within CPU_TASK_TIMEOUT_S
+    """
+    loop = asyncio.get_running_loop()
+    # Waiting for a free slot blocks, so it happens off the loop too
+    future = await loop.run_in_executor(None, lambda: submit(func, *args, **kwargs))
+    try:
+        return await asyncio.wait_for(asyncio.wrap_future(future), timeout=_task_timeout())
+    except asyncio.TimeoutError:
+        raise _timeout_error(func) from None
+
+
+def _start(func: Callable[..., T], *args: Any, **kwargs: Any) -> "Future[T]":
+    """Start a call on the pool once its slot has been acquired."""
+    try:
+        future = get_pool().submit(contextvars.copy_context().run, func, *args, **kwargs)
+    except BaseException:
+        _slots.release()
+        raise
+    # Released when the work ends (or is cancelled), not when a caller stops waiting for it
+    future.add_done_callback(lambda _: _slots.release())
+    return future
+
+
+def _task_timeout() -> Optional[float]:
+    return CPU_TASK_TIMEOUT_S if CPU_TASK_TIMEOUT_S > 0 else None
+
+
+def _timeout_error(func: Callable[..., Any]) -> WorkerTimeoutError:
+    name = getattr(func, "__qualname__", repr(func))
+    logger.warning(f"{name} did not finish within {CPU_TASK_TIMEOUT_S:g} seconds")
+    return WorkerTimeoutError(f"Processing did not finish within {CPU_TASK_TIMEOUT_S:g} seconds.")
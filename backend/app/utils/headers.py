@@ -0,0 +1,28 @@
+"""
+Normalization of column headers for matching them against known names.
+"""
+import re
+from typing import Any
+
+# Unit and filler words that carry no meaning for matching
+_NOISE_TOKENS = frozenset({'the', 'of', 'in', 'gbp', 'usd', 'eur'})
+_CAMEL_BOUNDARY = re.compile(r'(?<=[a-z0-9])(?=[A-Z])')
+_NON_ALNUM = re.compile(r'[^0-9a-z%]+')
+
+
+def normalize_header(header: Any) -> str:
+    """
+    Reduce a column header to a canonical key.
+
+    "Base Salary (GBP)", "base_salary", "BaseSalary" and "salary base" all
+    normalize to "base salary"; a "%" becomes the token "pct".
+
+    Args:
+        header: The column header as it appears in the file
+
+    Returns:
+        The space-separated, sorted tokens of the header
+    """
+    text = _CAMEL_BOUNDARY.sub(' ', str(header)).lower().replace('%', ' pct ')
+    tokens = [token for token in _NON_ALNUM.split(text) if token and token not in _NOISE_TOKENS]
+    return ' '.join(sorted(tokens))
@@ -0,0 +1,37 @@
+"""
+Deferred imports for heavy optional modules (pandas, openpyxl, ...).
+"""
+import importlib
+from types import ModuleType
+from typing import Any, Optional
+
+
+class LazyModule:
+    """
+    Stand-in for a module that is only imported on first attribute access.
+
+    Keeps heavy libraries out of application start-up; modules using it should
+    add ``from __future__ import annotations`` so that type hints such as
+    ``pd.DataFrame`` do not trigger the import.
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module: Optional[ModuleType] = None
+
+    def _load(self) -> ModuleType:
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._load(), attr)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module '{self._name}' ({state})>"
+
+
+def lazy_import(name: str) -> LazyModule:
+    """Return a LazyModule for ``name``."""
+    return LazyModule(name)
@@ -0,0 +1,308 @@
+"""
+Fast response path for bulk endpoints.
+
+Endpoints that return thousands of rows (employee calculation results, for
+example) skip FastAPI's per-object ``response_model`` handling: they read plain
+rows from Core queries, validate them against the response schema in one call
+through a compiled ``TypeAdapter`` and serialize the result with orjson through
+``FastJSONResponse``. The endpoints still declare their ``response_model`` for
+the OpenAPI schema; FastAPI does not re-validate a returned Response.
+
+``bulk_response`` also negotiates the format from the Accept header: an Arrow
+IPC stream (``application/vnd.apache.arrow.stream``, for notebooks reading the
+rows as columns without JSON parsing) or newline-delimited JSON streamed in
+chunks (``application/x-ndjson``) instead of a JSON array.
+
+Stored calculation results never change, so their endpoints send a strong
+``ETag`` (from the result's ID and row count/version) with an immutable
+``Cache-Control`` and answer a matching ``If-None-Match`` with 304 Not Modified
+before reading the rows.
+"""
+import os
+import json
+import hashlib
+import datetime
+import typing
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional, Type
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, TypeAdapter
+from typing_extensions import TypedDict
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+# Rows read back from our own tables can skip validation when set to "false"
+VALIDATE_BULK_RESPONSES = os.getenv("VALIDATE_BULK_RESPONSES", "true").lower() == "true"
+
+# Rows serialized per chunk of a streamed NDJSON response
+NDJSON_CHUNK_ROWS = int(os.getenv("NDJSON_CHUNK_ROWS", "1000"))
+
+JSON_MEDIA_TYPE = "application/json"
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# Formats a bulk endpoint can return, in order of preference when the client accepts several equally
+BULK_MEDIA_TYPES = (JSON_MEDIA_TYPE, ARROW_STREAM_MEDIA_TYPE, NDJSON_MEDIA_TYPE)
+
+# Cache-Control of responses that never change once stored, such as calculation results
+IMMUTABLE_CACHE_CONTROL = os.getenv("IMMUTABLE_CACHE_CONTROL", "private, max-age=31536000, immutable")
+
+# Content-codings CompressionMiddleware may apply; each compressed body gets its own ETag
+ETAG_CONTENT_CODINGS = ("gzip", "br")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response serialized with orjson (or the standard library when it is not installed).
+
+    Accepts datetimes, dates and numpy values as well as the usual JSON types.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return _dumps(content)
+
+
+def negotiate_media_type(accept: Optional[str]) -> str:
+    """
+    Choose the format of a bulk response from an Accept header.
+
+    Args:
+        accept: The Accept header, or None
+
+    Returns:
+        The accepted media type of BULK_MEDIA_TYPES with the highest quality; JSON
+        when there is no header or none of them is accepted
+    """
+    if not accept:
+        return JSON_MEDIA_TYPE
+    qualities: Dict[str, float] = {}
+    for item in accept.lower().split(","):
+        media_range, _, params = item.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[media_range.strip()] = quality
+
+    def quality_of(media_type: str) -> float:
+        # The most specific matching range decides
+        for media_range in (media_type, media_type.split("/")[0] + "/*", "*/*"):
+            if media_range in qualities:
+                return qualities[media_range]
+        return 0.0
+
+    best = max(BULK_MEDIA_TYPES, key=quality_of)
+    return best if quality_of(best) > 0 else JSON_MEDIA_TYPE
+
+
+def bulk_response(model: Type[BaseModel], rows: List[Dict[str, Any]], accept: Optional[str] = None) -> Response:
+    """
+    Respond with many rows of a schema in the format the client asked for.
+
+    Args:
+        model: The response schema of one row
+        rows: One dictionary per row, as read by a Core query
+        accept: The request's Accept header
+
+    Returns:
+        A JSON array, an Arrow IPC stream or a streamed NDJSON response
+
+    Raises:
+        HTTPException: 406 if Arrow is asked for and pyarrow is not installed
+    """
+    media_type = negotiate_media_type(accept)
+    rows = validate_rows(model, rows)
+    if media_type == ARROW_STREAM_MEDIA_TYPE:
+        return Response(content=arrow_stream(model, rows), media_type=ARROW_STREAM_MEDIA_TYPE)
+    if media_type == NDJSON_MEDIA_TYPE:
+        return StreamingResponse(ndjson_chunks(rows), media_type=NDJSON_MEDIA_TYPE)
+    return FastJSONResponse(content=rows)
+
+
+def ndjson_chunks(rows: List[Dict[str, Any]]) -> Iterator[bytes]:
+    """Serialize rows as newline-delimited JSON, NDJSON_CHUNK_ROWS rows per chunk."""
+    for start in range(0, len(rows), NDJSON_CHUNK_ROWS):
+        yield b"".join(_dumps(row) + b"\n" for row in rows[start:start + NDJSON_CHUNK_ROWS])
+
+
+def arrow_stream(model: Type[BaseModel], rows: List[Dict[str, Any]]) -> bytes:
+    """
+    Serialize rows as an Arrow IPC stream with one column per schema field.
+
+    Column types follow the schema (so an empty result still has them); values
+    without an Arrow equivalent, such as parameter override dictionaries, are
+    stored as JSON text.
+
+    Raises:
+        HTTPException: 406 if pyarrow is not installed
+    """
+    try:
+        import pyarrow
+        import pyarrow.ipc
+    except ImportError:
+        raise HTTPException(
+            status_code=406,
+            detail=f"{ARROW_STREAM_MEDIA_TYPE} responses require the optional 'pyarrow' package, which is not installed."
+        )
+
+    fields, columns = [], []
+    for name, field in model.model_fields.items():
+        arrow_type = _arrow_type(pyarrow, field.annotation)
+        values = [row.get(name) for row in rows]
+        if arrow_type == pyarrow.string() and _unwrap_optional(field.annotation) is not str:
+            values = [None if value is None else _dumps(value).decode("utf-8") for value in values]
+        fields.append(pyarrow.field(name, arrow_type))
+        columns.append(pyarrow.array(values, type=arrow_type))
+    table = pyarrow.Table.from_arrays(columns, schema=pyarrow.schema(fields))
+
+    sink = pyarrow.BufferOutputStream()
+    with pyarrow.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def make_etag(*parts: Any) -> str:
+    """
+    Build a strong ETag from the values identifying one representation of a resource.
+
+    Args:
+        parts: e.g. the resource kind and ID, its row count and version, and the media type
+
+    Returns:
+        A quoted ETag value
+    """
+    digest = hashlib.blake2b("\x1f".join(map(str, parts)).encode("utf-8"), digest_size=16).hexdigest()
+    return f'"{digest}"'
+
+
+def encoded_etag(etag: str, coding: str) -> str:
+    """
+    The ETag of a representation's body compressed with a content-coding.
+
+    RFC 9110 requires a different strong validator for each content-coding, so
+    the coding is added inside the quotes, e.g. ``"<tag>-gzip"``.
+
+    Args:
+        etag: The quoted ETag of the uncompressed body
+        coding: The content-coding, e.g. "gzip" or "br"
+
+    Returns:
+        The quoted ETag of the compressed body
+    """
+    return f'{etag[:-1]}-{coding}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Whether an If-None-Match header matches an ETag (with the weak comparison RFC 9110 asks for).
+
+    The ETags CompressionMiddleware gives compressed bodies of the same
+    representation (see ``encoded_etag``) match as well.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    etags = {etag, *(encoded_etag(etag, coding) for coding in ETAG_CONTENT_CODINGS)}
+    tags = (tag.strip() for tag in if_none_match.split(","))
+    return any((tag[2:] if tag.startswith("W/") else tag) in etags for tag in tags)
+
+
+def immutable_headers(etag: str, vary: Optional[str] = None) -> Dict[str, str]:
+    """Caching headers of a response that never changes once stored."""
+    headers = {"ETag": etag, "Cache-Control": IMMUTABLE_CACHE_CONTROL}
+    if vary:
+        headers["Vary"] = vary
+    return headers
+
+
+def not_modified(etag: str, vary: Optional[str] = None) -> Response:
+    """A 304 Not Modified response for a matching conditional GET."""
+    return Response(status_code=304, headers=immutable_headers(etag, vary))
+
+
+def validate_rows(model: Type[BaseModel], rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Validate rows against a response schema in one call.
+
+    The rows stay dictionaries, so they are ready for FastJSONResponse without
+    building a model instance per row. With VALIDATE_BULK_RESPONSES off the rows
+    are returned as they are.
+
+    Args:
+        model: The response schema of one row
+        rows: One dictionary per row with (at least) the schema's fields
+
+    Returns:
+        The validated rows, with only the schema's fields
+
+    Raises:
+        pydantic.ValidationError: If a row does not match the schema
+    """
+    if not VALIDATE_BULK_RESPONSES:
+        return rows
+    return row_adapter(model).validate_python(rows)
+
+
+@lru_cache(maxsize=None)
+def row_adapter(model: Type[BaseModel]) -> TypeAdapter:
+    """
+    Compile a validator for a list of rows with a (flat) schema's fields.
+
+    Args:
+        model: The response schema of one row
+
+    Returns:
+        A TypeAdapter for a list of TypedDicts mirroring the schema, built once per schema
+    """
+    row_type = TypedDict(
+        f"{model.__name__}Row",
+        {name: field.annotation for name, field in model.model_fields.items()}
+    )
+    return TypeAdapter(List[row_type])
+
+
+def _unwrap_optional(annotation: Any) -> Any:
+    args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+    if typing.get_origin(annotation) is typing.Union and len(args) == 1:
+        return args[0]
+    return annotation
+
+
+def _arrow_type(pyarrow, annotation: Any):
+    annotation = _unwrap_optional(annotation)
+    # bool before int, as bool is a subclass of int
+    for python_type, arrow_type in (
+        (bool, pyarrow.bool_()),
+        (int, pyarrow.int64()),
+        (float, pyarrow.float64()),
+        (datetime.datetime, pyarrow.timestamp("us")),
+        (datetime.date, pyarrow.date32()),
+    ):
+        if isinstance(annotation, type) and issubclass(annotation, python_type):
+            return arrow_type
+    return pyarrow.string()
+
+
+def _dumps(value: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(value, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if hasattr(value, "tolist"):
+        # numpy scalars and arrays
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
@@ -0,0 +1,12 @@
+"""
+Benchmark suite for the calculation and ingestion hot paths.
+
+Run from the backend directory:
+
+    python -m benchmarks --output results.json
+    python -m benchmarks --sizes 1000 10000 --databases memory --compare baseline.json
+
+Each benchmark is run against synthetic payroll data at every requested size and,
+where it touches the database, against both an in-memory and a file-backed SQLite
+database. Results are written as JSON so runs can be compared across commits.
+"""
@@ -0,0 +1,67 @@
+"""
+Command line entry point: ``python -m benchmarks``.
+"""
+import sys
+import json
+import argparse
+
+from .runner import DATABASES, DEFAULT_SIZES, compare_reports, run_suite
+from .suite import BENCHMARKS
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Benchmark the calculation and ingestion hot paths on synthetic payroll data."
+    )
+    parser.add_argument("-b", "--benchmark", action="append", choices=sorted(BENCHMARKS),
+                        help="Benchmark to run (repeatable; default: all)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES),
+                        help="Payroll sizes in rows (default: %(default)s)")
+    parser.add_argument("--databases", nargs="+", choices=DATABASES, default=list(DATABASES),
+                        help="SQLite variants for database benchmarks (default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="Repetitions per combination (default: %(default)s)")
+    parser.add_argument("-o", "--output", help="Write the JSON report to this file")
+    parser.add_argument("--compare", metavar="BASELINE",
+                        help="JSON report from an earlier run to compare median timings against")
+    args = parser.parse_args(argv)
+
+    def progress(result):
+        database = result["database"] or "-"
+        print(
+            f"{result['benchmark']:<24} {result['rows']:>8} rows  {database:<6}  "
+            f"median {result['median_s'] * 1000:10.1f} ms",
+            file=sys.stderr
+        )
+
+    report = run_suite(
+        benchmarks=args.benchmark,
+        sizes=args.sizes,
+        databases=args.databases,
+        repeat=args.repeat,
+        progress=progress
+    )
+
+    if args.compare:
+        with open(args.compare) as f:
+            report["comparison"] = compare_reports(json.load(f), report)
+        for entry in report["comparison"]:
+            database = entry["database"] or "-"
+            print(
+                f"{entry['benchmark']:<24} {entry['rows']:>8} rows  {database:<6}  "
+                f"x{entry['ratio']:.2f} vs baseline",
+                file=sys.stderr
+            )
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+"""
+Synthetic payroll data for benchmarks.
+"""
+import datetime
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.db import models
+
+
+def generate_payroll(rows: int, teams: int = 50, seed: int = 42) -> pd.DataFrame:
+    """
+    Generate a payroll DataFrame in the upload template format.
+
+    Values are drawn from a seeded generator, so the same arguments always
+    produce the same data, and all of them pass FileProcessor validation.
+
+    Args:
+        rows: Number of employees
+        teams: Number of distinct teams
+        seed: Random seed
+
+    Returns:
+        DataFrame with the columns of the batch upload template
+    """
+    rng = np.random.default_rng(seed)
+    investment_weight = rng.choice([50.0, 60.0, 70.0, 80.0], size=rows)
+    is_mrt = rng.random(rows) < 0.1
+
+    return pd.DataFrame({
+        "employee_id": [f"E{i:07d}" for i in range(1, rows + 1)],
+        "name": [f"Employee {i}" for i in range(1, rows + 1)],
+        "team": [f"Team {t:03d}" for t in rng.integers(0, teams, size=rows)],
+        "base_salary": rng.uniform(40_000, 250_000, size=rows).round(-2),
+        "target_bonus_pct": rng.choice([10.0, 15.0, 20.0, 25.0, 30.0, 50.0], size=rows),
+        "investment_weight": investment_weight,
+        "qualitative_weight": 100.0 - investment_weight,
+        "investment_score_multiplier": rng.uniform(0.5, 1.5, size=rows).round(2),
+        "qual_score_multiplier": rng.uniform(0.5, 1.5, size=rows).round(2),
+        "raf": rng.uniform(0.8, 1.2, size=rows).round(2),
+        "is_mrt": is_mrt,
+        "mrt_cap_pct": np.where(is_mrt, 200.0, np.nan),
+    })
+
+
+def generate_fund_alphas(payroll: pd.DataFrame, funds_per_employee: int = 20, seed: int = 42) -> pd.DataFrame:
+    """
+    Generate a fund alpha file for a payroll: ``funds_per_employee`` funds per employee.
+
+    Args:
+        payroll: DataFrame from generate_payroll
+        funds_per_employee: Number of fund rows per employee
+        seed: Random seed
+
+    Returns:
+        DataFrame with employee_id, fund, alpha and aum_weight columns, with each
+        employee's funds spread through the file rather than grouped together
+    """
+    rng = np.random.default_rng(seed)
+    rows = len(payroll) * funds_per_employee
+    order = rng.permutation(rows)
+    return pd.DataFrame({
+        "employee_id": np.repeat(payroll["employee_id"].to_numpy(), funds_per_employee)[order],
+        "fund": [f"F{i:06d}" for i in rng.integers(0, 5_000, size=rows)],
+        "alpha": rng.normal(0.5, 2.0, size=rows).round(3),
+        "aum_weight": rng.uniform(0, 500, size=rows).round(1),
+    })
+
+
+def payroll_csv(df: pd.DataFrame) -> bytes:
+    """Encode a payroll DataFrame as an uploaded CSV file."""
+    return df.to_csv(index=False).encode("utf-8")
+
+
+def payroll_records(df: pd.DataFrame, batch_upload_id: int) -> List[Dict[str, Any]]:
+    """Convert a payroll DataFrame into EmployeeData insert parameters."""
+    records = df.astype(object).where(df.notna(), None).to_dict(orient="records")
+    for record in records:
+        record["batch_upload_id"] = batch_upload_id
+    return records
+
+
+def seed_upload(db: Session, df: pd.DataFrame, session_id: str = "benchmark") -> models.BatchUpload:
+    """
+    Store a processed batch upload with its employees, bypassing the code under test.
+
+    Rows are inserted with a single executemany so that seeding stays cheap
+    relative to the benchmarks themselves.
+    """
+    if db.get(models.Session, session_id) is None:
+        expires_at = datetime.datetime.now() + datetime.timedelta(days=1)
+        db.add(models.Session(id=session_id, expires_at=expires_at))
+        db.flush()
+
+    batch_upload = models.BatchUpload(session_id=session_id, filename="payroll.csv", status="processed")
+    db.add(batch_upload)
+    db.flush()
+
+    records = payroll_records(df, batch_upload.id)
+    if records:
+        db.execute(insert(models.EmployeeData), records)
+    db.commit()
+    return batch_upload
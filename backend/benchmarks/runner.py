@@ -0,0 +1,199 @@
+"""
+Benchmark runner: executes the registered benchmarks and reports timings as JSON.
+"""
+import os
+import gc
+import time
+import shutil
+import sqlite3
+import platform
+import statistics
+import subprocess
+import tempfile
+import datetime
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import pandas as pd
+import sqlalchemy
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db.config import Base
+from app.db import models  # noqa: F401 - register all tables on Base.metadata
+
+from .data import generate_payroll
+from .suite import BENCHMARKS, BenchmarkContext
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+DATABASES = ("memory", "file")
+
+
+@contextmanager
+def database(kind: str) -> Iterator[Session]:
+    """
+    Yield a session on a fresh, empty SQLite database.
+
+    Args:
+        kind: "memory" for an in-memory database, "file" for a database file
+            in a temporary directory
+    """
+    tmpdir = None
+    if kind == "memory":
+        engine = create_engine(
+            "sqlite:///:memory:",
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool
+        )
+    elif kind == "file":
+        tmpdir = tempfile.mkdtemp(prefix="compcalc-bench-")
+        engine = create_engine(
+            f"sqlite:///{os.path.join(tmpdir, 'benchmark.db')}",
+            connect_args={"check_same_thread": False}
+        )
+    else:
+        raise ValueError(f"Unknown database kind: {kind}. Expected one of {DATABASES}.")
+
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    try:
+        yield db
+    finally:
+        db.close()
+        engine.dispose()
+        if tmpdir:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+def run_benchmark(
+    name: str,
+    rows: int,
+    payroll: pd.DataFrame,
+    database_kind: Optional[str],
+    repeat: int
+) -> Dict[str, Any]:
+    """
+    Time one benchmark ``repeat`` times at one size and database.
+
+    Returns:
+        Result entry with the individual timings and summary statistics
+    """
+    bench = BENCHMARKS[name]
+    timings: List[float] = []
+
+    for _ in range(repeat):
+        if bench.uses_db:
+            with database(database_kind) as db:
+                timings.append(_time_once(bench.prepare(BenchmarkContext(rows, payroll, db))))
+        else:
+            timings.append(_time_once(bench.prepare(BenchmarkContext(rows, payroll))))
+
+    median = statistics.median(timings)
+    return {
+        "benchmark": name,
+        "rows": rows,
+        "database": database_kind,
+        "repeat": repeat,
+        "timings_s": timings,
+        "min_s": min(timings),
+        "median_s": median,
+        "mean_s": statistics.fmean(timings),
+        "max_s": max(timings),
+        "rows_per_second": rows / median if median > 0 else None
+    }
+
+
+def run_suite(
+    benchmarks: Optional[Sequence[str]] = None,
+    sizes: Sequence[int] = DEFAULT_SIZES,
+    databases: Sequence[str] = DATABASES,
+    repeat: int = 3,
+    progress=None
+) -> Dict[str, Any]:
+    """
+    Run the selected benchmarks at every size (and database, for database benchmarks).
+
+    Args:
+        benchmarks: Names of the benchmarks to run (all by default)
+        sizes: Payroll sizes in rows
+        databases: SQLite variants for database benchmarks ("memory", "file")
+        repeat: Repetitions per combination; the median is the headline number
+        progress: Optional callable receiving each result as it completes
+
+    Returns:
+        Report with run metadata and one result entry per combination
+    """
+    names = list(benchmarks or BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        raise ValueError(f"Unknown benchmarks: {', '.join(unknown)}. Available: {', '.join(BENCHMARKS)}")
+
+    results = []
+    for rows in sizes:
+        payroll = generate_payroll(rows)
+        for name in names:
+            for database_kind in (databases if BENCHMARKS[name].uses_db else [None]):
+                gc.collect()
+                result = run_benchmark(name, rows, payroll, database_kind, repeat)
+                results.append(result)
+                if progress:
+                    progress(result)
+
+    return {"metadata": run_metadata(), "results": results}
+
+
+def run_metadata() -> Dict[str, Any]:
+    """Describe the environment so reports from different commits can be compared."""
+    return {
+        "created_at": datetime.datetime.utcnow().isoformat(),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "sqlite": sqlite3.sqlite_version,
+        "sqlalchemy": sqlalchemy.__version__,
+        "pandas": pd.__version__,
+    }
+
+
+def compare_reports(baseline: Dict[str, Any], current: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Match results of two reports and compute the change in median time.
+
+    Returns:
+        One entry per combination present in both reports; ``ratio`` below 1
+        means the current run is faster
+    """
+    def key(result):
+        return result["benchmark"], result["rows"], result["database"]
+
+    baseline_by_key = {key(result): result for result in baseline["results"]}
+    comparison = []
+    for result in current["results"]:
+        before = baseline_by_key.get(key(result))
+        if before is None:
+            continue
+        comparison.append({
+            "benchmark": result["benchmark"],
+            "rows": result["rows"],
+            "database": result["database"],
+            "baseline_median_s": before["median_s"],
+            "current_median_s": result["median_s"],
+            "ratio": result["median_s"] / before["median_s"] if before["median_s"] else None
+        })
+    return comparison
+
+
+def _time_once(func) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
@@ -0,0 +1,482 @@
+"""
+Benchmark cases.
+
+A benchmark is a function registered with ``@benchmark``. It receives a
+BenchmarkContext, does any (untimed) setup, and returns the zero-argument
+callable that is timed. It is called once per repetition, so benchmarks that
+write to the database always start from the same state.
+"""
+import asyncio
+import io
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from starlette.datastructures import UploadFile
+
+from app.db import models
+from app.db.crud import EmployeeCalculationResultDAL, TeamCalculationSummaryDAL
+from app.db.scenario_crud import ScenarioPlaygroundDAL
+from app.routes.batch import (
+    calculate_and_retrieve_results, get_calculation_with_employee_results, get_employee_results_by_batch,
+    upload_fund_alphas
+)
+from app.services.calculation_engine import calculate_bonus, calculate_bonuses, calculate_weighted_alphas
+from app.services.file_processor import SNIFF_SAMPLE_ROWS, FileProcessor
+from app.services.parallel_validation import VALIDATION_WORKERS, validate_in_chunks
+from app.utils.responses import ARROW_STREAM_MEDIA_TYPE, NDJSON_MEDIA_TYPE
+
+from .data import generate_fund_alphas, payroll_csv, seed_upload
+
+
+@dataclass
+class BenchmarkContext:
+    """Inputs available to a benchmark for one repetition."""
+    rows: int
+    payroll: pd.DataFrame
+    db: Optional[Session] = None
+
+
+@dataclass
+class Benchmark:
+    """A registered benchmark."""
+    name: str
+    prepare: Callable[[BenchmarkContext], Callable[[], Any]]
+    uses_db: bool
+
+
+BENCHMARKS: Dict[str, Benchmark] = {}
+
+
+def benchmark(name: str, uses_db: bool = True):
+    """Register a benchmark under ``name``."""
+    def decorator(prepare: Callable[[BenchmarkContext], Callable[[], Any]]):
+        BENCHMARKS[name] = Benchmark(name=name, prepare=prepare, uses_db=uses_db)
+        return prepare
+    return decorator
+
+
+@benchmark("calculate_bonus", uses_db=False)
+def bench_calculate_bonus(ctx: BenchmarkContext) -> Callable[[], Any]:
+    """Per-employee bonus calculation for the whole payroll."""
+    employees = ctx.payroll.to_dict(orient="records")
+
+    def run():
+        for emp in employees:
+            calculate_bonus(
+                base_salary=emp["base_salary"],
+                target_bonus_pct=emp["target_bonus_pct"],
+                investment_weight=emp["investment_weight"],
+                qualitative_weight=emp["qualitative_weight"],
+                investment_score_multiplier=emp["investment_score_multiplier"],
+                qual_score_multiplier=emp["qual_score_multiplier"],
+                raf=emp["raf"],
+                is_mrt=emp["is_mrt"],
+                mrt_cap_pct=200.0 if pd.isna(emp["mrt_cap_pct"]) else emp["mrt_cap_pct"]
+            )
+    return run
+
+
+@benchmark("calculate_bonuses", uses_db=False)
+def bench_calculate_bonuses(ctx: BenchmarkContext) -> Callable[[], Any]:
+    """Vectorized bonus calculation for the whole payroll through the compiled calculator formula."""
+    employees = {
+        column: ctx.payroll[column].to_numpy()
+        for column in (
+            "base_salary", "target_bonus_pct", "investment_weight", "qualitative_weight",
+            "investment_score_multiplier", "qual_score_multiplier", "raf"
+        )
+    }
+    employees["is_mrt"] = ctx.payroll["is_mrt"].to_numpy(dtype=bool)
+    employees["mrt_cap_pct"] = ctx.payroll["mrt_cap_pct"].fillna(200.0).to_numpy()
+
+    def run():
+        return calculate_bonuses(employees)
+    return run
+
+
+@benchmark("calculate_bonuses_with_overrides", uses_db=False)
+def bench_calculate_bonuses_with_overrides(ctx: BenchmarkContext) -> Callable[[], Any]:
+    """Vectorized bonus calculation with parameter overrides on 2% of employees, in 5 distinct variants."""
+    employees = {
+        column: ctx.payroll[column].to_numpy()
+        for column in (
+            "base_salary", "target_bonus_pct", "investment_weight", "qualitative_weight",
+            "investment_score_multiplier", "qual_score_multiplier", "raf"
+        )
+    }
+    employees["is_mrt"] = ctx.payroll["is_mrt"].to_numpy(dtype=bool)
+    employees["mrt_cap_pct"] = ctx.payroll["mrt_cap_pct"].fillna(200.0).to_numpy()
+    variants = [
+        {"target_bonus_pct": 40.0},
+        {"raf": 1.0},
+        {"mrt_cap_pct": 100.0, "is_mrt": True},
+        {"formula": {"steps": {"weighted_performance": "investment_component"}}},
+        {"target_bonus_pct": 25.0, "raf": 0.9},
+    ]
+    rng = np.random.default_rng(7)
+    overridden = rng.random(ctx.rows) < 0.02
+    overrides = [
+        variants[i] if flag else None
+        for flag, i in zip(overridden, rng.integers(0, len(variants), size=ctx.rows))
+    ]
+
+    def run():
+        return calculate_bonuses(employees, overrides=overrides)
+    return run
+
+
+@benchmark("calculate_bonuses_with_curves", uses_db=False)
+def bench_calculate_bonuses_with_curves(ctx: BenchmarkContext) -> Callable[[], Any]:
+    """Vectorized bonus calculation with alpha and score curves replacing the raw multipliers."""
+    employees = {
+        column: ctx.payroll[column].to_numpy()
+        for column in (
+            "base_salary", "target_bonus_pct", "investment_weight", "qualitative_weight",
+            "investment_score_multiplier", "qual_score_multiplier", "raf"
+        )
+    }
+    employees["is_mrt"] = ctx.payroll["is_mrt"].to_numpy(dtype=bool)
+    employees["mrt_cap_pct"] = ctx.payroll["mrt_cap_pct"].fillna(200.0).to_numpy()
+    rng = np.random.default_rng(ctx.rows)
+    employees["alpha"] = rng.normal(1.5, 2.0, ctx.rows)
+    employees["score"] = rng.integers(1, 6, ctx.rows)
+    curves = {
+        "investment_score_multiplier": {
+            "input": "alpha", "type": "linear", "points": [[0, 0], [2, 1], [5, 2]]
+        },
+        "qual_score_multiplier": {
+            "input": "score", "type": "step", "points": [[1, 0], [3, 1], [4, 1.25], [5, 1.5]]
+        },
+    }
+
+    def run():
+        return calculate_bonuses(employees, curves=curves)
+    return run
+
+
+@benchmark("weighted_alphas", uses_db=False)
+def bench_weighted_alphas(ctx: BenchmarkContext) -> Callable[[], Any]:
+    """AUM-weighted alpha per employee over 20 fund rows per employee."""
+    funds = generate_fund_alphas(ctx.payroll)
+    # Employees are keyed by their integer row IDs once the file is matched to an upload
+    employee_ids = funds["employee_id"].str[1:].astype(int).to_numpy()
+    alphas = funds["alpha"].to_numpy()
+    aum_weights = funds["aum_weight"].to_numpy()
+
+    def run():
+        return calculate_weighted_alphas(employee_ids, alphas, aum_weights)
+    return run
+
+
+@benchmark("upload_fund_alphas")
+def bench_upload_fund_alphas(ctx: BenchmarkContext) -> Callable[[], Any]:
+    """Ingest a fund alpha CSV with 20 fund rows per employee of an upload."""
+    batch_upload = seed_upload(ctx.db, ctx.payroll)
+    content = payroll_csv(generate_fund_alphas(ctx.payroll))
+
+    def run():
+        upload = UploadFile(io.BytesIO(content), filename="funds.csv")
+        result = upload_fund_alphas(batch_upload.id, upload, ctx.db)
+        assert result["rows_saved"] == ctx.rows * 20, result
+        return result
+    return run
+
+
+@benchmark("process_file", uses_db=False)
+def bench_process_file(ctx: BenchmarkContext) -> Callable[[], Any]:
+    """Parse and validate an uploaded CSV file."""
+    content = payroll_csv(ctx.payroll)
+
+    def run():
+        upload = UploadFile(io.BytesIO(content), filename="payroll.csv")
+        df, validation_results, _ = asyncio.run(FileProcessor.process_file(upload))
+        assert validation_results["valid"], validation_results
+        return df
+    return run
+
+
+@benchmark("sniff_upload", uses_db=False)
+def bench_sniff_upload(ctx: BenchmarkContext) -> Callable[[], Any]:
+    """Describe an uploaded CSV file's columns for the mapping step from a sample."""
+    content = payroll_csv(ctx.payroll)
+
+    def run():
+        upload = UploadFile(io.BytesIO(content), filename="payroll.csv")
+        _, _, source_columns_info = asyncio.run(
+            FileProcessor.process_file(upload, sample_rows=SNIFF_SAMPLE_ROWS)
+        )
+        return source_columns_info
+    return run
+
+
+@benchmark("read_excel", uses_db=False)
+def bench_read_excel(ctx: BenchmarkContext) -> Callable[[], Any]:
+    """Stream an XLSX upload into a DataFrame."""
+    buffer = io.BytesIO()
+    ctx.payroll.to_excel(buffer, index=False)
+    content = buffer.getvalue()
+
+    def run():
+        return FileProcessor.read_dataframe(content, "payroll.xlsx")
+    return run
+
+
+@benchmark("process_files", uses_db=False)
+def bench_process_files(ctx: BenchmarkContext) -> Callable[[], Any]:
+    """Parse and validate a payroll split into eight CSV files, as a multi-file upload."""
+    parts = 8
+    size = -(-ctx.rows // parts)
+    files = [
+        (f"region_{i}.csv", payroll_csv(ctx.payroll.iloc[i * size:(i + 1) * size]))
+        for i in range(parts)
+        if i * size < ctx.rows
+    ]
+
+    def run():
+        results = list(FileProcessor.iter_processed_members(files))
+        assert all(summary["valid"] for _, summary in results), results
+        return results
+    return run
+
+
+@benchmark("validate_values", uses_db=False)
+def bench_validate_values(ctx: BenchmarkContext) -> Callable[[], Any]:
+    """Type and range checks on a parsed payroll in the calling process."""
+    def run():
+        df = ctx.payroll.copy()
+        _, type_errors = FileProcessor.validate_data_types(df)
+        _, range_errors = FileProcessor.validate_data_ranges(df)
+        assert not type_errors and not range_errors
+    return run
+
+
+@benchmark("validate_values_parallel", uses_db=False)
+def bench_validate_values_parallel(ctx: BenchmarkContext) -> Callable[[], Any]:
+    """The same checks split into one row chunk per validation worker process."""
+    workers = max(1, VALIDATION_WORKERS)
+    chunk_rows = -(-ctx.rows // workers)
+    # Start the workers (and their imports) outside the timed runs
+    validate_in_chunks(ctx.payroll.iloc[:workers], chunk_rows=1)
+
+    def run():
+        type_errors, range_errors = validate_in_chunks(ctx.payroll, chunk_rows=chunk_rows)
+        assert not type_errors and not range_errors
+    return run
+
+
+@benchmark("map_from_csv", uses_db=False)
+def bench_map_from_csv(ctx: BenchmarkContext) -> Callable[[], Any]:
+    """Apply a column mapping to an uploaded CSV file, parsing the text."""
+    content = payroll_csv(ctx.payroll)
+    mappings = {col: col for col in FileProcessor.REQUIRED_COLUMNS}
+
+    def run():
+        df, validation_results = FileProcessor.apply_mappings_and_process_raw_content(
+            content, "payroll.csv", mappings, None, None
+        )
+        assert validation_results["valid"], validation_results
+        return df
+    return run
+
+
+@benchmark("map_from_columnar_cache", uses_db=False)
+def bench_map_from_columnar_cache(ctx: BenchmarkContext) -> Callable[[], Any]:
+    """Apply a column mapping to an upload whose parsed data is already cached."""
+    cache = FileProcessor.build_columnar_cache(ctx.payroll)
+    mappings = {col: col for col in FileProcessor.REQUIRED_COLUMNS}
+
+    def run():
+        df, validation_results = FileProcessor.apply_mappings_and_process_raw_content(
+            b"", "payroll.csv", mappings, None, None, columnar_cache=cache
+        )
+        assert validation_results["valid"], validation_results
+        return df
+    return run
+
+
+@benchmark("save_to_database")
+def bench_save_to_database(ctx: BenchmarkContext) -> Callable[[], Any]:
+    """Store a validated payroll as EmployeeData rows."""
+    batch_upload = seed_upload(ctx.db, ctx.payroll.iloc[:0])
+    df = FileProcessor.clean_data(ctx.payroll.copy())
+
+    def run():
+        saved_count, errors = FileProcessor.save_to_database(ctx.db, df, batch_upload)
+        assert saved_count == ctx.rows and not errors, errors[:5]
+    return run
+
+
+@benchmark("calculate_scenario")
+def bench_calculate_scenario(ctx: BenchmarkContext) -> Callable[[], Any]:
+    """Scenario playground calculation with team aggregation."""
+    batch_upload = seed_upload(ctx.db, ctx.payroll)
+    scenario = _create_scenario(ctx.db, batch_upload.session_id)
+
+    def run():
+        return ScenarioPlaygroundDAL.calculate_scenario(ctx.db, scenario.id)
+    return run
+
+
+@benchmark("get_team_aggregations")
+def bench_get_team_aggregations(ctx: BenchmarkContext) -> Callable[[], Any]:
+    """Team aggregation over stored employee results."""
+    batch_upload = seed_upload(ctx.db, ctx.payroll)
+    scenario = _create_scenario(ctx.db, batch_upload.session_id)
+    _seed_employee_results(ctx.db, batch_upload.id, scenario.id)
+
+    def run():
+        return ScenarioPlaygroundDAL.get_team_aggregations(ctx.db, scenario.id)
+    return run
+
+
+@benchmark("latest_team_aggregations")
+def bench_latest_team_aggregations(ctx: BenchmarkContext) -> Callable[[], Any]:
+    """SQL GROUP BY team aggregation behind /latest/team-aggregations."""
+    batch_upload = seed_upload(ctx.db, ctx.payroll)
+    scenario = _create_scenario(ctx.db, batch_upload.session_id)
+    _seed_employee_results(ctx.db, batch_upload.id, scenario.id)
+
+    def run():
+        batch_result_id = EmployeeCalculationResultDAL.get_latest_batch_result_id_for_upload(
+            ctx.db, batch_upload.id
+        )
+        return EmployeeCalculationResultDAL.get_team_aggregations(ctx.db, batch_result_id)
+    return run
+
+
+@benchmark("team_summaries")
+def bench_team_summaries(ctx: BenchmarkContext) -> Callable[[], Any]:
+    """Reading the per-team statistics stored with a calculation."""
+    batch_upload = seed_upload(ctx.db, ctx.payroll)
+    scenario = _create_scenario(ctx.db, batch_upload.session_id)
+    batch_result_id = _seed_employee_results(ctx.db, batch_upload.id, scenario.id)
+    TeamCalculationSummaryDAL.create_summaries_from_results(ctx.db, batch_result_id)
+    ctx.db.commit()
+
+    def run():
+        return TeamCalculationSummaryDAL.get_summaries(ctx.db, batch_result_id)
+    return run
+
+
+@benchmark("calculate_and_retrieve_results")
+def bench_calculate_and_retrieve_results(ctx: BenchmarkContext) -> Callable[[], Any]:
+    """Batch calculation endpoint: compute, store and serialize every employee's result."""
+    batch_upload = seed_upload(ctx.db, ctx.payroll)
+
+    def run():
+        response = calculate_and_retrieve_results(batch_upload.id, ctx.db, session_id=None)
+        assert response.status_code == 200
+        return response.body
+    return run
+
+
+@benchmark("calculation_detail_response")
+def bench_calculation_detail_response(ctx: BenchmarkContext) -> Callable[[], Any]:
+    """Reading and serializing a stored calculation with all of its employee results."""
+    batch_upload = seed_upload(ctx.db, ctx.payroll)
+    scenario = _create_scenario(ctx.db, batch_upload.session_id)
+    batch_result_id = _seed_employee_results(ctx.db, batch_upload.id, scenario.id)
+
+    def run():
+        ctx.db.expire_all()
+        return get_calculation_with_employee_results(batch_result_id, if_none_match=None, db=ctx.db).body
+    return run
+
+
+@benchmark("calculation_detail_not_modified")
+def bench_calculation_detail_not_modified(ctx: BenchmarkContext) -> Callable[[], Any]:
+    """Answering a poll for an unchanged stored calculation with 304 Not Modified."""
+    batch_upload = seed_upload(ctx.db, ctx.payroll)
+    scenario = _create_scenario(ctx.db, batch_upload.session_id)
+    batch_result_id = _seed_employee_results(ctx.db, batch_upload.id, scenario.id)
+    etag = get_calculation_with_employee_results(batch_result_id, if_none_match=None, db=ctx.db).headers["etag"]
+
+    def run():
+        ctx.db.expire_all()
+        response = get_calculation_with_employee_results(batch_result_id, if_none_match=etag, db=ctx.db)
+        assert response.status_code == 304
+        return response
+    return run
+
+
+@benchmark("employee_results_arrow")
+def bench_employee_results_arrow(ctx: BenchmarkContext) -> Callable[[], Any]:
+    """Serving the employee results of a stored calculation as an Arrow IPC stream."""
+    batch_upload = seed_upload(ctx.db, ctx.payroll)
+    scenario = _create_scenario(ctx.db, batch_upload.session_id)
+    batch_result_id = _seed_employee_results(ctx.db, batch_upload.id, scenario.id)
+
+    def run():
+        return get_employee_results_by_batch(
+            batch_result_id, accept=ARROW_STREAM_MEDIA_TYPE, if_none_match=None, db=ctx.db
+        ).body
+    return run
+
+
+@benchmark("employee_results_ndjson")
+def bench_employee_results_ndjson(ctx: BenchmarkContext) -> Callable[[], Any]:
+    """Streaming the employee results of a stored calculation as NDJSON."""
+    batch_upload = seed_upload(ctx.db, ctx.payroll)
+    scenario = _create_scenario(ctx.db, batch_upload.session_id)
+    batch_result_id = _seed_employee_results(ctx.db, batch_upload.id, scenario.id)
+
+    async def consume(response):
+        return [chunk async for chunk in response.body_iterator]
+
+    def run():
+        return asyncio.run(consume(get_employee_results_by_batch(
+            batch_result_id, accept=NDJSON_MEDIA_TYPE, if_none_match=None, db=ctx.db
+        )))
+    return run
+
+
+def _create_scenario(db: Session, session_id: str) -> models.BatchScenario:
+    scenario = models.BatchScenario(
+        session_id=session_id,
+        name="Benchmark scenario",
+        global_parameters={"cap_percentage_of_salary": 2.0}
+    )
+    db.add(scenario)
+    db.commit()
+    return scenario
+
+
+def _seed_employee_results(db: Session, batch_upload_id: int, scenario_id: int) -> int:
+    """Store one calculation result per employee of the upload and return the batch result ID."""
+    batch_result = models.BatchCalculationResult(
+        scenario_id=scenario_id,
+        total_bonus_pool=0,
+        average_bonus=0,
+        total_employees=0,
+        capped_employees=0
+    )
+    db.add(batch_result)
+    db.flush()
+
+    employees = db.query(
+        models.EmployeeData.id, models.EmployeeData.base_salary, models.EmployeeData.target_bonus_pct
+    ).filter(models.EmployeeData.batch_upload_id == batch_upload_id).all()
+
+    results = []
+    for employee_data_id, base_salary, target_bonus_pct in employees:
+        bonus = base_salary * target_bonus_pct / 100
+        results.append({
+            "batch_result_id": batch_result.id,
+            "employee_data_id": employee_data_id,
+            "scenario_id": scenario_id,
+            "investment_component": 0.6,
+            "qualitative_component": 0.4,
+            "weighted_performance": 1.0,
+            "pre_raf_bonus": bonus,
+            "final_bonus": bonus,
+            "bonus_to_salary_ratio": bonus / base_salary,
+            "policy_breach": bonus > base_salary * 0.4,
+            "applied_cap": None
+        })
+    db.execute(insert(models.EmployeeCalculationResult), results)
+    db.commit()
+    return batch_result.id
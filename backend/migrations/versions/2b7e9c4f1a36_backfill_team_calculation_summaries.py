@@ -0,0 +1,84 @@
+"""Backfill team_calculation_summaries for earlier calculations
+
+Revision ID: 2b7e9c4f1a36
+Revises: 9e4a6b1c7d52
+Create Date: 2026-10-19 09:12:40.561207
+
+"""
+import statistics
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2b7e9c4f1a36'
+down_revision: Union[str, None] = '9e4a6b1c7d52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+employee_data = sa.table(
+    'employee_data',
+    sa.column('id', sa.Integer), sa.column('team', sa.String), sa.column('base_salary', sa.Float)
+)
+results = sa.table(
+    'employee_calculation_results',
+    sa.column('batch_result_id', sa.Integer), sa.column('employee_data_id', sa.Integer),
+    sa.column('final_bonus', sa.Float), sa.column('applied_cap', sa.String), sa.column('policy_breach', sa.Boolean)
+)
+summaries = sa.table(
+    'team_calculation_summaries',
+    sa.column('batch_result_id', sa.Integer), sa.column('team', sa.String),
+    sa.column('employee_count', sa.Integer), sa.column('total_base_salary', sa.Float),
+    sa.column('total_bonus', sa.Float), sa.column('capped_count', sa.Integer),
+    sa.column('policy_breach_count', sa.Integer), sa.column('min_bonus', sa.Float),
+    sa.column('median_bonus', sa.Float), sa.column('max_bonus', sa.Float)
+)
+
+
+def _summaries(batch_result_id, rows):
+    """Per-team statistics as computed by TeamCalculationSummaryDAL.build_summaries."""
+    by_team = {}
+    for row in rows:
+        by_team.setdefault(row.team or "Unassigned", []).append(row)
+    for team, team_rows in sorted(by_team.items()):
+        bonuses = [row.final_bonus or 0.0 for row in team_rows]
+        yield {
+            "batch_result_id": batch_result_id,
+            "team": team,
+            "employee_count": len(team_rows),
+            "total_base_salary": sum(row.base_salary or 0.0 for row in team_rows),
+            "total_bonus": sum(bonuses),
+            "capped_count": sum(1 for row in team_rows if row.applied_cap is not None),
+            "policy_breach_count": sum(1 for row in team_rows if row.policy_breach),
+            "min_bonus": min(bonuses),
+            "median_bonus": statistics.median(bonuses),
+            "max_bonus": max(bonuses),
+        }
+
+
+def upgrade() -> None:
+    """Store team summaries for calculations that have employee results but no summaries."""
+    connection = op.get_bind()
+    batch_result_ids = connection.execute(
+        sa.select(results.c.batch_result_id).distinct()
+        .where(results.c.batch_result_id.not_in(sa.select(summaries.c.batch_result_id)))
+        .order_by(results.c.batch_result_id)
+    ).scalars().all()
+    # One calculation at a time, so only its rows are held in memory
+    for batch_result_id in batch_result_ids:
+        rows = connection.execute(
+            sa.select(
+                employee_data.c.team, employee_data.c.base_salary,
+                results.c.final_bonus, results.c.applied_cap, results.c.policy_breach
+            )
+            .select_from(results.join(employee_data, results.c.employee_data_id == employee_data.c.id))
+            .where(results.c.batch_result_id == batch_result_id)
+        ).all()
+        if rows:
+            connection.execute(sa.insert(summaries), list(_summaries(batch_result_id, rows)))
+
+
+def downgrade() -> None:
+    """Summaries are also written by calculations, so backfilled ones are left in place."""
@@ -0,0 +1,42 @@
+"""Add upload_row_errors table
+
+Revision ID: 7b2d5f8c3e61
+Revises: 0a6c2e9d4b17
+Create Date: 2026-10-18 18:04:27.315842
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7b2d5f8c3e61'
+down_revision: Union[str, None] = '0a6c2e9d4b17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('upload_row_errors',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('batch_upload_id', sa.Integer(), nullable=False),
+    sa.Column('row_number', sa.Integer(), nullable=False),
+    sa.Column('field', sa.String(length=100), nullable=True),
+    sa.Column('error_type', sa.String(length=50), nullable=False),
+    sa.Column('message', sa.Text(), nullable=False),
+    sa.Column('value', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.ForeignKeyConstraint(['batch_upload_id'], ['batch_uploads.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_upload_row_errors_upload_row', 'upload_row_errors', ['batch_upload_id', 'row_number'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_upload_row_errors_upload_row', table_name='upload_row_errors')
+    op.drop_table('upload_row_errors')
@@ -0,0 +1,42 @@
+"""Add employee_fund_alphas table
+
+Revision ID: 9e4a6b1c7d52
+Revises: 7b2d5f8c3e61
+Create Date: 2026-10-19 09:12:41.208533
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9e4a6b1c7d52'
+down_revision: Union[str, None] = '7b2d5f8c3e61'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('employee_fund_alphas',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('batch_upload_id', sa.Integer(), nullable=False),
+    sa.Column('employee_data_id', sa.Integer(), nullable=False),
+    sa.Column('fund', sa.String(length=100), nullable=False),
+    sa.Column('alpha', sa.Float(), nullable=False),
+    sa.Column('aum_weight', sa.Float(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.ForeignKeyConstraint(['batch_upload_id'], ['batch_uploads.id'], ),
+    sa.ForeignKeyConstraint(['employee_data_id'], ['employee_data.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_employee_fund_alphas_upload_employee', 'employee_fund_alphas', ['batch_upload_id', 'employee_data_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_employee_fund_alphas_upload_employee', table_name='employee_fund_alphas')
+    op.drop_table('employee_fund_alphas')
@@ -0,0 +1,97 @@
+"""Sync schema with models
+
+Adds the tables and columns that were introduced in the models without a
+migration, so that `alembic upgrade head` alone produces the full schema.
+
+Revision ID: b3f9d2e61a47
+Revises: 8c1e4b7a2d95
+Create Date: 2026-10-18 10:03:17.284690
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3f9d2e61a47'
+down_revision: Union[str, None] = '8c1e4b7a2d95'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('import_templates',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('session_id', sa.String(length=36), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('is_public', sa.Boolean(), nullable=True),
+    sa.Column('column_mappings', sa.JSON(), nullable=False),
+    sa.Column('default_values', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.ForeignKeyConstraint(['session_id'], ['sessions.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('session_id', 'name', name='uix_template_session_name')
+    )
+    op.create_table('scenario_audit_log',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('scenario_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.String(length=36), nullable=True),
+    sa.Column('action', sa.String(length=50), nullable=False),
+    sa.Column('diff', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.ForeignKeyConstraint(['scenario_id'], ['batch_scenarios.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_scenario_audit_log_scenario_id'), 'scenario_audit_log', ['scenario_id'], unique=False)
+
+    # Use batch_alter_table for SQLite compatibility
+    with op.batch_alter_table('batch_scenarios') as batch_op:
+        batch_op.add_column(sa.Column('parent_scenario_id', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('parameters', sa.JSON(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_batch_scenarios_parent_scenario_id'), ['parent_scenario_id'], unique=False)
+        batch_op.create_foreign_key('fk_batch_scenarios_parent_scenario_id', 'batch_scenarios', ['parent_scenario_id'], ['id'])
+
+    with op.batch_alter_table('batch_uploads') as batch_op:
+        batch_op.add_column(sa.Column('status', sa.String(length=50), server_default='pending_upload', nullable=False))
+        batch_op.add_column(sa.Column('uploaded_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False))
+        batch_op.add_column(sa.Column('processed_at', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('error_message', sa.Text(), nullable=True))
+        batch_op.alter_column('expires_at', existing_type=sa.DateTime(), nullable=True)
+        batch_op.create_index(batch_op.f('ix_batch_uploads_id'), ['id'], unique=False)
+
+    with op.batch_alter_table('employee_calculation_results') as batch_op:
+        batch_op.add_column(sa.Column('scenario_id', sa.Integer(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_employee_calculation_results_scenario_id'), ['scenario_id'], unique=False)
+        batch_op.create_foreign_key('fk_employee_calculation_results_scenario_id', 'batch_scenarios', ['scenario_id'], ['id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('employee_calculation_results') as batch_op:
+        batch_op.drop_constraint('fk_employee_calculation_results_scenario_id', type_='foreignkey')
+        batch_op.drop_index(batch_op.f('ix_employee_calculation_results_scenario_id'))
+        batch_op.drop_column('scenario_id')
+
+    with op.batch_alter_table('batch_uploads') as batch_op:
+        batch_op.drop_index(batch_op.f('ix_batch_uploads_id'))
+        batch_op.alter_column('expires_at', existing_type=sa.DateTime(), nullable=False)
+        batch_op.drop_column('error_message')
+        batch_op.drop_column('processed_at')
+        batch_op.drop_column('uploaded_at')
+        batch_op.drop_column('status')
+
+    with op.batch_alter_table('batch_scenarios') as batch_op:
+        batch_op.drop_constraint('fk_batch_scenarios_parent_scenario_id', type_='foreignkey')
+        batch_op.drop_index(batch_op.f('ix_batch_scenarios_parent_scenario_id'))
+        batch_op.drop_column('parameters')
+        batch_op.drop_column('parent_scenario_id')
+
+    op.drop_index(op.f('ix_scenario_audit_log_scenario_id'), table_name='scenario_audit_log')
+    op.drop_table('scenario_audit_log')
+    op.drop_table('import_templates')
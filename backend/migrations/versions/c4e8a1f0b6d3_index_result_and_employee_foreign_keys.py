@@ -0,0 +1,31 @@
+"""Index result and employee foreign keys
+
+Revision ID: c4e8a1f0b6d3
+Revises: b3f9d2e61a47
+Create Date: 2026-10-18 14:05:12.318044
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e8a1f0b6d3'
+down_revision: Union[str, None] = 'b3f9d2e61a47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(op.f('ix_employee_data_batch_upload_id'), 'employee_data', ['batch_upload_id'], unique=False)
+    op.create_index(op.f('ix_employee_calculation_results_batch_result_id'), 'employee_calculation_results', ['batch_result_id'], unique=False)
+    op.create_index(op.f('ix_employee_calculation_results_employee_data_id'), 'employee_calculation_results', ['employee_data_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_employee_calculation_results_employee_data_id'), table_name='employee_calculation_results')
+    op.drop_index(op.f('ix_employee_calculation_results_batch_result_id'), table_name='employee_calculation_results')
+    op.drop_index(op.f('ix_employee_data_batch_upload_id'), table_name='employee_data')
@@ -0,0 +1,47 @@
+"""Add team_calculation_summaries table
+
+Revision ID: e1a7c3d95f28
+Revises: c4e8a1f0b6d3
+Create Date: 2026-10-18 15:21:48.772310
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e1a7c3d95f28'
+down_revision: Union[str, None] = 'c4e8a1f0b6d3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('team_calculation_summaries',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('batch_result_id', sa.Integer(), nullable=False),
+    sa.Column('team', sa.String(length=100), nullable=False),
+    sa.Column('employee_count', sa.Integer(), nullable=False),
+    sa.Column('total_base_salary', sa.Float(), nullable=False),
+    sa.Column('total_bonus', sa.Float(), nullable=False),
+    sa.Column('capped_count', sa.Integer(), nullable=False),
+    sa.Column('policy_breach_count', sa.Integer(), nullable=False),
+    sa.Column('min_bonus', sa.Float(), nullable=False),
+    sa.Column('median_bonus', sa.Float(), nullable=False),
+    sa.Column('max_bonus', sa.Float(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.ForeignKeyConstraint(['batch_result_id'], ['batch_calculation_results.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('batch_result_id', 'team', name='uix_team_summary_result_team')
+    )
+    op.create_index(op.f('ix_team_calculation_summaries_batch_result_id'), 'team_calculation_summaries', ['batch_result_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_team_calculation_summaries_batch_result_id'), table_name='team_calculation_summaries')
+    op.drop_table('team_calculation_summaries')
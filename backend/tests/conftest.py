@@ -1,11 +1,20 @@
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool, StaticPool
 
 from app.main import app
 from app.db.config import Base
+from app.db.session_cache import session_cache
+
+@pytest.fixture(autouse=True)
+def clear_session_cache():
+    """Start every test with an empty session cache, as test databases reuse session IDs."""
+    session_cache.clear()
+    yield
+    session_cache.clear()
 
 @pytest.fixture
 def client():
@@ -45,3 +54,36 @@ def test_db():
     finally:
         db.close()
         Base.metadata.drop_all(bind=engine)
+
+@pytest.fixture
+def test_db_file(tmp_path):
+    """Create a SQLite database file for tests that also read it through test_async_db."""
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'test.db'}",
+        connect_args={"check_same_thread": False},
+    )
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    try:
+        yield db
+    finally:
+        db.close()
+        engine.dispose()
+
+@pytest.fixture
+def test_async_db(test_db_file):
+    """
+    Return a replacement for the get_async_db dependency on test_db_file's database.
+    
+    Connections are not pooled, as each TestClient request runs on its own event loop.
+    """
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{test_db_file.get_bind().url.database}",
+        poolclass=NullPool,
+    )
+    session_factory = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+
+    async def get_test_async_db():
+        async with session_factory() as db:
+            yield db
+    return get_test_async_db
@@ -0,0 +1,50 @@
+"""
+Tests for the async database path of the read endpoints.
+"""
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.db import get_async_db, get_db
+from app.db.config import async_database_url
+from app.routes.batch import router
+from benchmarks.data import generate_payroll, seed_upload
+
+
+def test_async_driver_urls_are_derived_from_the_database_url():
+    assert async_database_url("sqlite:///./compensation_calculator.db") == "sqlite+aiosqlite:///./compensation_calculator.db"
+    assert async_database_url("postgresql://user:pw@db/comp") == "postgresql+asyncpg://user:pw@db/comp"
+    assert async_database_url("postgresql+psycopg2://db/comp") == "postgresql+asyncpg://db/comp"
+    assert async_database_url("postgresql+asyncpg://db/comp") == "postgresql+asyncpg://db/comp"
+
+
+def test_routes_on_the_event_loop_do_not_use_the_sync_session():
+    # Async endpoints run on the event loop, so blocking sync database work must not happen in them
+    for route in router.routes:
+        dependencies = {dependency.call for dependency in route.dependant.dependencies}
+        if asyncio.iscoroutinefunction(route.endpoint):
+            assert get_db not in dependencies, route.path
+        if get_async_db in dependencies:
+            assert asyncio.iscoroutinefunction(route.endpoint), route.path
+
+
+def test_read_endpoints_use_async_sessions(test_db_file, test_async_db):
+    batch_upload = seed_upload(test_db_file, generate_payroll(10, teams=2))
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_db] = lambda: test_db_file
+    app.dependency_overrides[get_async_db] = test_async_db
+    client = TestClient(app, cookies={"session_id": batch_upload.session_id})
+
+    assert client.get("/sessions/current").json()["id"] == batch_upload.session_id
+    upload = client.get(f"/uploads/{batch_upload.id}").json()
+    assert upload["id"] == batch_upload.id
+    assert upload["status"] == batch_upload.status
+    assert [listed["id"] for listed in client.get("/uploads").json()] == [batch_upload.id]
+    assert client.get("/uploads/999999").status_code == 404
+
+    calculated = client.post(f"/uploads/{batch_upload.id}/calculate_and_retrieve_results").json()
+    result = client.get(f"/calculations/{calculated['id']}").json()
+    assert result["total_bonus_pool"] == calculated["total_bonus_pool"]
+    assert client.get("/calculations/999999").status_code == 404
@@ -0,0 +1,41 @@
+"""
+Smoke tests for the benchmark suite, so the benchmarks keep working as the code changes.
+"""
+from benchmarks.data import generate_payroll
+from benchmarks.runner import compare_reports, run_suite
+from benchmarks.suite import BENCHMARKS
+from app.services.file_processor import FileProcessor
+
+
+def test_generated_payroll_is_deterministic_and_valid():
+    df = generate_payroll(200, seed=7)
+    assert df.equals(generate_payroll(200, seed=7))
+    assert FileProcessor.validate_dataframe(df.copy())["valid"]
+
+
+def test_every_benchmark_runs_on_both_databases():
+    report = run_suite(sizes=[50], repeat=1)
+
+    combinations = {(r["benchmark"], r["database"]) for r in report["results"]}
+    for name, bench in BENCHMARKS.items():
+        expected = {"memory", "file"} if bench.uses_db else {None}
+        assert {db for bench_name, db in combinations if bench_name == name} == expected
+
+    assert all(r["median_s"] > 0 and r["rows"] == 50 for r in report["results"])
+    assert report["metadata"]["python"]
+
+
+def test_compare_reports_matches_combinations():
+    baseline = {"results": [
+        {"benchmark": "process_file", "rows": 1000, "database": None, "median_s": 2.0},
+        {"benchmark": "save_to_database", "rows": 1000, "database": "file", "median_s": 1.0},
+    ]}
+    current = {"results": [
+        {"benchmark": "process_file", "rows": 1000, "database": None, "median_s": 1.0},
+        {"benchmark": "save_to_database", "rows": 1000, "database": "memory", "median_s": 1.0},
+    ]}
+
+    comparison = compare_reports(baseline, current)
+    assert len(comparison) == 1
+    assert comparison[0]["benchmark"] == "process_file"
+    assert comparison[0]["ratio"] == 0.5
@@ -0,0 +1,81 @@
+"""
+Tests for the column-matching service behind the mapping suggestions.
+"""
+import datetime
+
+import pytest
+
+from app.db.crud import ImportTemplateDAL
+from app.db.models import BatchUpload, Session
+from app.db.template_cache import template_cache
+from app.services.column_matcher import ColumnMatcher, normalize_header
+from app.services.file_processor import FileProcessor
+
+
+@pytest.fixture(autouse=True)
+def clear_matcher():
+    ColumnMatcher.clear()
+    template_cache.clear()
+    yield
+    ColumnMatcher.clear()
+    template_cache.clear()
+
+
+@pytest.fixture
+def session(test_db):
+    test_db.add(Session(id="s1", expires_at=datetime.datetime.now() + datetime.timedelta(hours=1)))
+    test_db.commit()
+    return "s1"
+
+
+@pytest.mark.parametrize("header", ["Base Salary (GBP)", "base_salary", "BaseSalary", "salary  base"])
+def test_normalize_header(header):
+    assert normalize_header(header) == "base salary"
+
+
+def test_suggest_ranks_and_assigns_each_field_once(test_db):
+    headers = ["EmpNo", "Full Name", "Dept", "Salary", "Base Salary", "Target Bonus %", "Risk Adj Factor", "Notes"]
+    result = ColumnMatcher.suggest(test_db, headers)
+
+    assert result["suggestions"]["EmpNo"][0] == {"field": "employee_id", "score": 0.95, "match": "alias"}
+    assert result["suggestions"]["Risk Adj Factor"][0]["match"] == "fuzzy"
+    assert result["suggestions"]["Notes"] == []
+    assert result["suggested_mappings"] == {
+        "EmpNo": "employee_id",
+        "Full Name": "name",
+        "Dept": "team",
+        "Base Salary": "base_salary",  # the exact match wins over the "Salary" alias
+        "Target Bonus %": "target_bonus_pct",
+        "Risk Adj Factor": "raf",
+    }
+
+
+def test_public_templates_extend_the_index_and_invalidate_the_cache(test_db, session):
+    headers = ["Fixed Remuneration", "Employee ID"]
+    assert ColumnMatcher.suggest(test_db, headers)["suggested_mappings"] == {"Employee ID": "employee_id"}
+
+    # Same header set in another order is served from the cache
+    ColumnMatcher.suggest(test_db, list(reversed(headers)))
+    assert len(ColumnMatcher._cache) == 1
+
+    ImportTemplateDAL.create_template(
+        test_db, session_id=session, name="HR export", is_public=True,
+        column_mappings={"Fixed Remuneration": "base_salary"}
+    )
+
+    result = ColumnMatcher.suggest(test_db, headers)
+    assert result["suggestions"]["Fixed Remuneration"][0] == {"field": "base_salary", "score": 0.9, "match": "template"}
+    assert len(ColumnMatcher._cache) == 2
+
+
+def test_column_info_includes_suggestions(test_db, session):
+    upload = BatchUpload(
+        session_id=session, filename="payroll.csv", status="awaiting_mapping",
+        source_columns_info='[{"name": "Dept", "sample": ["Rates"]}]'
+    )
+    test_db.add(upload)
+    test_db.commit()
+
+    column_info = FileProcessor.get_column_info(upload.id, test_db)
+    assert column_info["columns"] == [{"name": "Dept", "sample": ["Rates"]}]
+    assert column_info["suggested_mappings"] == {"Dept": "team"}
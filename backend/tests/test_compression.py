@@ -0,0 +1,100 @@
+"""
+Tests for gzip/brotli compression of large responses.
+"""
+from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.utils import compression
+from app.utils.compression import CompressionMiddleware, choose_encoding
+from app.utils.responses import etag_matches, immutable_headers, make_etag, not_modified
+
+
+def _client(minimum_size=100):
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=minimum_size)
+
+    @app.get("/text/{size}")
+    def text(size: int):
+        return PlainTextResponse("x" * size)
+
+    @app.get("/encoded")
+    def encoded():
+        return PlainTextResponse("y" * 500, headers={"Content-Encoding": "identity"})
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse((f"line {i}\n".encode() for i in range(50)), media_type="application/x-ndjson")
+
+    @app.get("/cached")
+    def cached(request: Request):
+        etag = make_etag("cached", 1)
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return not_modified(etag)
+        return PlainTextResponse("z" * 500, headers=immutable_headers(etag))
+
+    return TestClient(app)
+
+
+def test_accept_encoding_is_parsed_with_quality_values(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", None)
+    assert choose_encoding("gzip, deflate, br") == "gzip"
+    assert choose_encoding("gzip;q=0, deflate") is None
+    assert choose_encoding("*") == "gzip"
+    assert choose_encoding("") is None
+
+    monkeypatch.setattr(compression, "brotli", object())
+    assert choose_encoding("gzip, br") == "br"
+    assert choose_encoding("gzip, br;q=0") == "gzip"
+
+
+def test_only_large_responses_are_compressed(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", None)
+    client = _client()
+
+    response = client.get("/text/5000", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert int(response.headers["content-length"]) < 5000
+    assert response.text == "x" * 5000
+
+    small = client.get("/text/50", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers
+    assert small.text == "x" * 50
+
+    plain = client.get("/text/5000", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+
+    encoded = client.get("/encoded", headers={"Accept-Encoding": "gzip"})
+    assert encoded.headers["content-encoding"] == "identity"
+    assert encoded.text == "y" * 500
+
+
+def test_streamed_responses_are_compressed_chunk_by_chunk(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", None)
+    response = _client().get("/stream", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert response.text.splitlines() == [f"line {i}" for i in range(50)]
+
+
+def test_compressed_bodies_get_their_own_etag(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", None)
+    client = _client()
+    etag = make_etag("cached", 1)
+
+    plain = client.get("/cached", headers={"Accept-Encoding": "identity"})
+    assert plain.headers["etag"] == etag
+
+    gzipped = client.get("/cached", headers={"Accept-Encoding": "gzip"})
+    assert gzipped.headers["content-encoding"] == "gzip"
+    assert gzipped.headers["etag"] == f'{etag[:-1]}-gzip"'
+
+    # Each client gets a 304 carrying the ETag it sent
+    revalidated = client.get("/cached", headers={"Accept-Encoding": "gzip", "If-None-Match": gzipped.headers["etag"]})
+    assert revalidated.status_code == 304
+    assert revalidated.headers["etag"] == gzipped.headers["etag"]
+
+    revalidated = client.get("/cached", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert revalidated.status_code == 304
+    assert revalidated.headers["etag"] == etag
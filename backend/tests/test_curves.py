@@ -0,0 +1,107 @@
+"""
+Tests for alpha and score mapping curves.
+"""
+import numpy as np
+import pytest
+
+from app.db.models import BatchScenario, EmployeeData
+from app.db.scenario_crud import ScenarioPlaygroundDAL
+from app.services.calculation_engine import calculate_bonus, calculate_bonuses
+from app.services.curves import CurveError, clear_curve_cache, compile_curve, evaluate_curves
+from benchmarks.data import generate_payroll, seed_upload
+
+ALPHA_CURVE = {"input": "alpha", "type": "linear", "points": [[0, 0], [2, 1], [5, 2]]}
+SCORE_CURVE = {"input": "score", "type": "step", "points": [[1, 0], [3, 1], [4, 1.25], [5, 1.5]]}
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    clear_curve_cache()
+    yield
+    clear_curve_cache()
+
+
+def test_linear_curve_interpolates_and_holds_the_end_values():
+    curve = compile_curve(ALPHA_CURVE)
+    result = curve.evaluate([-1.0, 0.0, 1.0, 2.0, 3.5, 5.0, 9.0, np.nan])
+    assert result[:7].tolist() == [0.0, 0.0, 0.5, 1.0, 1.5, 2.0, 2.0]
+    assert np.isnan(result[7])
+
+
+def test_step_curve_takes_the_last_breakpoint_at_or_below():
+    curve = compile_curve(SCORE_CURVE)
+    result = curve.evaluate([0.0, 1.0, 2.9, 3.0, 4.5, 5.0, 6.0, np.nan])
+    assert result[:7].tolist() == [0.0, 0.0, 0.0, 1.0, 1.25, 1.5, 1.5]
+    assert np.isnan(result[7])
+
+
+def test_curves_are_cached_by_definition():
+    curve = compile_curve(ALPHA_CURVE)
+    assert compile_curve(dict(reversed(list(ALPHA_CURVE.items())))) is curve
+    assert compile_curve({**ALPHA_CURVE, "points": [[5, 2], [0, 0], [2, 1]]}) is not curve
+    assert not curve.xs.flags.writeable
+
+
+@pytest.mark.parametrize("definition, message", [
+    ({**ALPHA_CURVE, "type": "spline"}, "Curve type"),
+    ({"points": [[0, 1]]}, "input"),
+    ({**ALPHA_CURVE, "points": []}, "points"),
+    ({**ALPHA_CURVE, "points": [[0, "x"]]}, "pairs of numbers"),
+    ({**ALPHA_CURVE, "points": [[0, 1], [0, 2]]}, "distinct"),
+])
+def test_invalid_curves_are_rejected(definition, message):
+    with pytest.raises(CurveError, match=message):
+        compile_curve(definition)
+
+
+def test_missing_curve_input_is_reported():
+    with pytest.raises(CurveError, match="missing input 'alpha'"):
+        evaluate_curves({"investment_score_multiplier": ALPHA_CURVE}, {"score": [1.0]})
+
+
+def test_calculator_reads_multipliers_off_curves():
+    kwargs = dict(
+        base_salary=100000, target_bonus_pct=20, investment_weight=70, qualitative_weight=30,
+        investment_score_multiplier=1.0, qual_score_multiplier=1.0, raf=1.0
+    )
+    curves = {"investment_score_multiplier": ALPHA_CURVE, "qual_score_multiplier": SCORE_CURVE}
+    result = calculate_bonus(**kwargs, curves=curves, measures={"alpha": 3.5, "score": 4})
+    assert result["investment_component"] == pytest.approx(0.7 * 1.5)
+    assert result["qualitative_component"] == pytest.approx(0.3 * 1.25)
+
+    df = generate_payroll(100)
+    employees = {column: df[column].to_numpy() for column in kwargs}
+    employees.update(
+        is_mrt=df["is_mrt"].to_numpy(dtype=bool),
+        mrt_cap_pct=df["mrt_cap_pct"].fillna(200.0).to_numpy(),
+        alpha=np.linspace(-1, 6, 100),
+        score=np.linspace(0, 5, 100)
+    )
+    results = calculate_bonuses(employees, curves=curves)
+    for i in (0, 37, 99):
+        expected = calculate_bonus(
+            **{column: employees[column][i] for column in kwargs},
+            is_mrt=bool(employees["is_mrt"][i]),
+            mrt_cap_pct=employees["mrt_cap_pct"][i],
+            curves=curves,
+            measures={"alpha": employees["alpha"][i], "score": employees["score"][i]}
+        )
+        assert results["capped_bonus"][i] == pytest.approx(expected["capped_bonus"])
+
+
+def test_scenario_curves_feed_the_formula(test_db):
+    batch_upload = seed_upload(test_db, generate_payroll(20, teams=2))
+    scenario = BatchScenario(
+        session_id=batch_upload.session_id,
+        name="Stepped salary curve",
+        global_parameters={"curves": {
+            "salary_multiplier": {"input": "base_salary", "type": "step", "points": [[0, 0], [1, 1]]}
+        }},
+        parameters={"formula": {"steps": {"raf_bonus": "base_salary * salary_multiplier"}}}
+    )
+    test_db.add(scenario)
+    test_db.commit()
+
+    results, _ = ScenarioPlaygroundDAL.calculate_scenario(test_db, scenario.id)
+    salaries = sum(salary for salary, in test_db.query(EmployeeData.base_salary))
+    assert results["total_bonus_pool"] == pytest.approx(salaries)
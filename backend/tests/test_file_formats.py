@@ -0,0 +1,192 @@
+"""
+Tests for the upload readers (CSV, streamed Excel, Parquet, Arrow/Feather) and the
+columnar cache of parsed uploads.
+"""
+import datetime
+import io
+
+import pandas as pd
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.db import get_db
+from app.db.models import BatchUpload, EmployeeData, Session
+from app.routes.batch import router
+from app.services.file_processor import FileProcessor, UnsupportedFileFormatError
+from benchmarks.data import generate_payroll
+
+
+def _serialize(df, fmt):
+    buffer = io.BytesIO()
+    if fmt == "parquet":
+        df.to_parquet(buffer, index=False)
+    elif fmt == "feather":
+        df.to_feather(buffer)
+    else:
+        buffer.write(df.to_csv(index=False).encode())
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize("fmt", ["csv", "parquet", "feather"])
+def test_read_dataframe_projects_columns(fmt):
+    df = generate_payroll(10)
+    content = _serialize(df, fmt)
+
+    full = FileProcessor.read_dataframe(content, f"payroll.{fmt}")
+    assert list(full.columns) == list(df.columns)
+
+    projected = FileProcessor.read_dataframe(content, f"payroll.{fmt}", columns=["team", "raf", "not_in_file"])
+    assert sorted(projected.columns) == ["raf", "team"]
+    assert len(projected) == 10
+
+
+@pytest.mark.parametrize("fmt", ["csv", "parquet", "feather"])
+def test_read_dataframe_reads_only_leading_rows(fmt):
+    df = generate_payroll(50)
+    head = FileProcessor.read_dataframe(_serialize(df, fmt), f"payroll.{fmt}", columns=["raf"], nrows=7)
+    assert head["raf"].tolist() == df["raf"].iloc[:7].tolist()
+
+
+def test_describe_columns():
+    df = pd.DataFrame({
+        "id": ["a", "b", "c", "d"],
+        "salary": [1.5, None, 2.5, None],
+        "count": [1, 2, 3, 4],
+        "mrt": [True, False, True, True],
+    })
+    info = {column["name"]: column for column in FileProcessor.describe_columns(df, sample_size=2)}
+    assert info["id"] == {"name": "id", "sample": ["a", "b"], "dtype": "text", "null_ratio": 0.0}
+    assert (info["salary"]["dtype"], info["salary"]["null_ratio"]) == ("number", 0.5)
+    assert info["count"]["dtype"] == "integer"
+    assert info["mrt"]["dtype"] == "boolean"
+
+
+def _workbook(df):
+    """An XLSX workbook whose payroll sheet comes second, below two preamble rows."""
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(buffer, engine="openpyxl") as writer:
+        pd.DataFrame([["Exported from HR"]]).to_excel(writer, sheet_name="Notes", index=False, header=False)
+        df.to_excel(writer, sheet_name="Payroll", index=False, startrow=2)
+    return buffer.getvalue()
+
+
+def test_excel_sheet_and_header_row_selection():
+    df = generate_payroll(30)
+    content = _workbook(df)
+    assert FileProcessor.list_sheets(content, "payroll.xlsx") == ["Notes", "Payroll"]
+
+    streamed = FileProcessor.read_dataframe(content, "payroll.xlsx", sheet_name="Payroll", header_row=2)
+    # Whole-number floats come back from Excel as integers, as they do with pd.read_excel
+    pd.testing.assert_frame_equal(streamed, df, check_dtype=False)
+
+    projected = FileProcessor.read_dataframe(
+        content, "payroll.xlsx", columns=["employee_id", "raf"], sheet_name="Payroll", header_row=2
+    )
+    assert list(projected.columns) == ["employee_id", "raf"]
+
+    with pytest.raises(ValueError, match="Available sheets: Notes, Payroll"):
+        FileProcessor.read_dataframe(content, "payroll.xlsx", sheet_name="Missing")
+
+
+def test_xlsx_is_read_in_chunks(monkeypatch):
+    monkeypatch.setattr("app.services.file_processor.READ_CHUNK_ROWS", 10)
+    df = generate_payroll(25)
+    buffer = io.BytesIO()
+    df.to_excel(buffer, index=False)
+
+    read = FileProcessor.read_dataframe(buffer.getvalue(), "payroll.xlsx", columns=["team"])
+    assert read["team"].tolist() == df["team"].tolist()
+
+
+def test_read_dataframe_rejects_unknown_format():
+    with pytest.raises(UnsupportedFileFormatError, match="Parquet"):
+        FileProcessor.read_dataframe(b"data", "payroll.json")
+
+
+def test_columnar_cache_round_trip():
+    df = generate_payroll(25)
+    cache = FileProcessor.build_columnar_cache(df)
+
+    restored = FileProcessor.read_columnar_cache(cache)
+    assert restored.equals(df)
+    assert list(FileProcessor.read_columnar_cache(cache, ["base_salary"]).columns) == ["base_salary"]
+
+
+@pytest.fixture
+def parquet_upload(test_db):
+    """A Parquet upload awaiting mapping, whose salary column needs mapping."""
+    test_db.add(Session(id="s1", expires_at=datetime.datetime.now() + datetime.timedelta(hours=1)))
+    df = generate_payroll(20).rename(columns={"base_salary": "Salary"})
+    upload = BatchUpload(
+        session_id="s1", filename="payroll.parquet", status="awaiting_mapping",
+        raw_file_content=_serialize(df, "parquet")
+    )
+    test_db.add(upload)
+    test_db.commit()
+    return upload
+
+
+def test_map_and_process_parquet_upload_reuses_cache(test_db, parquet_upload):
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_db] = lambda: test_db
+    client = TestClient(app)
+    url = f"/uploads/{parquet_upload.id}/map_and_process"
+
+    # Without the salary mapping the upload fails validation before anything is stored
+    response = client.post(url, json={"column_mappings": {}})
+    assert response.status_code == 400
+    test_db.refresh(parquet_upload)
+    assert parquet_upload.status == "failed_processing"
+    assert parquet_upload.parsed_data is not None
+
+    # Mapping again reads the cached columns, not the raw file
+    parquet_upload.raw_file_content = b"no longer a parquet file"
+    test_db.commit()
+    response = client.post(url, json={"column_mappings": {"Salary": "base_salary"}})
+    assert response.status_code == 200, response.json()
+    assert response.json()["rows_saved"] == 20
+    assert test_db.query(EmployeeData).filter(EmployeeData.batch_upload_id == parquet_upload.id).count() == 20
+
+    # Once rows are stored the upload cannot be mapped again
+    assert client.post(url, json={"column_mappings": {"Salary": "base_salary"}}).status_code == 400
+
+
+def test_upload_reads_only_a_sample_for_mapping(test_db, monkeypatch):
+    monkeypatch.setattr("app.routes.batch.SNIFF_SAMPLE_ROWS", 10)
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_db] = lambda: test_db
+    client = TestClient(app)
+
+    response = client.post("/file", files={"file": ("payroll.csv", _serialize(generate_payroll(50), "csv"))})
+    assert response.status_code == 200, response.json()
+    body = response.json()
+    assert body["status"] == "awaiting_mapping"
+    assert body["validation_results"]["sampled_rows"] == 10
+    assert body["source_columns_info"][3] == {
+        "name": "base_salary", "sample": body["source_columns_info"][3]["sample"],
+        "dtype": "number", "null_ratio": 0.0
+    }
+
+
+def test_upload_excel_with_sheet_selection(test_db):
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_db] = lambda: test_db
+    client = TestClient(app)
+
+    content = _workbook(generate_payroll(5))
+    response = client.post(
+        "/file",
+        files={"file": ("payroll.xlsx", content)},
+        data={"sheet_name": "Payroll", "header_row": "2"}
+    )
+    assert response.status_code == 200, response.json()
+    body = response.json()
+    assert body["sheet_names"] == ["Notes", "Payroll"]
+    assert body["source_columns_info"][0]["name"] == "employee_id"
+
+    upload = test_db.get(BatchUpload, body["upload_id"])
+    assert (upload.sheet_name, upload.header_row) == ("Payroll", 2)
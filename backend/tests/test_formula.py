@@ -0,0 +1,170 @@
+"""
+Tests for the bonus formula compiler and the calculations that evaluate through it.
+"""
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.db import get_db
+from app.db.models import BatchScenario, EmployeeCalculationResult
+from app.db.scenario_crud import ScenarioPlaygroundDAL
+from app.routes.batch import router
+from app.services.calculation_engine import calculate_bonus, calculate_bonuses
+from app.services.formula import FormulaError, clear_formula_cache, compile_formula
+from benchmarks.data import generate_payroll, seed_upload
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    clear_formula_cache()
+    yield
+    clear_formula_cache()
+
+
+def _payroll_inputs(df):
+    return {
+        "base_salary": df["base_salary"].to_numpy(),
+        "target_bonus_pct": df["target_bonus_pct"].to_numpy(),
+        "investment_weight": df["investment_weight"].to_numpy(),
+        "qualitative_weight": df["qualitative_weight"].to_numpy(),
+        "investment_score_multiplier": df["investment_score_multiplier"].to_numpy(),
+        "qual_score_multiplier": df["qual_score_multiplier"].to_numpy(),
+        "raf": df["raf"].to_numpy(),
+        "is_mrt": df["is_mrt"].to_numpy(dtype=bool),
+        "mrt_cap_pct": df["mrt_cap_pct"].fillna(200.0).to_numpy(),
+    }
+
+
+def test_compiled_formulas_are_cached_by_definition():
+    first = compile_formula({"steps": {"a": "x * 2", "b": "a + y"}})
+    assert compile_formula({"steps": {"b": "a + y", "a": "x * 2"}}) is first
+    assert compile_formula({"steps": {"a": "x * 3", "b": "a + y"}}) is not first
+    assert first.inputs == {"x", "y"}
+    assert first.outputs == ("a", "b")
+
+
+def test_steps_are_evaluated_in_dependency_order():
+    plan = compile_formula({"steps": {
+        "total": "min(base, cap) if eligible and not frozen else 0",
+        "base": "salary * rate",
+    }})
+    results = plan.evaluate({"salary": [100.0, 200.0, 300.0], "rate": 0.5, "cap": 120.0,
+                             "eligible": [True, True, False], "frozen": False})
+    assert results["base"].tolist() == [50.0, 100.0, 150.0]
+    assert results["total"].tolist() == [50.0, 100.0, 0.0]
+
+
+@pytest.mark.parametrize("steps, message", [
+    ({"a": "b + 1", "b": "a * 2"}, "cycle"),
+    ({"a": "eval(x)"}, "unknown function 'eval'"),
+    ({"a": "x.__class__"}, "unsupported expression"),
+    ({"a": "x +"}, "not a valid expression"),
+    ({"min": "x"}, "cannot be used as a step name"),
+    ({"a": ["x"]}, "must be an expression string"),
+])
+def test_invalid_formulas_are_rejected(steps, message):
+    with pytest.raises(FormulaError, match=message):
+        compile_formula({"steps": steps})
+
+
+def test_missing_inputs_are_reported():
+    with pytest.raises(FormulaError, match="Formula inputs missing: y"):
+        compile_formula({"steps": {"a": "x + y"}}).evaluate({"x": 1.0})
+
+
+def test_huge_powers_are_out_of_range_rather_than_unbounded():
+    plan = compile_formula({"steps": {"x": "9**9**9**9"}})
+    with pytest.raises(FormulaError, match="out of range"):
+        plan.evaluate({})
+    with pytest.raises(FormulaError, match="out of range"):
+        plan.evaluate_scalar({})
+    with pytest.raises(FormulaError, match="too large"):
+        compile_formula({"steps": {"x": "1" + "0" * 400}})
+
+
+@pytest.mark.parametrize("expression", ["x / 0", "x % 0", "sqrt(-x)", "log10(x - 1)"])
+def test_scalar_arithmetic_errors_are_formula_errors(expression):
+    with pytest.raises(FormulaError, match="cannot be evaluated"):
+        compile_formula({"steps": {"a": expression}}).evaluate_scalar({"x": 1.0})
+
+
+def test_vectorized_calculation_matches_calculate_bonus():
+    df = generate_payroll(300, seed=5)
+    df.loc[::10, ["investment_weight", "qualitative_weight"]] = 0
+    df.loc[::7, "target_bonus_pct"] = 400.0
+    results = calculate_bonuses(_payroll_inputs(df))
+
+    for i, emp in enumerate(df.to_dict(orient="records")):
+        expected = calculate_bonus(
+            base_salary=emp["base_salary"],
+            target_bonus_pct=emp["target_bonus_pct"],
+            investment_weight=emp["investment_weight"],
+            qualitative_weight=emp["qualitative_weight"],
+            investment_score_multiplier=emp["investment_score_multiplier"],
+            qual_score_multiplier=emp["qual_score_multiplier"],
+            raf=emp["raf"],
+            is_mrt=bool(emp["is_mrt"]),
+            mrt_cap_pct=200.0 if np.isnan(emp["mrt_cap_pct"]) else emp["mrt_cap_pct"]
+        )
+        assert results["capped_bonus"][i] == pytest.approx(expected["capped_bonus"])
+        assert results["applied_cap"][i] == expected["applied_cap"]
+        assert results["policy_breach"][i] == expected["policy_breach"]
+
+
+def test_calculate_bonus_with_custom_formula():
+    kwargs = dict(
+        base_salary=100000, target_bonus_pct=20, investment_weight=70, qualitative_weight=30,
+        investment_score_multiplier=1.0, qual_score_multiplier=1.0, raf=1.0
+    )
+    assert calculate_bonus(**kwargs)["capped_bonus"] == pytest.approx(20000)
+
+    # Ignore qualitative performance and cap at the salary
+    formula = {"steps": {
+        "weighted_performance": "investment_component",
+        "base_salary_cap": "base_salary",
+    }}
+    result = calculate_bonus(**kwargs, formula=formula)
+    assert result["weighted_performance"] == pytest.approx(0.7)
+    assert result["capped_bonus"] == pytest.approx(14000)
+    assert result["policy_breach"] is False
+    assert result["applied_cap"] is None
+
+
+def test_scenario_formula_reads_scenario_parameters(test_db):
+    batch_upload = seed_upload(test_db, generate_payroll(40, teams=3))
+    default = BatchScenario(session_id=batch_upload.session_id, name="Default", global_parameters={})
+    custom = BatchScenario(
+        session_id=batch_upload.session_id,
+        name="Scaled",
+        global_parameters={"bonus_scale": 0.5},
+        parameters={"formula": {"steps": {"raf_bonus": "pre_raf_bonus * raf * bonus_scale"}}}
+    )
+    test_db.add_all([default, custom])
+    test_db.commit()
+
+    default_results, _ = ScenarioPlaygroundDAL.calculate_scenario(test_db, default.id)
+    custom_results, teams = ScenarioPlaygroundDAL.calculate_scenario(test_db, custom.id)
+    assert custom_results["total_bonus_pool"] == pytest.approx(default_results["total_bonus_pool"] / 2)
+    assert sum(team["total_final_bonus"] for team in teams) == pytest.approx(custom_results["total_bonus_pool"])
+
+    custom.parameters = {"formula": {"steps": {"raf_bonus": "pre_raf_bonus * missing"}}}
+    test_db.commit()
+    with pytest.raises(ValueError, match="missing"):
+        ScenarioPlaygroundDAL.calculate_scenario(test_db, custom.id)
+
+
+def test_batch_calculation_evaluates_the_calculator_formula(test_db):
+    df = generate_payroll(30, teams=3)
+    batch_upload = seed_upload(test_db, df)
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_db] = lambda: test_db
+
+    response = TestClient(app).post(f"/uploads/{batch_upload.id}/calculate_and_retrieve_results")
+    assert response.status_code == 200, response.json()
+
+    expected = calculate_bonuses(_payroll_inputs(df))
+    stored = test_db.query(EmployeeCalculationResult).order_by(EmployeeCalculationResult.employee_data_id).all()
+    assert [result.final_bonus for result in stored] == pytest.approx(expected["capped_bonus"].tolist())
+    assert response.json()["total_bonus_pool"] == pytest.approx(expected["capped_bonus"].sum())
@@ -0,0 +1,130 @@
+"""
+Tests for fund-level alpha uploads and AUM-weighted alphas.
+"""
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.db import get_db
+from app.db.crud import EmployeeFundAlphaDAL
+from app.db.models import BatchScenario, EmployeeData, EmployeeFundAlpha
+from app.db.scenario_crud import ScenarioPlaygroundDAL
+from app.routes.batch import router
+from app.services.calculation_engine import calculate_weighted_alphas
+from app.services.file_processor import FileProcessor
+from benchmarks.data import generate_fund_alphas, generate_payroll, payroll_csv, seed_upload
+
+
+@pytest.fixture
+def client(test_db):
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_db] = lambda: test_db
+    return TestClient(app)
+
+
+def _upload_funds(client, upload_id, funds):
+    return client.post(
+        f"/uploads/{upload_id}/fund-alphas",
+        files={"file": ("funds.csv", payroll_csv(funds), "text/csv")}
+    )
+
+
+def test_weighted_alphas_are_combined_per_employee():
+    ids, weighted, counts = calculate_weighted_alphas(
+        [3, 1, 3, 2, 1, 2],
+        [1.0, 2.0, 3.0, 5.0, 4.0, -1.0],
+        [1.0, 1.0, 3.0, 0.0, 3.0, 0.0]
+    )
+    assert ids.tolist() == [1, 2, 3]
+    # Employee 2's funds have no weight, so their alphas are averaged
+    assert weighted.tolist() == pytest.approx([3.5, 2.0, 2.5])
+    assert counts.tolist() == [2, 2, 2]
+
+    ids, weighted, counts = calculate_weighted_alphas([], [], [])
+    assert len(ids) == len(weighted) == len(counts) == 0
+
+
+def test_fund_alpha_file_columns_are_matched_by_alias():
+    content = b"Emp ID,Fund Name,Fund Alpha,AUM\n E1 ,F1,0.5,100\nE2,F2,-1,0\n"
+    funds = FileProcessor.read_fund_alphas(content, "funds.csv")
+    assert list(funds.columns) == ["employee_id", "fund", "alpha", "aum_weight"]
+    assert funds["employee_id"].tolist() == ["E1", "E2"]
+    assert funds["alpha"].tolist() == [0.5, -1.0]
+
+    with pytest.raises(ValueError, match="no 'aum_weight' column"):
+        FileProcessor.read_fund_alphas(b"employee_id,fund,alpha\nE1,F1,0.5\n", "funds.csv")
+    with pytest.raises(ValueError, match=r"2 fund alpha rows .* \(rows 3, 4\)"):
+        FileProcessor.read_fund_alphas(
+            b"employee_id,fund,alpha,aum_weight\nE1,F1,0.5,1\nE2,F2,x,1\nE3,F3,0.1,-5\n", "funds.csv"
+        )
+
+
+def test_fund_alpha_upload_stores_and_replaces_rows(client, test_db):
+    payroll = generate_payroll(30, teams=3)
+    batch_upload = seed_upload(test_db, payroll)
+    funds = generate_fund_alphas(payroll, funds_per_employee=4)
+    funds.loc[:4, "employee_id"] = "UNKNOWN"
+
+    response = _upload_funds(client, batch_upload.id, funds)
+    assert response.status_code == 200, response.json()
+    body = response.json()
+    assert body["rows_saved"] == 115
+    assert body["unmatched_rows"] == 5
+    assert body["unmatched_employee_ids"] == ["UNKNOWN"]
+
+    response = _upload_funds(client, batch_upload.id, funds.iloc[5:25])
+    assert response.json()["rows_saved"] == 20
+    assert test_db.query(EmployeeFundAlpha).count() == 20
+
+    assert _upload_funds(client, 999999, funds).status_code == 404
+    assert _upload_funds(client, batch_upload.id, funds.drop(columns="alpha")).status_code == 400
+
+
+def test_stored_weighted_alphas_match_the_segmented_computation(client, test_db):
+    payroll = generate_payroll(25, teams=2)
+    batch_upload = seed_upload(test_db, payroll)
+    funds = generate_fund_alphas(payroll, funds_per_employee=6)
+    funds.loc[funds["employee_id"] == payroll["employee_id"][0], "aum_weight"] = 0.0
+    assert _upload_funds(client, batch_upload.id, funds).status_code == 200
+
+    response = client.get(f"/uploads/{batch_upload.id}/weighted-alphas")
+    assert response.status_code == 200
+    stored = {row["employee_id"]: row for row in response.json()}
+
+    ids, weighted, counts = calculate_weighted_alphas(
+        funds["employee_id"].to_numpy(), funds["alpha"].to_numpy(), funds["aum_weight"].to_numpy()
+    )
+    assert sorted(stored) == ids.tolist()
+    for employee_id, alpha, count in zip(ids, weighted, counts):
+        assert stored[employee_id]["weighted_alpha"] == pytest.approx(alpha)
+        assert stored[employee_id]["fund_count"] == count
+
+
+def test_scenario_curves_read_weighted_alphas(test_db):
+    payroll = generate_payroll(20, teams=2)
+    batch_upload = seed_upload(test_db, payroll)
+    employees = test_db.query(EmployeeData).order_by(EmployeeData.id).all()
+    # Half the employees manage funds with an alpha of 2, the rest have none
+    EmployeeFundAlphaDAL.replace_fund_alphas(test_db, batch_upload.id, [
+        {"employee_data_id": employee.id, "fund": fund, "alpha": 2.0, "aum_weight": 10.0}
+        for employee in employees[:10] for fund in ("F1", "F2")
+    ])
+    scenario = BatchScenario(
+        session_id=batch_upload.session_id,
+        name="Alpha curve",
+        global_parameters={"curves": {
+            "alpha_multiplier": {"input": "alpha", "type": "linear", "points": [[0, 0], [4, 2]]}
+        }},
+        parameters={"formula": {"steps": {
+            "raf_bonus": "base_salary * where(alpha_multiplier == alpha_multiplier, alpha_multiplier, 0)"
+        }}}
+    )
+    test_db.add(scenario)
+    test_db.commit()
+
+    results, _ = ScenarioPlaygroundDAL.calculate_scenario(test_db, scenario.id)
+    expected = sum(employee.base_salary for employee in employees[:10])
+    assert results["total_bonus_pool"] == pytest.approx(expected)
+    assert np.isfinite(results["total_bonus_pool"])
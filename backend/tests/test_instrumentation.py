@@ -0,0 +1,40 @@
+"""
+Tests for stage timing instrumentation, /metrics and the Server-Timing header.
+"""
+from app.utils.instrumentation import Histogram, format_server_timing, timed, STAGE_DURATION
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("test_seconds", "Test histogram.", ("stage",), buckets=(0.1, 1.0))
+    histogram.observe(0.05, stage="parse")
+    histogram.observe(0.5, stage="parse")
+    histogram.observe(5.0, stage="parse")
+
+    lines = histogram.render()
+    assert "# TYPE test_seconds histogram" in lines
+    assert 'test_seconds_bucket{stage="parse",le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{stage="parse",le="1.0"} 2' in lines
+    assert 'test_seconds_bucket{stage="parse",le="+Inf"} 3' in lines
+    assert 'test_seconds_count{stage="parse"} 3' in lines
+
+
+def test_server_timing_sums_repeated_stages():
+    header = format_server_timing([("insert", 0.010), ("compute", 0.002), ("insert", 0.005)])
+    assert header == "insert;dur=15.000, compute;dur=2.000"
+
+
+def test_timed_records_stage_outside_requests():
+    before = STAGE_DURATION.snapshot().get(("unit-test",), {"count": 0})["count"]
+    with timed("unit-test"):
+        pass
+    assert STAGE_DURATION.snapshot()[("unit-test",)]["count"] == before + 1
+
+
+def test_metrics_endpoint_and_server_timing_header(client):
+    response = client.get("/health")
+    assert "total;dur=" in response.headers["server-timing"]
+
+    metrics = client.get("/metrics")
+    assert metrics.status_code == 200
+    assert metrics.headers["content-type"].startswith("text/plain")
+    assert 'compcalc_http_request_duration_seconds_count{method="GET",endpoint="health_check",status="200"}' in metrics.text
@@ -0,0 +1,148 @@
+"""
+Tests for multi-file and zip archive uploads.
+"""
+import datetime
+import io
+import zipfile
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.db import get_db
+from app.db.crud import ImportTemplateDAL
+from app.db.models import BatchUpload, EmployeeData, Session
+from app.db.template_cache import template_cache
+from app.routes.batch import router
+from app.services.file_processor import FileProcessor
+from benchmarks.data import generate_payroll, payroll_csv, seed_upload
+
+
+@pytest.fixture
+def client(test_db):
+    template_cache.clear()
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_db] = lambda: test_db
+    yield TestClient(app)
+    template_cache.clear()
+
+
+def _regions(count, rows=5):
+    """Payroll CSVs for ``count`` regions, with distinct employee IDs."""
+    files = []
+    for region in range(count):
+        df = generate_payroll(rows, seed=region)
+        df["employee_id"] = [f"R{region}-{i}" for i in range(rows)]
+        files.append((f"region_{region}.csv", payroll_csv(df)))
+    return files
+
+
+def _zip(files):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, content in files:
+            archive.writestr(name, content)
+    return buffer.getvalue()
+
+
+def test_expand_archives():
+    files = _regions(2)
+    archive = _zip(files + [("__MACOSX/._region_0.csv", b""), (".DS_Store", b"")])
+    expanded = FileProcessor.expand_archives([("extra.csv", b"a,b"), ("regions.zip", archive)])
+    assert [name for name, _ in expanded] == ["extra.csv", "region_0.csv", "region_1.csv"]
+    assert expanded[1][1] == files[0][1]
+
+    with pytest.raises(ValueError, match="not a valid zip archive"):
+        FileProcessor.expand_archives([("broken.zip", b"not a zip")])
+
+
+def test_expand_archives_limits_uncompressed_size(monkeypatch):
+    monkeypatch.setattr("app.services.file_processor.MAX_ARCHIVE_BYTES", 100)
+    with pytest.raises(ValueError, match="exceed the limit"):
+        FileProcessor.expand_archives([("regions.zip", _zip(_regions(1)))])
+
+
+def test_iter_processed_members_keeps_file_order():
+    files = _regions(6)
+    results = list(FileProcessor.iter_processed_members(files))
+    assert [summary["filename"] for _, summary in results] == [name for name, _ in files]
+    assert all(summary["valid"] and df is not None for df, summary in results)
+
+
+def test_each_file_is_stored_in_one_transaction(test_db):
+    payroll = generate_payroll(5)
+    batch_upload = seed_upload(test_db, payroll.iloc[:0])
+    commits = []
+    record = commits.append
+    event.listen(test_db, "after_commit", record)
+    try:
+        assert FileProcessor.save_to_database(test_db, FileProcessor.clean_data(payroll.copy()), batch_upload) == (5, [])
+        assert len(commits) == 1
+
+        # A row that cannot be stored is reported, and the others are still stored
+        df = FileProcessor.clean_data(payroll.copy())
+        df.loc[2, "base_salary"] = None
+        saved_count, errors = FileProcessor.save_to_database(test_db, df, batch_upload)
+    finally:
+        event.remove(test_db, "after_commit", record)
+    assert saved_count == 4
+    assert [error["row"] for error in errors] == [4]
+    assert test_db.query(EmployeeData).filter(EmployeeData.batch_upload_id == batch_upload.id).count() == 9
+
+
+def test_upload_files_loads_valid_files_into_one_batch(client, test_db):
+    bad = generate_payroll(3)
+    bad["raf"] = 5.0
+    files = _regions(3) + [("bad.csv", payroll_csv(bad)), ("notes.txt", b"hello")]
+
+    response = client.post("/files", files=[("files", (name, content)) for name, content in files])
+    assert response.status_code == 200, response.json()
+    body = response.json()
+
+    assert body["status"] == "completed"
+    assert body["rows_saved"] == 15
+    assert body["files_loaded"] == 3
+    assert [summary["rows_saved"] for summary in body["files"]] == [5, 5, 5, 0, 0]
+    assert body["files"][3]["range_errors"] == {"raf_max": [2, 3, 4]}
+    assert "Unsupported file format" in body["files"][4]["error"]
+    assert body["error_message"] == "2 of 5 files were not fully loaded: bad.csv, notes.txt"
+
+    upload = test_db.get(BatchUpload, body["upload_id"])
+    assert upload.filename == "5_files.zip"
+    assert zipfile.ZipFile(io.BytesIO(upload.raw_file_content)).namelist() == [name for name, _ in files]
+    assert test_db.query(EmployeeData).filter(EmployeeData.batch_upload_id == upload.id).count() == 15
+
+
+def test_upload_zip_archive_with_template(client, test_db):
+    test_db.add(Session(id="s1", expires_at=datetime.datetime.now() + datetime.timedelta(hours=1)))
+    test_db.commit()
+    column_mappings = {column: column for column in generate_payroll(1).columns}
+    column_mappings.update({"Staff ID": "employee_id", "Salary": "base_salary"})
+    template = ImportTemplateDAL.create_template(
+        test_db, session_id="s1", name="Regional export", column_mappings=column_mappings
+    )
+    files = [
+        (name, content.replace(b"employee_id", b"Staff ID", 1).replace(b"base_salary", b"Salary", 1))
+        for name, content in _regions(2)
+    ]
+
+    response = client.post(
+        "/files",
+        files={"files": ("regions.zip", _zip(files))},
+        data={"template_id": str(template.id)},
+        cookies={"session_id": "s1"}
+    )
+    assert response.status_code == 200, response.json()
+    body = response.json()
+    assert (body["filename"], body["session_id"], body["rows_saved"]) == ("regions.zip", "s1", 10)
+    assert all(summary["template_applied"] for summary in body["files"])
+
+    employee_ids = {row.employee_id for row in test_db.query(EmployeeData.employee_id)}
+    assert "R1-4" in employee_ids
+
+
+def test_upload_files_rejects_unknown_template(client):
+    response = client.post("/files", files={"files": ("a.csv", b"x")}, data={"template_id": "999"})
+    assert response.status_code == 404
@@ -0,0 +1,70 @@
+"""
+Tests for validating large uploads in parallel row chunks.
+"""
+import pytest
+
+from app.services import parallel_validation
+from app.services.file_processor import FileProcessor
+from benchmarks.data import generate_payroll
+
+
+@pytest.fixture(scope="module", autouse=True)
+def small_pool():
+    parallel_validation.shutdown_pool()
+    patch = pytest.MonkeyPatch()
+    patch.setattr(parallel_validation, "VALIDATION_WORKERS", 2)
+    yield
+    parallel_validation.shutdown_pool()
+    patch.undo()
+
+
+def _payroll_with_errors():
+    df = generate_payroll(40)
+    df.loc[3, "raf"] = 5.0
+    df.loc[17, "base_salary"] = -1.0
+    df.loc[31, "investment_weight"] = 10.0
+    df.loc[38, "raf"] = -0.5
+    return df
+
+
+def _sequential(df):
+    _, type_errors = FileProcessor.validate_data_types(df.copy())
+    _, range_errors = FileProcessor.validate_data_ranges(df.copy())
+    return type_errors, range_errors
+
+
+def test_chunks_report_rows_of_the_whole_file():
+    df = _payroll_with_errors()
+    type_errors, range_errors = parallel_validation.validate_in_chunks(df, chunk_rows=7)
+    assert (type_errors, range_errors) == _sequential(df)
+    assert range_errors["raf_max"] == [5]
+    assert range_errors["raf_min"] == [40]
+    assert range_errors["weight_sum"] == [33]
+
+
+def test_columns_arrow_cannot_hold_are_sent_as_chunks():
+    df = _payroll_with_errors()
+    df["base_salary"] = df["base_salary"].astype(object)
+    df.loc[22, "base_salary"] = "n/a"
+    assert parallel_validation._share_frame(df) is None
+
+    type_errors, range_errors = parallel_validation.validate_in_chunks(df, chunk_rows=10)
+    assert type_errors == {"base_salary": [24]}
+    assert (type_errors, range_errors) == _sequential(df)
+
+
+def test_validate_dataframe_uses_chunks_for_large_files(monkeypatch):
+    monkeypatch.setattr(parallel_validation, "PARALLEL_VALIDATION_MIN_ROWS", 10)
+    calls = []
+    monkeypatch.setattr(
+        "app.services.file_processor.validate_in_chunks",
+        lambda df: calls.append(len(df)) or parallel_validation.validate_in_chunks(df, chunk_rows=15)
+    )
+
+    results = FileProcessor.validate_dataframe(_payroll_with_errors())
+    assert calls == [40]
+    assert results["valid"] is False
+    assert results["range_errors"]["base_salary_min"] == [19]
+
+    assert FileProcessor.validate_dataframe(generate_payroll(9))["valid"] is True
+    assert calls == [40]
@@ -0,0 +1,164 @@
+"""
+Tests for per-employee parameter overrides in the vectorized calculations.
+"""
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.db import get_db
+from app.db.models import BatchScenario, EmployeeCalculationResult, EmployeeData
+from app.db.scenario_crud import ScenarioPlaygroundDAL
+from app.routes.batch import router
+from app.services.calculation_engine import (
+    calculate_bonus, calculate_bonuses, evaluate_with_overrides, group_overrides
+)
+from app.services.formula import FormulaError
+from benchmarks.data import generate_payroll, seed_upload
+
+INPUTS = (
+    "base_salary", "target_bonus_pct", "investment_weight", "qualitative_weight",
+    "investment_score_multiplier", "qual_score_multiplier", "raf"
+)
+
+
+def _payroll_inputs(df):
+    employees = {column: df[column].to_numpy() for column in INPUTS}
+    employees["is_mrt"] = df["is_mrt"].to_numpy(dtype=bool)
+    employees["mrt_cap_pct"] = df["mrt_cap_pct"].fillna(200.0).to_numpy()
+    return employees
+
+
+def test_identical_overrides_share_a_bucket():
+    overrides = [None, {"raf": 1.0, "target_bonus_pct": 5}, {}, {"target_bonus_pct": 5, "raf": 1.0},
+                 {"formula": {"steps": {"a": "1"}}}, None]
+    buckets = group_overrides(overrides)
+    assert [(override, positions.tolist()) for override, positions in buckets] == [
+        ({}, [0, 2, 5]),
+        ({"raf": 1.0, "target_bonus_pct": 5}, [1, 3]),
+        ({"formula": {"steps": {"a": "1"}}}, [4]),
+    ]
+    assert group_overrides([]) == []
+
+
+def test_buckets_are_evaluated_as_slices_and_scattered_back():
+    calls = []
+
+    def evaluate(inputs, override):
+        calls.append((len(inputs["x"]), override))
+        result = {"y": inputs["x"] * override.get("scale", 1)}
+        if not override:
+            result["only_default"] = np.zeros(len(inputs["x"]))
+        return result
+
+    x = np.arange(6)
+    results = evaluate_with_overrides({"x": x}, [None, {"scale": 0.5}, None, None, {"scale": 0.5}, None], evaluate)
+    # The default bucket is evaluated unsliced; integer results are widened for the float bucket
+    assert calls == [(6, {}), (2, {"scale": 0.5})]
+    assert results["y"].tolist() == [0.0, 0.5, 2.0, 3.0, 2.0, 5.0]
+    assert "only_default" not in results
+
+    calls.clear()
+    assert evaluate_with_overrides({"x": x}, [None] * 6, evaluate)["y"] is not None
+    assert calls == [(6, {})]
+
+
+def test_overridden_employees_match_calculate_bonus():
+    df = generate_payroll(200, seed=11)
+    employees = _payroll_inputs(df)
+    overrides = [None] * len(df)
+    for i in range(0, len(df), 17):
+        overrides[i] = {"target_bonus_pct": 400.0, "is_mrt": True, "mrt_cap_pct": 150.0}
+    for i in range(5, len(df), 23):
+        overrides[i] = {"raf": 1.0, "formula": {"steps": {"weighted_performance": "investment_component"}}}
+    overrides[1] = {"note": "ignored"}
+
+    results = calculate_bonuses(employees, overrides=overrides)
+    for i in range(len(df)):
+        kwargs = {column: employees[column][i] for column in INPUTS}
+        kwargs.update(is_mrt=bool(employees["is_mrt"][i]), mrt_cap_pct=employees["mrt_cap_pct"][i])
+        override = dict(overrides[i] or {})
+        formula = override.pop("formula", None)
+        kwargs.update((name, value) for name, value in override.items() if name in kwargs)
+        expected = calculate_bonus(**kwargs, formula=formula)
+        assert results["capped_bonus"][i] == pytest.approx(expected["capped_bonus"])
+        assert results["applied_cap"][i] == expected["applied_cap"]
+
+    with pytest.raises(FormulaError, match="formula override"):
+        calculate_bonuses(employees, overrides=[{"formula": "x"}] + [None] * (len(df) - 1))
+
+
+def test_scenario_applies_employee_overrides(test_db):
+    batch_upload = seed_upload(test_db, generate_payroll(30, teams=3))
+    scenario = BatchScenario(session_id=batch_upload.session_id, name="Default", global_parameters={})
+    test_db.add(scenario)
+    test_db.commit()
+    employees = test_db.query(EmployeeData).order_by(EmployeeData.id).all()
+    others = [employee.id for employee in employees[5:]]
+    baseline, _ = ScenarioPlaygroundDAL.calculate_scenario(test_db, scenario.id, employee_data_ids=others)
+
+    for employee in employees[:3]:
+        employee.parameter_overrides = {"raf": 0.0}
+    employees[3].parameter_overrides = {"formula": {"steps": {"final_bonus": "base_salary"}}}
+    employees[4].parameter_overrides = {"custom_param": "value"}
+    test_db.commit()
+
+    results, teams = ScenarioPlaygroundDAL.calculate_scenario(test_db, scenario.id)
+    unchanged, _ = ScenarioPlaygroundDAL.calculate_scenario(test_db, scenario.id, employee_data_ids=others)
+    excluded, _ = ScenarioPlaygroundDAL.calculate_scenario(
+        test_db, scenario.id, employee_data_ids=[employee.id for employee in employees[:3]]
+    )
+    fourth, _ = ScenarioPlaygroundDAL.calculate_scenario(test_db, scenario.id, employee_data_ids=[employees[3].id])
+    assert unchanged["total_bonus_pool"] == pytest.approx(baseline["total_bonus_pool"])
+    assert excluded["total_bonus_pool"] == 0
+    assert fourth["total_bonus_pool"] == pytest.approx(employees[3].base_salary)
+    assert sum(team["total_final_bonus"] for team in teams) == pytest.approx(results["total_bonus_pool"])
+
+
+def test_batch_calculation_applies_employee_overrides(test_db):
+    df = generate_payroll(20, teams=2)
+    batch_upload = seed_upload(test_db, df)
+    employees = test_db.query(EmployeeData).order_by(EmployeeData.id).all()
+    employees[0].parameter_overrides = {"target_bonus_pct": 0}
+    test_db.commit()
+
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_db] = lambda: test_db
+    response = TestClient(app).post(f"/uploads/{batch_upload.id}/calculate_and_retrieve_results")
+    assert response.status_code == 200, response.json()
+
+    stored = {
+        result.employee_data_id: result.final_bonus
+        for result in test_db.query(EmployeeCalculationResult)
+    }
+    expected = calculate_bonuses(_payroll_inputs(df))["capped_bonus"]
+    assert stored[employees[0].id] == 0
+    assert [stored[employee.id] for employee in employees[1:]] == pytest.approx(expected[1:].tolist())
+
+
+@pytest.mark.parametrize("override", [{"formula": "bad"}, {"curves": [1]}, {"formula": {"steps": {"a": "x +"}}}])
+def test_malformed_overrides_are_rejected(test_db, override):
+    batch_upload = seed_upload(test_db, generate_payroll(3))
+    employee = test_db.query(EmployeeData).order_by(EmployeeData.id).first()
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_db] = lambda: test_db
+    client = TestClient(app)
+
+    fields = {column: getattr(employee, column) for column in INPUTS}
+    response = client.post("/employees", json={**fields, "batch_upload_id": batch_upload.id, "parameter_overrides": override})
+    assert response.status_code == 422
+    assert response.json()["detail"].startswith("Invalid parameter overrides")
+    response = client.put(f"/employees/{employee.id}", json={"parameter_overrides": override})
+    assert response.status_code == 422
+    test_db.refresh(employee)
+    assert not employee.parameter_overrides
+    assert client.put(f"/employees/{employee.id}", json={"parameter_overrides": {"raf": 1.0}}).status_code == 200
+
+    # Overrides stored before they were validated fail the calculation with their error
+    employee.parameter_overrides = override
+    test_db.commit()
+    response = client.post(f"/uploads/{batch_upload.id}/calculate_and_retrieve_results")
+    assert response.status_code == 422
+    assert response.json()["detail"].startswith("Invalid parameter overrides")
@@ -0,0 +1,188 @@
+"""
+Tests for the fast response path of bulk endpoints.
+"""
+import datetime
+import json
+
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from pydantic import ValidationError
+
+from app.db import get_async_db, get_db
+from app.db import schemas
+from app.db.models import EmployeeData
+from app.routes.batch import router
+from app.utils import responses
+from app.utils.responses import FastJSONResponse, row_adapter, validate_rows
+from benchmarks.data import generate_payroll, seed_upload
+
+
+def _row(**values):
+    row = {
+        "id": 1, "batch_result_id": 2, "employee_data_id": 3, "investment_component": 0.6,
+        "qualitative_component": 0.4, "weighted_performance": 1.0, "pre_raf_bonus": 20000.0,
+        "final_bonus": 20000.0, "bonus_to_salary_ratio": 0.2, "policy_breach": False, "applied_cap": None,
+        "created_at": datetime.datetime(2024, 5, 1, 12, 30), "updated_at": datetime.datetime(2024, 5, 1, 12, 30)
+    }
+    row.update(values)
+    return row
+
+
+def test_rows_are_validated_against_the_schema_in_one_call():
+    assert row_adapter(schemas.EmployeeCalculationResult) is row_adapter(schemas.EmployeeCalculationResult)
+
+    rows = validate_rows(schemas.EmployeeCalculationResult, [_row(final_bonus="1.5", scenario_id=9)])
+    assert rows[0]["final_bonus"] == 1.5
+    assert "scenario_id" not in rows[0]
+
+    with pytest.raises(ValidationError):
+        validate_rows(schemas.EmployeeCalculationResult, [_row(final_bonus="lots")])
+
+
+def test_validation_can_be_skipped_for_trusted_rows(monkeypatch):
+    monkeypatch.setattr(responses, "VALIDATE_BULK_RESPONSES", False)
+    rows = [_row(final_bonus="lots")]
+    assert validate_rows(schemas.EmployeeCalculationResult, rows) is rows
+
+
+def test_fast_json_response_matches_pydantic_output():
+    row = _row(final_bonus=np.float64(12.5), applied_cap="MRT Cap")
+    body = FastJSONResponse(content=[row]).body
+    expected = schemas.EmployeeCalculationResult.model_validate(row).model_dump(mode="json")
+    assert json.loads(body) == [expected]
+
+
+def test_fast_json_response_without_orjson(monkeypatch):
+    monkeypatch.setattr(responses, "orjson", None)
+    body = FastJSONResponse(content={"at": datetime.date(2024, 5, 1), "values": np.arange(3)}).body
+    assert json.loads(body) == {"at": "2024-05-01", "values": [0, 1, 2]}
+
+
+def test_calculation_endpoints_serve_the_same_rows(test_db):
+    batch_upload = seed_upload(test_db, generate_payroll(25, teams=3))
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_db] = lambda: test_db
+    client = TestClient(app)
+
+    response = client.post(f"/uploads/{batch_upload.id}/calculate_and_retrieve_results")
+    assert response.status_code == 200, response.json()
+    calculated = response.json()
+    assert len(calculated["employee_results"]) == 25
+    assert len(calculated["team_summaries"]) == 3
+    assert calculated["total_bonus_pool"] == pytest.approx(
+        sum(result["final_bonus"] for result in calculated["employee_results"])
+    )
+    # The body matches the declared response model
+    schemas.BatchCalculationResultWithEmployees.model_validate(calculated)
+
+    detailed = client.get(f"/calculations/{calculated['id']}/detailed").json()
+    assert detailed["employee_results"] == calculated["employee_results"]
+    listed = client.get(f"/calculations/{calculated['id']}/employee-results").json()
+    assert listed == calculated["employee_results"]
+    assert client.get("/calculations/999999/employee-results").status_code == 404
+
+
+def test_bulk_format_is_negotiated_from_the_accept_header():
+    assert responses.negotiate_media_type(None) == responses.JSON_MEDIA_TYPE
+    assert responses.negotiate_media_type("*/*") == responses.JSON_MEDIA_TYPE
+    assert responses.negotiate_media_type("text/html") == responses.JSON_MEDIA_TYPE
+    assert responses.negotiate_media_type(
+        "application/json;q=0.5, application/vnd.apache.arrow.stream"
+    ) == responses.ARROW_STREAM_MEDIA_TYPE
+    assert responses.negotiate_media_type("application/x-ndjson, */*;q=0.1") == responses.NDJSON_MEDIA_TYPE
+    assert responses.negotiate_media_type(
+        "application/*;q=0.2, application/json;q=0"
+    ) == responses.ARROW_STREAM_MEDIA_TYPE
+
+
+def test_bulk_endpoints_serve_arrow_streams_and_ndjson(test_db, monkeypatch):
+    pyarrow = pytest.importorskip("pyarrow")
+    import pyarrow.ipc
+
+    batch_upload = seed_upload(test_db, generate_payroll(30, teams=3))
+    first = test_db.query(EmployeeData).filter_by(batch_upload_id=batch_upload.id).order_by(EmployeeData.id).first()
+    first.parameter_overrides = {"raf": 1.0}
+    test_db.commit()
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_db] = lambda: test_db
+    client = TestClient(app)
+    url = f"/uploads/{batch_upload.id}/employees"
+    as_json = client.get(url).json()
+    assert len(as_json) == 30
+
+    response = client.get(url, headers={"Accept": responses.ARROW_STREAM_MEDIA_TYPE})
+    assert response.headers["content-type"] == responses.ARROW_STREAM_MEDIA_TYPE
+    table = pyarrow.ipc.open_stream(response.content).read_all()
+    assert table.schema.field("base_salary").type == pyarrow.float64()
+    assert table.schema.field("is_mrt").type == pyarrow.bool_()
+    assert table.column("id").to_pylist() == [row["id"] for row in as_json]
+    assert table.column("base_salary").to_pylist() == [row["base_salary"] for row in as_json]
+    assert json.loads(table.column("parameter_overrides")[0].as_py()) == {"raf": 1.0}
+
+    monkeypatch.setattr(responses, "NDJSON_CHUNK_ROWS", 7)
+    response = client.get(url + "?team=Team 001", headers={"Accept": responses.NDJSON_MEDIA_TYPE})
+    assert response.headers["content-type"] == responses.NDJSON_MEDIA_TYPE
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines == [row for row in as_json if row["team"] == "Team 001"]
+
+
+def test_etags_match_if_none_match_headers():
+    etag = responses.make_etag("calculation", 1, 25)
+    assert etag == responses.make_etag("calculation", 1, 25)
+    assert etag != responses.make_etag("calculation", 1, 26)
+    assert etag.startswith('"') and etag.endswith('"')
+
+    assert responses.etag_matches(etag, etag)
+    assert responses.etag_matches(f'"other", W/{etag}', etag)
+    assert responses.etag_matches("*", etag)
+    assert not responses.etag_matches(None, etag)
+    assert not responses.etag_matches('"other"', etag)
+
+    # Compressed bodies of the same representation carry the coding in their ETag
+    assert responses.encoded_etag(etag, "gzip") == f'{etag[:-1]}-gzip"'
+    assert responses.etag_matches(responses.encoded_etag(etag, "br"), etag)
+    assert not responses.etag_matches(responses.encoded_etag(etag, "br"), responses.make_etag("calculation", 1, 26))
+
+
+def test_stored_calculations_answer_conditional_gets(test_db_file, test_async_db):
+    batch_upload = seed_upload(test_db_file, generate_payroll(10, teams=2))
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_db] = lambda: test_db_file
+    app.dependency_overrides[get_async_db] = test_async_db
+    client = TestClient(app)
+    result_id = client.post(f"/uploads/{batch_upload.id}/calculate_and_retrieve_results").json()["id"]
+
+    etags = {}
+    for url in (f"/calculations/{result_id}", f"/calculations/{result_id}/detailed",
+                f"/calculations/{result_id}/employee-results"):
+        response = client.get(url)
+        assert response.status_code == 200
+        assert "immutable" in response.headers["cache-control"]
+        etags[url] = response.headers["etag"]
+
+        not_modified = client.get(url, headers={"If-None-Match": etags[url]})
+        assert not_modified.status_code == 304
+        assert not_modified.content == b""
+        assert not_modified.headers["etag"] == etags[url]
+        assert client.get(url, headers={"If-None-Match": '"stale"'}).status_code == 200
+    assert len(set(etags.values())) == 3
+
+    # Each format of the employee results is its own representation
+    url = f"/calculations/{result_id}/employee-results"
+    ndjson = client.get(url, headers={"Accept": responses.NDJSON_MEDIA_TYPE, "If-None-Match": etags[url]})
+    assert ndjson.status_code == 200
+    assert ndjson.headers["etag"] != etags[url]
+    assert ndjson.headers["vary"] == "Accept"
+
+    # Adding a result changes the version of the rows
+    first = client.get(url).json()[0]
+    created = client.post("/employee-results", json={
+        **{key: first[key] for key in first if key not in ("id", "created_at", "updated_at")}
+    })
+    assert created.status_code == 200, created.json()
+    assert client.get(url, headers={"If-None-Match": etags[url]}).status_code == 200
@@ -0,0 +1,114 @@
+"""
+Tests for the chunked data retention cleanup.
+"""
+import datetime
+
+from app.db.models import (
+    Session, BatchUpload, EmployeeData, BatchScenario,
+    BatchCalculationResult, EmployeeCalculationResult, UploadRowError, EmployeeFundAlpha
+)
+from app.db.crud import (
+    SessionDAL, BatchUploadDAL, EmployeeDataDAL, BatchScenarioDAL,
+    BatchCalculationResultDAL, EmployeeCalculationResultDAL, UploadRowErrorDAL, EmployeeFundAlphaDAL
+)
+from app.db.retention import cleanup_expired_data
+
+
+def _create_upload_with_results(db, session_id, employee_count=3):
+    """Create an upload with employees, a scenario and per-employee results."""
+    upload = BatchUploadDAL.create_upload(db, session_id=session_id, filename="test.csv")
+    scenario = BatchScenarioDAL.create_scenario(db, session_id=session_id, name="Scenario")
+    batch_result = BatchCalculationResultDAL.create_result(
+        db, scenario_id=scenario.id, total_bonus_pool=0, average_bonus=0,
+        total_employees=employee_count, capped_employees=0
+    )
+    for i in range(employee_count):
+        employee = EmployeeDataDAL.create_employee(
+            db, batch_upload_id=upload.id, base_salary=100000, target_bonus_pct=20,
+            investment_weight=60, qualitative_weight=40, investment_score_multiplier=1.0,
+            qual_score_multiplier=1.0, raf=1.0, employee_id=f"E{i}"
+        )
+        EmployeeCalculationResultDAL.create_result(
+            db, batch_result_id=batch_result.id, employee_data_id=employee.id,
+            investment_component=0.6, qualitative_component=0.4, weighted_performance=1.0,
+            pre_raf_bonus=20000, final_bonus=20000, bonus_to_salary_ratio=0.2
+        )
+    return upload
+
+
+def _expire_session(db, session_id):
+    session = SessionDAL.get_session(db, session_id)
+    session.expires_at = datetime.datetime.now() - datetime.timedelta(hours=1)
+    db.commit()
+
+
+def test_cleanup_removes_expired_session_and_children(test_db):
+    """Expired sessions are removed together with every dependent row."""
+    expired = SessionDAL.create_session(test_db)
+    live = SessionDAL.create_session(test_db)
+    _create_upload_with_results(test_db, expired.id, employee_count=5)
+    live_upload = _create_upload_with_results(test_db, live.id, employee_count=2)
+    _expire_session(test_db, expired.id)
+
+    result = cleanup_expired_data(test_db, chunk_size=2, time_budget_seconds=30)
+
+    assert result["completed"] is True
+    assert result["deleted_sessions"] == 1
+    assert result["deleted_uploads"] == 1
+    assert result["tables"]["employee_calculation_results"]["rows_deleted"] == 5
+    assert result["tables"]["employee_data"]["rows_deleted"] == 5
+    assert result["tables"]["employee_data"]["chunks"] == 3
+    assert all("duration_ms" in stats for stats in result["tables"].values())
+
+    # No orphans are left behind and live data is untouched
+    assert test_db.query(Session).count() == 1
+    assert test_db.query(BatchUpload).one().id == live_upload.id
+    assert test_db.query(EmployeeData).count() == 2
+    assert test_db.query(BatchScenario).count() == 1
+    assert test_db.query(BatchCalculationResult).count() == 1
+    assert test_db.query(EmployeeCalculationResult).count() == 2
+
+
+def test_cleanup_removes_expired_upload_of_live_session(test_db):
+    """An expired upload is removed even though its session is still valid."""
+    session = SessionDAL.create_session(test_db)
+    upload = BatchUploadDAL.create_upload(
+        test_db, session_id=session.id, filename="old.csv", expires_in_hours=-1
+    )
+    employee = EmployeeDataDAL.create_employee(
+        test_db, batch_upload_id=upload.id, base_salary=100000, target_bonus_pct=20,
+        investment_weight=60, qualitative_weight=40, investment_score_multiplier=1.0,
+        qual_score_multiplier=1.0, raf=1.0
+    )
+    EmployeeFundAlphaDAL.replace_fund_alphas(test_db, upload.id, [
+        {"employee_data_id": employee.id, "fund": "F1", "alpha": 1.5, "aum_weight": 100.0}
+    ])
+    UploadRowErrorDAL.create_errors(test_db, upload.id, [
+        {"row_number": 3, "field": "raf", "error_type": "range", "message": "raf must be at most 2", "value": "3"}
+    ])
+
+    result = cleanup_expired_data(test_db)
+
+    assert result["deleted_uploads"] == 1
+    assert result["deleted_sessions"] == 0
+    assert test_db.query(EmployeeData).count() == 0
+    assert test_db.query(UploadRowError).count() == 0
+    assert test_db.query(EmployeeFundAlpha).count() == 0
+    assert test_db.query(Session).count() == 1
+
+
+def test_cleanup_stops_when_time_budget_is_exhausted(test_db):
+    """With no time budget nothing is deleted and the run reports it is incomplete."""
+    session = SessionDAL.create_session(test_db)
+    _create_upload_with_results(test_db, session.id)
+    _expire_session(test_db, session.id)
+
+    result = cleanup_expired_data(test_db, time_budget_seconds=0)
+
+    assert result["completed"] is False
+    assert result["deleted_sessions"] == 0
+    assert test_db.query(EmployeeCalculationResult).count() == 3
+
+    # The next run picks up where the previous one stopped
+    assert cleanup_expired_data(test_db)["completed"] is True
+    assert test_db.query(Session).count() == 0
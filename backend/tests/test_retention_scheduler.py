@@ -0,0 +1,81 @@
+"""
+Tests for the retention scheduler and its single-runner lease.
+"""
+import datetime
+import time
+
+from sqlalchemy.orm import sessionmaker
+
+from app import main
+from app.db.crud import SchedulerLeaseDAL, SessionDAL
+from app.db.models import Session
+from app.services import retention_scheduler
+from app.services.retention_scheduler import RetentionScheduler
+
+
+def test_lease_is_exclusive_until_released(test_db):
+    """Only one holder can own an unexpired lease."""
+    assert SchedulerLeaseDAL.acquire_lease(test_db, "job", "worker-1", ttl_seconds=60)
+    assert not SchedulerLeaseDAL.acquire_lease(test_db, "job", "worker-2", ttl_seconds=60)
+
+    # The holder can renew its own lease
+    assert SchedulerLeaseDAL.acquire_lease(test_db, "job", "worker-1", ttl_seconds=60)
+
+    assert SchedulerLeaseDAL.release_lease(test_db, "job", "worker-1")
+    assert SchedulerLeaseDAL.acquire_lease(test_db, "job", "worker-2", ttl_seconds=60)
+    assert SchedulerLeaseDAL.get_lease(test_db, "job").holder == "worker-2"
+
+
+def test_expired_lease_can_be_taken_over(test_db):
+    """A lease left behind by a dead worker is taken over once it expires."""
+    assert SchedulerLeaseDAL.acquire_lease(test_db, "job", "worker-1", ttl_seconds=-1)
+    assert SchedulerLeaseDAL.acquire_lease(test_db, "job", "worker-2", ttl_seconds=60)
+
+
+def test_only_lease_holder_runs_cleanup(test_db):
+    """Two schedulers sharing a database: the second one skips the run."""
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=test_db.get_bind())
+    first = RetentionScheduler(session_factory=factory, interval_seconds=60, holder_id="worker-1")
+    second = RetentionScheduler(session_factory=factory, interval_seconds=60, holder_id="worker-2")
+
+    session = SessionDAL.create_session(test_db)
+    session.expires_at = datetime.datetime.now() - datetime.timedelta(hours=1)
+    test_db.commit()
+
+    run = first.run_once()
+    assert run["status"] == "completed"
+    assert run["result"]["deleted_sessions"] == 1
+    assert test_db.query(Session).count() == 0
+
+    skipped = second.run_once()
+    assert skipped["status"] == "skipped"
+    assert second.status()["last_run"] == skipped
+
+    # After the holder shuts down, the other worker takes over
+    first.shutdown()
+    assert second.run_once()["status"] == "completed"
+    assert first.status()["last_run"]["status"] == "completed"
+
+
+def test_failed_runs_record_when_they_started(test_db, monkeypatch):
+    """A failed run reports its start, so its duration is known."""
+    def fail(db):
+        time.sleep(0.01)
+        raise RuntimeError("database unavailable")
+    monkeypatch.setattr(retention_scheduler, "cleanup_expired_data", fail)
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=test_db.get_bind())
+    scheduler = RetentionScheduler(session_factory=factory, interval_seconds=60, holder_id="worker-1")
+
+    run = scheduler.run_once()
+    assert run["status"] == "failed"
+    assert run["reason"] == "database unavailable"
+    assert run["started_at"] < run["finished_at"]
+
+
+def test_app_shutdown_leaves_the_database_alone_without_a_scheduler(monkeypatch):
+    """A process that never started the scheduler has no lease to release."""
+    sessions = []
+    monkeypatch.setattr(main.retention_scheduler, "session_factory", lambda: sessions.append(1))
+    assert not main.retention_scheduler.running
+    main.stop_scheduler()
+    assert sessions == []
@@ -0,0 +1,99 @@
+"""
+Tests for row-level error reports and quarantining invalid rows.
+"""
+import datetime
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.db import get_db
+from app.db.models import BatchUpload, EmployeeData, Session, UploadRowError
+from app.routes.batch import router
+from app.services.file_processor import FileProcessor
+from benchmarks.data import generate_payroll, payroll_csv
+
+
+@pytest.fixture
+def client(test_db):
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_db] = lambda: test_db
+    return TestClient(app)
+
+
+@pytest.fixture
+def upload(test_db):
+    """An upload of 20 rows awaiting mapping, three of which are invalid."""
+    df = generate_payroll(20)
+    df["base_salary"] = df["base_salary"].astype(object)
+    df.loc[4, "base_salary"] = "unknown"
+    df.loc[9, "raf"] = 3.0
+    df.loc[15, "investment_weight"] = 10.0
+    test_db.add(Session(id="s1", expires_at=datetime.datetime.now() + datetime.timedelta(hours=1)))
+    batch_upload = BatchUpload(
+        session_id="s1", filename="payroll.csv", status="awaiting_mapping", raw_file_content=payroll_csv(df)
+    )
+    test_db.add(batch_upload)
+    test_db.commit()
+    return batch_upload
+
+
+def _mapping(**options):
+    return {"column_mappings": {}, **options}
+
+
+def test_build_row_errors():
+    df = generate_payroll(5)
+    df.loc[1, "raf"] = 2.5
+    df.loc[3, "qualitative_weight"] = 0.0
+    type_errors, range_errors = FileProcessor.validate_values(df.copy())
+
+    errors = FileProcessor.build_row_errors(df, type_errors, range_errors, header_row=2)
+    assert errors == [
+        {"row_number": 5, "field": "raf", "error_type": "range", "message": "raf must be at most 2", "value": "2.5"},
+        {
+            "row_number": 7, "field": None, "error_type": "range",
+            "message": "investment_weight and qualitative_weight must add up to 100",
+            "value": f"{df.loc[3, 'investment_weight']} + 0.0"
+        },
+    ]
+    assert FileProcessor.without_rows(df, [5, 7], header_row=2).index.tolist() == [0, 2, 4]
+
+
+def test_invalid_rows_reject_the_upload_and_are_listed(client, test_db, upload):
+    response = client.post(f"/uploads/{upload.id}/map_and_process", json=_mapping())
+    assert response.status_code == 400
+    assert response.json()["detail"].startswith("3 of 20 rows failed validation.")
+    assert test_db.query(EmployeeData).count() == 0
+
+    page = client.get(f"/uploads/{upload.id}/errors", params={"limit": 2}).json()
+    assert page["total"] == 3
+    assert [(item["row_number"], item["field"], item["error_type"]) for item in page["items"]] == [
+        (6, "base_salary", "type"), (11, "raf", "range")
+    ]
+    assert page["items"][0]["value"] == "unknown"
+    assert client.get(f"/uploads/{upload.id}/errors", params={"skip": 2}).json()["items"][0]["field"] is None
+    assert client.get(f"/uploads/{upload.id}/errors", params={"field": "raf"}).json()["total"] == 1
+
+
+def test_quarantine_loads_the_valid_rows(client, test_db, upload):
+    client.post(f"/uploads/{upload.id}/map_and_process", json=_mapping())
+
+    # Mapping again replaces the earlier attempt's errors
+    response = client.post(f"/uploads/{upload.id}/map_and_process", json=_mapping(quarantine_invalid_rows=True))
+    assert response.status_code == 200, response.json()
+    body = response.json()
+    assert (body["rows_processed"], body["rows_saved"], body["rows_quarantined"]) == (20, 17, 3)
+    assert body["errors_url"] == f"/api/v1/batch/uploads/{upload.id}/errors"
+
+    test_db.refresh(upload)
+    assert upload.status == "completed"
+    assert upload.error_message.startswith("3 rows were not stored.")
+    assert test_db.query(UploadRowError).count() == 3
+    stored = {row.employee_id for row in test_db.query(EmployeeData.employee_id)}
+    assert "E0000005" not in stored and "E0000006" in stored
+
+
+def test_errors_of_unknown_upload(client):
+    assert client.get("/uploads/999/errors").status_code == 404
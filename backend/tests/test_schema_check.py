@@ -0,0 +1,62 @@
+"""
+Tests for start-up schema initialisation and lazy imports.
+"""
+import os
+import subprocess
+import sys
+
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.pool import StaticPool
+
+from app.db.schema_check import (
+    SchemaNotAtHeadError, check_schema_at_head, get_head_revision, init_schema
+)
+
+
+@pytest.fixture
+def empty_engine():
+    """An empty in-memory SQLite database."""
+    return create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+
+
+def test_create_all_mode_creates_tables(empty_engine):
+    init_schema(empty_engine, mode="create_all")
+    assert "batch_uploads" in inspect(empty_engine).get_table_names()
+
+
+def test_migrations_mode_rejects_unmigrated_database(empty_engine):
+    with pytest.raises(SchemaNotAtHeadError):
+        init_schema(empty_engine, mode="migrations")
+
+
+def test_migrations_mode_accepts_database_at_head(empty_engine):
+    head = get_head_revision()
+    with empty_engine.begin() as connection:
+        connection.execute(text("CREATE TABLE alembic_version (version_num VARCHAR(32) NOT NULL)"))
+        connection.execute(text("INSERT INTO alembic_version VALUES (:head)"), {"head": head})
+
+    assert check_schema_at_head(empty_engine) == (True, head, head)
+    init_schema(empty_engine, mode="migrations")
+
+    # No tables were created behind Alembic's back
+    assert inspect(empty_engine).get_table_names() == ["alembic_version"]
+
+
+def test_unknown_mode_is_rejected(empty_engine):
+    with pytest.raises(ValueError):
+        init_schema(empty_engine, mode="reflect")
+
+
+def test_app_import_does_not_load_pandas():
+    """Heavy data libraries are only imported when a file is actually processed."""
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.run(
+        [sys.executable, "-c", "import sys, app.main; print('pandas' in sys.modules)"],
+        cwd=backend_dir, capture_output=True, text=True, check=True
+    ).stdout
+    assert output.strip().endswith("False")
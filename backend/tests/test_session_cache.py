@@ -0,0 +1,122 @@
+"""
+Tests for the session lookup cache.
+"""
+import datetime
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import event, update
+
+from app.db import get_async_db, get_db
+from app.db import session_cache as session_cache_module
+from app.db.crud import SessionDAL
+from app.db.models import Session
+from app.db.retention import cleanup_expired_data
+from app.db.session_cache import CachedSession, SessionCache, session_cache
+from app.routes.batch import router
+
+
+@pytest.fixture
+def queries(test_db):
+    """The session lookups test_db sends to the database."""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if "FROM sessions" in statement:
+            statements.append(statement)
+    engine = test_db.get_bind()
+    event.listen(engine, "before_cursor_execute", record)
+    yield statements
+    event.remove(engine, "before_cursor_execute", record)
+
+
+def _add_session(db, session_id, hours):
+    db.add(Session(id=session_id, expires_at=datetime.datetime.now() + datetime.timedelta(hours=hours)))
+    db.commit()
+
+
+def test_found_and_unknown_sessions_are_served_from_the_cache(test_db, queries):
+    _add_session(test_db, "s1", hours=1)
+
+    first = SessionDAL.get_cached_session(test_db, "s1")
+    assert isinstance(first, CachedSession)
+    assert SessionDAL.get_cached_session(test_db, "s1") == first
+    assert SessionDAL.get_cached_session(test_db, "unknown") is None
+    assert SessionDAL.get_cached_session(test_db, "unknown") is None
+    assert len(queries) == 2
+
+
+def test_creating_and_extending_sessions_invalidates_their_entries(test_db):
+    session = SessionDAL.create_session(test_db, expires_in_hours=1)
+    cached = SessionDAL.get_cached_session(test_db, session.id)
+    assert cached.expires_at == session.expires_at
+
+    extended = SessionDAL.extend_session(test_db, session.id, hours=48)
+    assert SessionDAL.get_cached_session(test_db, session.id).expires_at == extended.expires_at
+
+
+def test_sessions_that_look_expired_are_read_again(test_db):
+    _add_session(test_db, "s1", hours=-1)
+    assert SessionDAL.get_cached_session(test_db, "s1").expires_at < datetime.datetime.now()
+
+    # Extended by another process, which cannot invalidate this one's cache
+    later = datetime.datetime.now() + datetime.timedelta(hours=1)
+    test_db.execute(update(Session).where(Session.id == "s1").values(expires_at=later))
+    test_db.commit()
+    assert SessionDAL.get_cached_session(test_db, "s1").expires_at == later
+
+
+def test_retention_clears_deleted_sessions(test_db):
+    _add_session(test_db, "s1", hours=-1)
+    SessionDAL.get_cached_session(test_db, "s1")
+    version = session_cache.version()
+
+    assert cleanup_expired_data(test_db)["deleted_sessions"] == 1
+    assert session_cache.version() > version
+    assert session_cache.get("s1") == (False, None)
+    assert SessionDAL.get_cached_session(test_db, "s1") is None
+
+
+def test_entries_are_bounded_expire_and_skip_racing_loads(monkeypatch):
+    cache = SessionCache(ttl_seconds=60, negative_ttl_seconds=0, max_entries=2)
+    sessions = {
+        session_id: CachedSession(id=session_id, expires_at=datetime.datetime.now() + datetime.timedelta(hours=1))
+        for session_id in ("a", "b", "c")
+    }
+    for session_id in ("a", "b"):
+        cache.put(session_id, sessions[session_id], cache.version())
+    cache.get("a")
+    cache.put("c", sessions["c"], cache.version())
+    # "b" was the least recently used
+    assert cache.get("b") == (False, None)
+    assert cache.get("a") == (True, sessions["a"])
+
+    # Misses are not cached with a negative TTL of 0
+    cache.put("unknown", None, cache.version())
+    assert cache.get("unknown") == (False, None)
+
+    # A load that raced with an invalidation is not cached
+    version = cache.version()
+    cache.invalidate("b")
+    cache.put("b", sessions["b"], version)
+    assert cache.get("b") == (False, None)
+
+    now = session_cache_module.time.monotonic()
+    monkeypatch.setattr(session_cache_module.time, "monotonic", lambda: now + 61)
+    assert cache.get("a") == (False, None)
+
+
+def test_current_session_reflects_extensions(test_db_file, test_async_db):
+    _add_session(test_db_file, "s1", hours=1)
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_db] = lambda: test_db_file
+    app.dependency_overrides[get_async_db] = test_async_db
+    client = TestClient(app, cookies={"session_id": "s1"})
+
+    before = client.get("/sessions/current").json()["expires_at"]
+    extended = client.put("/sessions/extend", params={"hours": 72}).json()["expires_at"]
+    assert extended > before
+    assert client.get("/sessions/current").json()["expires_at"] == extended
+    assert client.get("/sessions/current", cookies={"session_id": "unknown"}).status_code == 404
@@ -0,0 +1,161 @@
+"""
+Tests for team aggregation and the stored per-team calculation summaries.
+"""
+import datetime
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.db import get_db
+from app.db.crud import EmployeeCalculationResultDAL, TeamCalculationSummaryDAL
+from app.db.models import (
+    BatchCalculationResult, BatchScenario, BatchUpload, EmployeeCalculationResult, EmployeeData, Session,
+    TeamCalculationSummary
+)
+from app.main import app as main_app
+from app.routes.batch import router
+
+
+def _add_employee(db, upload, team, base_salary, final_bonus, batch_result=None, applied_cap=None):
+    employee = EmployeeData(
+        batch_upload_id=upload.id, team=team, base_salary=base_salary, target_bonus_pct=20,
+        investment_weight=60, qualitative_weight=40, investment_score_multiplier=1.0,
+        qual_score_multiplier=1.0, raf=1.0
+    )
+    db.add(employee)
+    db.flush()
+    if batch_result is not None:
+        db.add(EmployeeCalculationResult(
+            batch_result_id=batch_result.id, employee_data_id=employee.id, investment_component=0.6,
+            qualitative_component=0.4, weighted_performance=1.0, pre_raf_bonus=final_bonus,
+            final_bonus=final_bonus, bonus_to_salary_ratio=final_bonus / base_salary,
+            applied_cap=applied_cap
+        ))
+    return employee
+
+
+@pytest.fixture
+def calculated_upload(test_db):
+    """An upload with three employees in two teams (one unassigned) and one calculation."""
+    test_db.add(Session(id="s1", expires_at=datetime.datetime.now() + datetime.timedelta(hours=1)))
+    upload = BatchUpload(session_id="s1", filename="payroll.csv", status="processed")
+    scenario = BatchScenario(session_id="s1", name="calc", global_parameters={})
+    test_db.add_all([upload, scenario])
+    test_db.flush()
+    batch_result = BatchCalculationResult(
+        scenario_id=scenario.id, total_bonus_pool=0, average_bonus=0, total_employees=3, capped_employees=1
+    )
+    test_db.add(batch_result)
+    test_db.flush()
+
+    _add_employee(test_db, upload, "Equities", 100_000, 20_000, batch_result)
+    _add_employee(test_db, upload, "Equities", 200_000, 50_000, batch_result, applied_cap="mrt_cap")
+    _add_employee(test_db, upload, None, 50_000, 5_000, batch_result)
+    test_db.commit()
+    return upload, batch_result
+
+
+def test_team_aggregations_group_by_team(test_db, calculated_upload):
+    upload, batch_result = calculated_upload
+    assert EmployeeCalculationResultDAL.get_latest_batch_result_id_for_upload(test_db, upload.id) == batch_result.id
+
+    aggregations = EmployeeCalculationResultDAL.get_team_aggregations(test_db, batch_result.id)
+    assert aggregations == [
+        {"team": "Equities", "employee_count": 2, "total_base_salary": 300_000,
+         "total_bonus": 70_000, "capped_employee_count": 1},
+        {"team": "Unassigned", "employee_count": 1, "total_base_salary": 50_000,
+         "total_bonus": 5_000, "capped_employee_count": 0},
+    ]
+
+
+def test_latest_batch_result_is_the_newest_over_the_upload(test_db, calculated_upload):
+    upload, batch_result = calculated_upload
+    other_upload = BatchUpload(session_id="s1", filename="other.csv", status="processed")
+    test_db.add(other_upload)
+    newer, newest = (
+        BatchCalculationResult(
+            scenario_id=batch_result.scenario_id, total_bonus_pool=0, average_bonus=0,
+            total_employees=1, capped_employees=0
+        )
+        for _ in range(2)
+    )
+    test_db.add_all([newer, newest])
+    test_db.flush()
+    _add_employee(test_db, upload, "Equities", 100_000, 10_000, newer)
+    # The newest calculation is over another upload's employees
+    _add_employee(test_db, other_upload, "Equities", 100_000, 10_000, newest)
+    test_db.commit()
+
+    assert EmployeeCalculationResultDAL.get_latest_batch_result_id_for_upload(test_db, upload.id) == newer.id
+    assert EmployeeCalculationResultDAL.get_latest_batch_result_id_for_upload(test_db, other_upload.id) == newest.id
+
+
+def test_latest_team_aggregations_endpoint(test_db, calculated_upload):
+    upload, batch_result = calculated_upload
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_db] = lambda: test_db
+    client = TestClient(app)
+    assert "/api/v1/batch/latest/team-aggregations" in {route.path for route in main_app.routes}
+
+    response = client.get("/latest/team-aggregations", params={"session_id": "s1"})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["batch_result_id"] == batch_result.id
+    equities = body["team_aggregations"][0]
+    assert equities["averageBonus"] == 35_000
+    assert equities["averageBonusToSalaryRatio"] == pytest.approx(70_000 / 300_000)
+
+    # An upload that has not been calculated yet has nothing to aggregate
+    test_db.add(BatchUpload(
+        session_id="s1", filename="new.csv", status="processed",
+        uploaded_at=datetime.datetime.utcnow() + datetime.timedelta(minutes=1)
+    ))
+    test_db.commit()
+    assert client.get("/latest/team-aggregations", params={"session_id": "s1"}).status_code == 404
+
+
+def test_build_summaries_statistics():
+    summaries = TeamCalculationSummaryDAL.build_summaries([
+        ("Rates", 100_000, 10_000, False, False),
+        ("Rates", 100_000, 30_000, True, False),
+        ("Rates", 100_000, 20_000, False, True),
+        (None, 50_000, 0, False, True),
+    ])
+    assert summaries == [
+        {"team": "Rates", "employee_count": 3, "total_base_salary": 300_000, "total_bonus": 60_000,
+         "capped_count": 1, "policy_breach_count": 1, "min_bonus": 10_000, "median_bonus": 20_000,
+         "max_bonus": 30_000},
+        {"team": "Unassigned", "employee_count": 1, "total_base_salary": 50_000, "total_bonus": 0,
+         "capped_count": 0, "policy_breach_count": 1, "min_bonus": 0, "median_bonus": 0, "max_bonus": 0},
+    ]
+
+
+def test_missing_summaries_are_computed_without_being_stored(test_db, calculated_upload):
+    _, batch_result = calculated_upload
+    expected = [("Equities", 2, 1, 35_000), ("Unassigned", 1, 0, 5_000)]
+
+    summaries = TeamCalculationSummaryDAL.get_summaries(test_db, batch_result.id)
+    assert [(s.team, s.employee_count, s.capped_count, s.median_bonus) for s in summaries] == expected
+    assert all(summary.id is None for summary in summaries)
+    # Reads never write
+    assert not test_db.new and not test_db.dirty
+    assert test_db.query(TeamCalculationSummary).count() == 0
+
+    # Once stored, the summary table is read
+    TeamCalculationSummaryDAL.create_summaries_from_results(test_db, batch_result.id)
+    test_db.commit()
+    summaries = TeamCalculationSummaryDAL.get_summaries(test_db, batch_result.id)
+    assert [(s.team, s.employee_count, s.capped_count, s.median_bonus) for s in summaries] == expected
+    assert all(summary.id is not None for summary in summaries)
+
+
+def test_summaries_are_committed_by_the_caller(test_db, calculated_upload):
+    _, batch_result = calculated_upload
+
+    TeamCalculationSummaryDAL.create_summaries(test_db, batch_result.id, [("Equities", 100_000.0, 10_000.0, False, False)])
+    assert test_db.query(TeamCalculationSummary).count() == 1
+    # Nothing is committed until the calculation's transaction is
+    test_db.rollback()
+    assert test_db.query(TeamCalculationSummary).count() == 0
@@ -0,0 +1,97 @@
+"""
+Tests for the process-local import template cache.
+"""
+import datetime
+
+import pandas as pd
+import pytest
+from sqlalchemy import event
+
+from app.db.crud import ImportTemplateDAL
+from app.db.models import Session
+from app.db.template_cache import CachedTemplate, template_cache
+from app.services.file_processor import FileProcessor
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    template_cache.clear()
+    yield
+    template_cache.clear()
+
+
+@pytest.fixture
+def template(test_db):
+    test_db.add(Session(id="s1", expires_at=datetime.datetime.now() + datetime.timedelta(hours=1)))
+    test_db.commit()
+    return ImportTemplateDAL.create_template(
+        test_db, session_id="s1", name="Payroll export",
+        column_mappings={"Emp No": "employee_id", "Base Salary (GBP)": "base_salary"},
+        default_values={"raf": 1.0}
+    )
+
+
+@pytest.fixture
+def statements(test_db):
+    """The SQL statements executed against the test database."""
+    executed = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    engine = test_db.get_bind()
+    event.listen(engine, "before_cursor_execute", record)
+    yield executed
+    event.remove(engine, "before_cursor_execute", record)
+
+
+def test_repeated_lookups_are_served_from_the_cache(test_db, template, statements):
+    first = ImportTemplateDAL.get_template(test_db, template.id)
+    assert isinstance(first, CachedTemplate)
+    assert len(statements) == 1
+
+    assert ImportTemplateDAL.get_template(test_db, template.id) is first
+    assert ImportTemplateDAL.get_templates_by_session(test_db, "s1") == [first]
+    ImportTemplateDAL.get_templates_by_session(test_db, "s1")
+    assert len(statements) == 2
+
+
+def test_writes_invalidate_the_cache(test_db, template):
+    version = template_cache.version(test_db)
+    assert ImportTemplateDAL.get_template(test_db, template.id).name == "Payroll export"
+    assert ImportTemplateDAL.get_public_templates(test_db) == []
+
+    ImportTemplateDAL.update_template(test_db, template.id, name="HR export", is_public=True)
+    assert ImportTemplateDAL.get_template(test_db, template.id).name == "HR export"
+    assert [t.id for t in ImportTemplateDAL.get_public_templates(test_db)] == [template.id]
+
+    other = ImportTemplateDAL.create_template(test_db, session_id="s1", name="Other", column_mappings={})
+    assert len(ImportTemplateDAL.get_templates_by_session(test_db, "s1")) == 2
+
+    ImportTemplateDAL.delete_template(test_db, other.id)
+    assert ImportTemplateDAL.get_template(test_db, other.id) is None
+    assert template_cache.version(test_db) == version + 3
+
+
+def test_entries_expire(test_db, template, monkeypatch):
+    cached = ImportTemplateDAL.get_template(test_db, template.id)
+    monkeypatch.setattr(template_cache, "ttl_seconds", 0)
+    template_cache.invalidate(test_db)
+    assert ImportTemplateDAL.get_template(test_db, template.id) is not cached
+    assert ImportTemplateDAL.get_template(test_db, template.id) is not cached
+
+
+def test_resolve_columns_matches_normalized_names(test_db, template):
+    cached = ImportTemplateDAL.get_template(test_db, template.id)
+    assert cached.resolve_columns(["EmpNo", "base_salary", "Team"]) == {
+        "EmpNo": "employee_id",
+        "base_salary": "base_salary",
+    }
+
+
+def test_apply_template_uses_normalized_mappings(test_db, template):
+    df = pd.DataFrame({"emp_no": ["E1", "E2"], "Base Salary": [100.0, 200.0]})
+    result = FileProcessor.apply_template(df, ImportTemplateDAL.get_template(test_db, template.id))
+    assert result["employee_id"].tolist() == ["E1", "E2"]
+    assert result["base_salary"].tolist() == [100.0, 200.0]
+    assert result["raf"].tolist() == [1.0, 1.0]
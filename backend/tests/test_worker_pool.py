@@ -0,0 +1,175 @@
+"""
+Tests for the bounded worker pool of CPU-heavy stages.
+"""
+import asyncio
+import datetime
+import threading
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.db import get_db
+from app.db.models import BatchUpload, EmployeeData, Session
+from app.routes.batch import router
+from app.services import worker_pool
+from app.services.file_processor import FileProcessor
+from app.services.worker_pool import WorkerPoolBusyError, WorkerTimeoutError, run_in_worker, run_in_worker_async
+from app.utils.instrumentation import _request_timings, timed
+from benchmarks.data import generate_payroll, payroll_csv, seed_upload
+
+
+@pytest.fixture
+def one_worker(monkeypatch):
+    """A pool of one worker that turns callers away after a short wait."""
+    worker_pool.shutdown_pool()
+    monkeypatch.setattr(worker_pool, "CPU_WORKERS", 1)
+    monkeypatch.setattr(worker_pool, "_slots", threading.BoundedSemaphore(1))
+    monkeypatch.setattr(worker_pool, "CPU_QUEUE_TIMEOUT_S", 0.05)
+    yield
+    worker_pool.shutdown_pool()
+
+
+def test_stages_run_on_a_worker_in_the_callers_context(one_worker):
+    def stage(value):
+        with timed("parse"):
+            return value * 2, threading.current_thread().name
+
+    timings = []
+    token = _request_timings.set(timings)
+    try:
+        result, thread_name = run_in_worker(stage, 21)
+    finally:
+        _request_timings.reset(token)
+    assert result == 42
+    assert thread_name.startswith("cpu-worker")
+    assert [stage_name for stage_name, _ in timings] == ["parse"]
+
+    with pytest.raises(ValueError, match="bad file"):
+        run_in_worker(lambda: (_ for _ in ()).throw(ValueError("bad file")))
+
+
+def test_busy_and_slow_stages_are_given_up_on(one_worker, monkeypatch):
+    monkeypatch.setattr(worker_pool, "CPU_TASK_TIMEOUT_S", 0.05)
+    release = threading.Event()
+
+    with pytest.raises(WorkerTimeoutError):
+        run_in_worker(release.wait)
+    # The timed-out stage still holds the only worker until it finishes
+    with pytest.raises(WorkerPoolBusyError):
+        run_in_worker(lambda: None)
+
+    release.set()
+    monkeypatch.setattr(worker_pool, "CPU_QUEUE_TIMEOUT_S", 5)
+    assert run_in_worker(lambda: "free again") == "free again"
+
+
+def test_the_event_loop_keeps_running_while_a_stage_is_awaited(one_worker):
+    started = threading.Event()
+    release = threading.Event()
+
+    def stage():
+        started.set()
+        release.wait(5)
+        return "parsed"
+
+    async def main():
+        work = asyncio.ensure_future(run_in_worker_async(stage))
+        # Other coroutines run (and release the stage) while it is awaited
+        while not started.is_set():
+            await asyncio.sleep(0.001)
+        release.set()
+        return await work
+
+    assert asyncio.run(main()) == "parsed"
+
+
+def test_mapping_is_turned_away_when_the_workers_are_busy(one_worker, test_db):
+    test_db.add(Session(id="s1", expires_at=datetime.datetime.now() + datetime.timedelta(hours=1)))
+    upload = BatchUpload(
+        session_id="s1", filename="payroll.csv", status="awaiting_mapping",
+        raw_file_content=payroll_csv(generate_payroll(20))
+    )
+    test_db.add(upload)
+    test_db.commit()
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_db] = lambda: test_db
+    client = TestClient(app)
+    payload = {"column_mappings": {column: column for column in generate_payroll(1).columns}}
+
+    release = threading.Event()
+    worker_pool.submit(release.wait)
+    try:
+        response = client.post(f"/uploads/{upload.id}/map_and_process", json=payload)
+    finally:
+        release.set()
+    assert response.status_code == 503
+    test_db.refresh(upload)
+    assert upload.status == "failed_processing"
+
+    # Once a worker is free the same mapping can be submitted again
+    response = client.post(f"/uploads/{upload.id}/map_and_process", json=payload)
+    assert response.status_code == 200, response.json()
+    assert test_db.query(EmployeeData).count() == 20
+
+
+def test_multi_file_uploads_share_the_workers(one_worker, test_db):
+    files = [(f"region_{i}.csv", payroll_csv(generate_payroll(5))) for i in range(4)]
+    results = list(FileProcessor.iter_processed_members(files))
+    assert [summary["filename"] for _, summary in results] == [name for name, _ in files]
+
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_db] = lambda: test_db
+    client = TestClient(app)
+    release = threading.Event()
+    worker_pool.submit(release.wait)
+    try:
+        response = client.post("/files", files=[("files", (name, content)) for name, content in files])
+    finally:
+        release.set()
+    assert response.status_code == 503
+    assert test_db.query(BatchUpload).one().status == "failed_processing"
+
+
+
+@pytest.fixture
+def parsed_on(monkeypatch):
+    """The threads files are parsed on."""
+    threads = []
+    read_dataframe = FileProcessor.read_dataframe
+
+    def record(*args, **kwargs):
+        threads.append(threading.current_thread().name)
+        return read_dataframe(*args, **kwargs)
+    monkeypatch.setattr(FileProcessor, "read_dataframe", record)
+    return threads
+
+
+def _client(test_db):
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_db] = lambda: test_db
+    return TestClient(app)
+
+
+def test_files_stored_without_mapping_are_parsed_once_on_a_worker(test_db, parsed_on):
+    response = _client(test_db).post(
+        "/file", data={"skip_mapping": "true"},
+        files={"file": ("payroll.csv", payroll_csv(generate_payroll(10)), "text/csv")}
+    )
+    assert response.status_code == 200, response.json()
+    assert response.json()["employees_saved"] == 10
+    assert len(parsed_on) == 1 and parsed_on[0].startswith("cpu-worker")
+
+
+def test_fund_alpha_files_are_parsed_on_a_worker(test_db, parsed_on):
+    payroll = generate_payroll(10)
+    batch_upload = seed_upload(test_db, payroll)
+    funds = payroll[["employee_id"]].assign(fund="F1", alpha=1.0, aum_weight=1.0)
+    response = _client(test_db).post(
+        f"/uploads/{batch_upload.id}/fund-alphas", files={"file": ("funds.csv", payroll_csv(funds), "text/csv")}
+    )
+    assert response.status_code == 200, response.json()
+    assert len(parsed_on) == 1 and parsed_on[0].startswith("cpu-worker")
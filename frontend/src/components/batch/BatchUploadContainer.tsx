@@ -431,7 +431,7 @@ const BatchUploadContainer: React.FC = () => {
           <>
             <FileUpload 
               onFileSelect={handleFileSelect}
-              acceptedFileTypes=".csv,.xlsx,.xls"
+              acceptedFileTypes=".csv,.xlsx,.xls,.parquet,.feather,.arrow"
               maxSizeMB={10}
               disabled={currentStage === 'uploadingFile'}
             />
@@ -587,6 +587,7 @@ const BatchUploadContainer: React.FC = () => {
           {/* ... (rest of the static help text) ... */}
           <ul className="list-disc list-inside text-sm text-gray-600 dark:text-gray-400">
             <li>CSV (Comma Separated Values), Excel (.xlsx, .xls)</li>
+            <li>Parquet (.parquet), Arrow IPC / Feather (.arrow, .feather)</li>
           </ul>
           <h3 className="text-md font-semibold text-gray-700 dark:text-gray-300 mt-4 mb-2">
             Required Fields (example)
@@ -9,6 +9,8 @@ interface ColumnMapperProps {
 interface ColumnInfo {
   name: string
   sample: string[]
+  dtype?: string
+  null_ratio?: number
 }
 
 interface MappingResult {
@@ -91,8 +93,8 @@ const ColumnMapper: React.FC<ColumnMapperProps> = ({
       if (templateId) {
         await applyTemplate(templateId)
       } else {
-        // Try to auto-map columns based on name similarity
-        const autoMappings = generateAutoMappings(data.columns || [])
+        // Use the server's suggestions, falling back to name similarity
+        const autoMappings = data.suggested_mappings || generateAutoMappings(data.columns || [])
         setMappings(autoMappings)
       }
     } catch (err) {
@@ -340,6 +342,9 @@ const ColumnMapper: React.FC<ColumnMapperProps> = ({
                     <tr key={index} className={index % 2 === 0 ? 'bg-gray-50 dark:bg-gray-800' : 'bg-white dark:bg-gray-900'}>
                       <td className="py-2 px-4 border-b border-gray-200 dark:border-gray-700 text-sm text-gray-700 dark:text-gray-300">
                         {column.name}
+                        {column.dtype && (
+                          <span className="ml-2 text-xs text-gray-500 dark:text-gray-400">{column.dtype}</span>
+                        )}
                       </td>
                       <td className="py-2 px-4 border-b border-gray-200 dark:border-gray-700 text-sm text-gray-600 dark:text-gray-400">
                         {column.sample.slice(0, 3).join(', ')}
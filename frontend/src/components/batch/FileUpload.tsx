@@ -8,7 +8,7 @@ interface FileUploadProps {
 
 const FileUpload: React.FC<FileUploadProps> = ({
   onFileSelect,
-  acceptedFileTypes = '.csv,.xlsx,.xls',
+  acceptedFileTypes = '.csv,.xlsx,.xls,.parquet,.feather,.arrow',
   maxSizeMB = 10
 }) => {
   const [dragActive, setDragActive] = useState(false)